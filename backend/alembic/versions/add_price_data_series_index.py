@@ -0,0 +1,27 @@
+"""add (asset_id, timeframe, date) index to price_data
+
+Revision ID: add_price_data_series_index
+Revises: add_user_results_session_test_unique
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_price_data_series_index'
+down_revision: Union[str, None] = 'add_user_results_session_test_unique'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Candle windows are read as ranges of one asset's series in one timeframe
+    op.create_index('ix_price_data_asset_timeframe_date', 'price_data', ['asset_id', 'timeframe', 'date'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_price_data_asset_timeframe_date', table_name='price_data')
@@ -0,0 +1,105 @@
+"""add result rollup and archive tables
+
+Revision ID: add_result_rollup_tables
+Revises: add_outcome_date_column
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_result_rollup_tables'
+down_revision: Union[str, None] = 'add_outcome_date_column'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _common_columns():
+    return [
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    ]
+
+
+def upgrade() -> None:
+    # Per-test rollup
+    op.create_table(
+        'test_result_stats',
+        *_common_columns(),
+        sa.Column('test_id', sa.Integer(), sa.ForeignKey('test_data.id')),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('correct', sa.Integer(), nullable=False, server_default='0'),
+    )
+    op.create_index('ix_test_result_stats_id', 'test_result_stats', ['id'])
+    op.create_index('ix_test_result_stats_test_id', 'test_result_stats', ['test_id'], unique=True)
+
+    # Per asset x timeframe rollup
+    op.create_table(
+        'asset_timeframe_result_stats',
+        *_common_columns(),
+        sa.Column('asset_id', sa.Integer(), sa.ForeignKey('assets.id')),
+        sa.Column('timeframe', sa.String()),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('correct', sa.Integer(), nullable=False, server_default='0'),
+        sa.UniqueConstraint('asset_id', 'timeframe', name='uq_asset_timeframe_result_stats'),
+    )
+    op.create_index('ix_asset_timeframe_result_stats_id', 'asset_timeframe_result_stats', ['id'])
+    op.create_index('ix_asset_timeframe_result_stats_asset_id', 'asset_timeframe_result_stats', ['asset_id'])
+
+    # Per day rollup
+    op.create_table(
+        'daily_result_stats',
+        *_common_columns(),
+        sa.Column('day', sa.Date()),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('correct', sa.Integer(), nullable=False, server_default='0'),
+    )
+    op.create_index('ix_daily_result_stats_id', 'daily_result_stats', ['id'])
+    op.create_index('ix_daily_result_stats_day', 'daily_result_stats', ['day'], unique=True)
+
+    # Archive for user results past the retention horizon
+    op.create_table(
+        'user_results_archive',
+        *_common_columns(),
+        sa.Column('test_id', sa.Integer()),
+        sa.Column('user_prediction', sa.String()),
+        sa.Column('is_correct', sa.Boolean()),
+        sa.Column('session_id', sa.String()),
+        sa.Column('timeframe', sa.String(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index('ix_user_results_archive_id', 'user_results_archive', ['id'])
+    op.create_index('ix_user_results_archive_test_id', 'user_results_archive', ['test_id'])
+    op.create_index('ix_user_results_archive_session_id', 'user_results_archive', ['session_id'])
+
+    # Backfill the rollups from the existing user results
+    op.execute("""
+        INSERT INTO test_result_stats (test_id, attempts, correct)
+        SELECT ur.test_id, count(*), count(*) FILTER (WHERE ur.is_correct)
+        FROM user_results ur JOIN test_data td ON td.id = ur.test_id
+        GROUP BY ur.test_id
+    """)
+    op.execute("""
+        INSERT INTO asset_timeframe_result_stats (asset_id, timeframe, attempts, correct)
+        SELECT td.asset_id, td.timeframe, count(*), count(*) FILTER (WHERE ur.is_correct)
+        FROM user_results ur JOIN test_data td ON td.id = ur.test_id
+        GROUP BY td.asset_id, td.timeframe
+    """)
+    op.execute("""
+        INSERT INTO daily_result_stats (day, attempts, correct)
+        SELECT (ur.created_at AT TIME ZONE 'UTC')::date, count(*), count(*) FILTER (WHERE ur.is_correct)
+        FROM user_results ur
+        GROUP BY 1
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('user_results_archive')
+    op.drop_table('daily_result_stats')
+    op.drop_table('asset_timeframe_result_stats')
+    op.drop_table('test_result_stats')
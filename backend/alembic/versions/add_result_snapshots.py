@@ -0,0 +1,37 @@
+"""add result_snapshots table
+
+Revision ID: add_result_snapshots
+Revises: add_result_rollup_tables
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_result_snapshots'
+down_revision: Union[str, None] = 'add_result_rollup_tables'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Serialized TestResult per submitted session
+    op.create_table(
+        'result_snapshots',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('session_id', sa.String()),
+        sa.Column('asset_symbol', sa.String()),
+        sa.Column('payload', sa.LargeBinary()),
+    )
+    op.create_index('ix_result_snapshots_id', 'result_snapshots', ['id'])
+    op.create_index('ix_result_snapshots_session_id', 'result_snapshots', ['session_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_table('result_snapshots')
@@ -0,0 +1,89 @@
+"""add unique (asset_id, timeframe, date) constraint to test_data
+
+Revision ID: add_test_data_series_unique
+Revises: add_user_results_client_history
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_test_data_series_unique'
+down_revision: Union[str, None] = 'add_user_results_client_history'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Map every duplicate test to the first test of its (asset_id, timeframe, date)
+    op.execute("""
+        CREATE TEMPORARY TABLE test_data_duplicates AS
+        SELECT id AS duplicate_id, keep_id
+        FROM (
+            SELECT id, MIN(id) OVER (PARTITION BY asset_id, timeframe, date) AS keep_id
+            FROM test_data
+        ) t
+        WHERE id <> keep_id
+    """)
+
+    # A session keeps one answer per kept test: its answer to the kept test itself if
+    # there is one, else its first answer to a duplicate. The others are dropped, so
+    # moving the answers below cannot violate uq_user_results_session_test
+    op.execute("""
+        DELETE FROM user_results r
+        USING (
+            SELECT r.id, ROW_NUMBER() OVER (
+                PARTITION BY r.session_id, COALESCE(d.keep_id, r.test_id)
+                ORDER BY d.keep_id IS NULL DESC, r.id
+            ) AS n
+            FROM user_results r
+            LEFT JOIN test_data_duplicates d ON r.test_id = d.duplicate_id
+            WHERE r.test_id IN (
+                SELECT keep_id FROM test_data_duplicates
+                UNION
+                SELECT duplicate_id FROM test_data_duplicates
+            )
+        ) ranked
+        WHERE r.id = ranked.id AND ranked.n > 1
+    """)
+    op.execute("""
+        UPDATE user_results r SET test_id = d.keep_id
+        FROM test_data_duplicates d
+        WHERE r.test_id = d.duplicate_id
+    """)
+    op.execute("""
+        UPDATE user_results_archive r SET test_id = d.keep_id
+        FROM test_data_duplicates d
+        WHERE r.test_id = d.duplicate_id
+    """)
+
+    # Per-test rollups of duplicates are merged into the kept test's row
+    op.execute("""
+        INSERT INTO test_result_stats (test_id, attempts, correct)
+        SELECT d.keep_id, SUM(s.attempts), SUM(s.correct)
+        FROM test_result_stats s
+        JOIN test_data_duplicates d ON s.test_id = d.duplicate_id
+        GROUP BY d.keep_id
+        ON CONFLICT (test_id) DO UPDATE SET
+            attempts = test_result_stats.attempts + EXCLUDED.attempts,
+            correct = test_result_stats.correct + EXCLUDED.correct,
+            updated_at = now()
+    """)
+    op.execute("""
+        DELETE FROM test_result_stats s
+        USING test_data_duplicates d
+        WHERE s.test_id = d.duplicate_id
+    """)
+
+    op.execute("DELETE FROM test_data t USING test_data_duplicates d WHERE t.id = d.duplicate_id")
+    op.execute("DROP TABLE test_data_duplicates")
+
+    op.create_unique_constraint('uq_test_data_asset_timeframe_date', 'test_data', ['asset_id', 'timeframe', 'date'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_test_data_asset_timeframe_date', 'test_data', type_='unique')
@@ -0,0 +1,34 @@
+"""add client_id and a history index to user_results and user_results_archive
+
+Revision ID: add_user_results_client_history
+Revises: add_price_data_series_index
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_user_results_client_history'
+down_revision: Union[str, None] = 'add_price_data_series_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('user_results', sa.Column('client_id', sa.String(), nullable=True))
+    # Keyset pagination of a client's sessions, newest first
+    op.create_index('ix_user_results_client_history', 'user_results', ['client_id', 'created_at', 'session_id'])
+    # Archived answers keep their client, so they stay in its history
+    op.add_column('user_results_archive', sa.Column('client_id', sa.String(), nullable=True))
+    op.create_index('ix_user_results_archive_client_history', 'user_results_archive', ['client_id', 'created_at', 'session_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_results_archive_client_history', table_name='user_results_archive')
+    op.drop_column('user_results_archive', 'client_id')
+    op.drop_index('ix_user_results_client_history', table_name='user_results')
+    op.drop_column('user_results', 'client_id')
@@ -0,0 +1,34 @@
+"""add unique (session_id, test_id) constraint to user_results
+
+Revision ID: add_user_results_session_test_unique
+Revises: add_result_snapshots
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_user_results_session_test_unique'
+down_revision: Union[str, None] = 'add_result_snapshots'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Drop duplicate answers left by concurrent submits, keeping the first one
+    op.execute("""
+        DELETE FROM user_results a
+        USING user_results b
+        WHERE a.session_id = b.session_id
+          AND a.test_id = b.test_id
+          AND a.id > b.id
+    """)
+    op.create_unique_constraint('uq_user_results_session_test', 'user_results', ['session_id', 'test_id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_user_results_session_test', 'user_results', type_='unique')
@@ -1,15 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
 
 from app.database import get_db
-from app.models.asset import Asset as AssetModel
 from app.schemas import Asset as AssetSchema
+from app.services.asset_cache import asset_catalog
 
 router = APIRouter()
 
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check an If-None-Match header against the current ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
 @router.get("/assets", response_model=List[AssetSchema])
-async def get_assets(db: Session = Depends(get_db)):
+async def get_assets(request: Request, db: Session = Depends(get_db)):
     """Get all available assets for testing"""
-    assets = db.query(AssetModel).filter(AssetModel.is_active == True).all()
-    return assets
\ No newline at end of file
+    payload, etag = asset_catalog.active_payload(db)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    
+    # Let clients revalidate without downloading the catalog again
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=payload, media_type="application/json", headers=headers)
@@ -11,6 +11,8 @@ import logging
 import time
 from app.database import get_db
 from app.api.utils.chart_validation import ChartValidator
+from app.api.utils.encodings import negotiate_format, encoded_response
+from app.services import metrics
 
 router = APIRouter()
 
@@ -117,6 +119,8 @@ def fetch_chart_data(coin=None, timeframe=None, limit=100):
             except:
                 use_cached = False
         
+        metrics.record_cache("exam_chart", use_cached)
+        
         # Only call API if we don't have usable cached data
         if not use_cached:
             days = 365  # Fetch 365 days of data
@@ -130,9 +134,11 @@ def fetch_chart_data(coin=None, timeframe=None, limit=100):
             time.sleep(0.5)
             
             logger.info(f"Calling CoinGecko API for {coin} data")
-            response = requests.get(url, headers=headers, timeout=15)
+            with metrics.observe_provider("coingecko_ohlc"):
+                response = requests.get(url, headers=headers, timeout=15)
             
             if response.status_code != 200:
+                metrics.record_provider_error("coingecko_ohlc")
                 logger.error(f"API Error: {response.status_code} - {response.text}")
                 
                 # Try to use cached data even if it's old, as a fallback
@@ -715,7 +721,7 @@ async def fibonacci_retracement_exam(request: Request):
         "instructions": "Draw Fibonacci retracements for both uptrend (low to high) and downtrend (high to low) scenarios."
     }
     
-    return response
+    return encoded_response(response, negotiate_format(request, params.get("format")))
 
 @router.get("/charting_exam/swing_analysis")
 async def swing_analysis_exam(request: Request):
@@ -736,7 +742,7 @@ async def swing_analysis_exam(request: Request):
         "instructions": "Mark all significant swing points on this chart"
     }
     
-    return response
+    return encoded_response(response, negotiate_format(request, params.get("format")))
 
 @router.get("/charting_exam/gap_analysis")
 async def gap_analysis_exam(request: Request):
@@ -758,7 +764,7 @@ async def gap_analysis_exam(request: Request):
         "instructions": "Identify all Fair Value Gaps (FVGs) on this chart."
     }
     
-    return response
+    return encoded_response(response, negotiate_format(request, params.get("format")))
 
 @router.get("/charting_exam/orderblocks")
 async def orderblocks_exam(request: Request):
@@ -779,10 +785,10 @@ async def orderblocks_exam(request: Request):
         "instructions": "Identify order blocks on this chart, marking areas of institutional interest."
     }
     
-    return response
+    return encoded_response(response, negotiate_format(request, params.get("format")))
 
 @router.get("/charting_exam/{exam_type}/practice")
-async def get_practice_chart(exam_type: str, section: str = None, chart_num: int = 1):
+async def get_practice_chart(request: Request, exam_type: str, section: str = None, chart_num: int = 1, format: Optional[str] = None):
     """Get a chart for practice in a specific exam section"""
     if exam_type not in CHARTING_EXAM_DESCRIPTIONS:
         raise HTTPException(status_code=404, detail=f"Exam type '{exam_type}' not found")
@@ -803,7 +809,7 @@ async def get_practice_chart(exam_type: str, section: str = None, chart_num: int
         "timeframe": timeframe
     }
     
-    return response
+    return encoded_response(response, negotiate_format(request, format))
 
 @router.post("/charting_exam/{exam_type}/validate")
 async def validate_answers(exam_type: str, request: Request):
@@ -856,7 +862,7 @@ async def validate_answers(exam_type: str, request: Request):
     return validation_result
 
 @router.get("/charting_exam/next_chart")
-async def get_next_chart(exam_type: str, section: str = None, chart_count: int = 1):
+async def get_next_chart(request: Request, exam_type: str, section: str = None, chart_count: int = 1, format: Optional[str] = None):
     """Get the next chart in a sequence"""
     # Keep chart_count within range
     chart_count = max(1, min(5, chart_count))
@@ -864,7 +870,7 @@ async def get_next_chart(exam_type: str, section: str = None, chart_count: int =
     # Generate a new chart
     chart_data, coin, timeframe = fetch_chart_data()
     
-    return {
+    response = {
         "chart_data": chart_data,
         "chart_count": chart_count,
         "symbol": coin.upper(),
@@ -876,6 +882,8 @@ async def get_next_chart(exam_type: str, section: str = None, chart_count: int =
         },
         "instructions": f"Identify the {section if section else 'patterns'} in this chart."
     }
+    
+    return encoded_response(response, negotiate_format(request, format))
 
 # Helper functions for chart validation
 def generate_random_candles(count=50, base_price=100):
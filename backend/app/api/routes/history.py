@@ -0,0 +1,121 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, case, tuple_, select, union_all
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import List, Optional, Tuple
+import base64
+
+import orjson
+
+from app.database import get_db, SessionLocal
+from app.models.result_snapshot import ResultSnapshot
+from app.models.user_result import UserResult
+from app.models.user_result_archive import UserResultArchive
+from app.schemas import SessionSummary, SessionHistory
+
+router = APIRouter()
+
+# Sessions read per query while streaming an export
+EXPORT_PAGE_SIZE = 500
+
+def encode_cursor(submitted_at: datetime, session_id: str) -> str:
+    """Opaque cursor pointing just past a session in the history order"""
+    return base64.urlsafe_b64encode(f"{submitted_at.isoformat()}|{session_id}".encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        submitted_at, session_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(submitted_at), session_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def fetch_history_page(db: Session, client_id: str, after: Optional[Tuple[datetime, str]], limit: int) -> List[SessionSummary]:
+    """One page of a client's sessions, newest first.
+
+    Every answer of a session is inserted in the same transaction and shares
+    its created_at, so (created_at, session_id) identifies a session. Keyset
+    pagination on that pair walks the client history indexes without an
+    OFFSET scan. Answers moved to the archive by the retention job are
+    included, so old sessions stay in the history.
+    """
+    answers = union_all(*[
+        select(
+            model.session_id, model.created_at, model.is_correct, model.timeframe
+        ).where(model.client_id == client_id)
+        for model in (UserResult, UserResultArchive)
+    ]).subquery()
+
+    query = db.query(
+        answers.c.session_id,
+        answers.c.created_at,
+        func.count().label("total"),
+        func.sum(case((answers.c.is_correct, 1), else_=0)).label("score"),
+        func.array_agg(answers.c.timeframe.distinct()).label("timeframes")
+    )
+
+    if after is not None:
+        query = query.filter(tuple_(answers.c.created_at, answers.c.session_id) < tuple_(*after))
+
+    rows = query.group_by(
+        answers.c.created_at, answers.c.session_id
+    ).order_by(
+        answers.c.created_at.desc(), answers.c.session_id.desc()
+    ).limit(limit).all()
+
+    # Asset symbols come from the result snapshots of the page's sessions
+    symbols = dict(db.query(ResultSnapshot.session_id, ResultSnapshot.asset_symbol).filter(
+        ResultSnapshot.session_id.in_([row.session_id for row in rows])
+    ).all()) if rows else {}
+
+    return [
+        SessionSummary(
+            session_id=row.session_id,
+            submitted_at=row.created_at,
+            asset_symbol=symbols.get(row.session_id),
+            timeframes=[timeframe for timeframe in row.timeframes if timeframe],
+            score=row.score or 0,
+            total=row.total
+        ) for row in rows
+    ]
+
+@router.get("/history", response_model=SessionHistory)
+async def get_session_history(
+    client_id: str = Query(..., description="Anonymous client ID passed when submitting answers"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(20, ge=1, le=100, description="Number of sessions per page"),
+    db: Session = Depends(get_db)
+):
+    """List a client's past sessions, newest first"""
+    after = decode_cursor(cursor) if cursor else None
+
+    # Read one extra session to know whether another page follows
+    sessions = fetch_history_page(db, client_id, after, limit + 1)
+    next_cursor = None
+    if len(sessions) > limit:
+        sessions = sessions[:limit]
+        next_cursor = encode_cursor(sessions[-1].submitted_at, sessions[-1].session_id)
+
+    return SessionHistory(sessions=sessions, next_cursor=next_cursor)
+
+def stream_history(client_id: str):
+    """Yield a client's sessions as NDJSON, one page of sessions in memory at a time"""
+    db = SessionLocal()
+    try:
+        after = None
+        while True:
+            sessions = fetch_history_page(db, client_id, after, EXPORT_PAGE_SIZE)
+            for session in sessions:
+                yield orjson.dumps(session.model_dump(mode="json")) + b"\n"
+            if len(sessions) < EXPORT_PAGE_SIZE:
+                break
+            after = (sessions[-1].submitted_at, sessions[-1].session_id)
+    finally:
+        db.close()
+
+@router.get("/history/export")
+async def export_session_history(
+    client_id: str = Query(..., description="Anonymous client ID passed when submitting answers")
+):
+    """Stream a client's full session history as newline-delimited JSON"""
+    return StreamingResponse(stream_history(client_id), media_type="application/x-ndjson")
@@ -0,0 +1,71 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from datetime import timedelta
+from typing import List
+
+from app.database import get_db
+from app.models.result_stats import TestResultStats, AssetTimeframeResultStats, DailyResultStats
+from app.schemas import TestStats, TimeframeStats, AssetStats, DailyStats
+from app.services.analytics_service import utc_today
+from app.services.asset_cache import asset_catalog
+
+router = APIRouter()
+
+def accuracy(attempts: int, correct: int) -> float:
+    """Hit rate for a rollup row"""
+    return correct / attempts if attempts else 0.0
+
+@router.get("/stats/tests/{test_id}", response_model=TestStats)
+async def get_test_stats(test_id: int, db: Session = Depends(get_db)):
+    """Get the hit rate for a single test"""
+    stats = db.query(TestResultStats).filter(TestResultStats.test_id == test_id).first()
+    attempts = stats.attempts if stats else 0
+    correct = stats.correct if stats else 0
+
+    return TestStats(test_id=test_id, attempts=attempts, correct=correct, accuracy=accuracy(attempts, correct))
+
+@router.get("/stats/assets/{asset_symbol}", response_model=AssetStats)
+async def get_asset_stats(asset_symbol: str, db: Session = Depends(get_db)):
+    """Get hit rates for an asset, overall and per timeframe"""
+    asset = asset_catalog.get_by_symbol(db, asset_symbol.lower())
+    if not asset:
+        raise HTTPException(status_code=404, detail=f"Asset with symbol {asset_symbol} not found")
+
+    # At most one row per timeframe
+    rows = db.query(AssetTimeframeResultStats).filter(
+        AssetTimeframeResultStats.asset_id == asset.id
+    ).order_by(AssetTimeframeResultStats.timeframe).all()
+
+    timeframes = [
+        TimeframeStats(
+            timeframe=row.timeframe,
+            attempts=row.attempts,
+            correct=row.correct,
+            accuracy=accuracy(row.attempts, row.correct)
+        ) for row in rows
+    ]
+    attempts = sum(row.attempts for row in rows)
+    correct = sum(row.correct for row in rows)
+
+    return AssetStats(
+        asset_symbol=asset.symbol,
+        asset_name=asset.name,
+        attempts=attempts,
+        correct=correct,
+        accuracy=accuracy(attempts, correct),
+        timeframes=timeframes
+    )
+
+@router.get("/stats/daily", response_model=List[DailyStats])
+async def get_daily_stats(
+    days: int = Query(30, ge=1, le=365, description="Number of most recent days to return"),
+    db: Session = Depends(get_db)
+):
+    """Get daily hit rates for the most recent days"""
+    since = utc_today() - timedelta(days=days - 1)
+    rows = db.query(DailyResultStats).filter(DailyResultStats.day >= since).order_by(DailyResultStats.day).all()
+
+    return [
+        DailyStats(day=row.day, attempts=row.attempts, correct=row.correct, accuracy=accuracy(row.attempts, row.correct))
+        for row in rows
+    ]
@@ -2,171 +2,66 @@ from fastapi import APIRouter, Depends, HTTPException, Request, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import uuid
-import random
-import os
 
 from app.database import get_db
-from app.models.asset import Asset
-from app.models.test_data import TestData
 from app.models.user_result import UserResult
-from app.schemas import TestSession, TestAnswerSubmit, TestResult, TestQuestion, OHLC, TimeframeSelection, OHLCPoint, TestAnswerResponse
+from app.schemas import TestSession, TestAnswerSubmit, TestResult, TimeframeSelection, OHLCPoint
 from app.services.data_service import TIMEFRAME_4H, TIMEFRAME_DAILY, TIMEFRAME_WEEKLY, TIMEFRAME_MONTHLY, VALID_TIMEFRAMES
-from app.services import chart_service
-from app.config import settings
+from app.services import analytics_service
+from app.services.asset_cache import asset_catalog
+from app.services.result_buffer import result_buffer, build_entry, flush_entries, write_behind_enabled
+from app.services.result_snapshots import encode_result, cache_snapshot, save_snapshots, load_snapshot
+from app.services.locks import session_lock
+from app.services.session_store import save_session, load_session
+from app.api.utils.serialization import answer_dict, result_dict
+from app.api.utils.encodings import negotiate_format, encoded_response
+from app.services.session_pool import take_session
+from app.services.test_sessions import build_random_session, build_asset_session
+from app.services.grading import load_tests, load_graded_tests, grade_answers
 
 router = APIRouter()
 
-async def get_or_generate_chart(test_data: TestData, db: Session):
-    """Check if chart exists and generate if missing"""
-    # Skip this function if we're using OHLC data instead
-    # Only for backward compatibility with existing tests
-    if not test_data.setup_chart_path or not test_data.outcome_chart_path:
-        return False
-        
-    # Check setup chart
-    setup_chart_path = f"{settings.CHARTS_DIR}/{test_data.setup_chart_path}"
-    outcome_chart_path = f"{settings.CHARTS_DIR}/{test_data.outcome_chart_path}"
-    
-    charts_generated = False
-    
-    # If either chart is missing, generate both
-    if not os.path.exists(setup_chart_path) or not os.path.exists(outcome_chart_path):
-        charts_generated = await chart_service.generate_chart_async(test_data, db)
-    
-    return charts_generated
+def answered_test_ids(db: Session, session_id: str):
+    """Subquery of test ids already answered in a session, used to exclude them on retakes"""
+    return db.query(UserResult.test_id).filter(UserResult.session_id == session_id)
 
-async def get_ohlc_data_for_test(test_data: TestData, db: Session):
-    """Get OHLC data for a test"""
-    # Get the asset for this test
-    asset = db.query(Asset).filter(Asset.id == test_data.asset_id).first()
-    if not asset:
-        return None, None
-        
-    # Get OHLC data
-    setup_ohlc, outcome_ohlc = await chart_service.get_ohlc_data(
-        db=db,
-        asset=asset,
-        date_n=test_data.date,
-        timeframe=test_data.timeframe
-    )
-    
-    return setup_ohlc, outcome_ohlc
+def retake_exclusion(db: Session, session_id: str):
+    """Test ids to exclude on a retake, read from the session store while the session is live"""
+    state = load_session(session_id)
+    if state is not None:
+        return state["test_ids"]
+    return answered_test_ids(db, session_id)
 
 @router.get("/test/random", response_model=TestSession)
 async def get_random_cross_asset_test(
     request: Request, 
     timeframe: Optional[str] = Query("random", description="Timeframe to use (4h, daily, weekly, monthly, random)"),
     session_id: Optional[str] = Query(None, description="Previous session ID for retake"),
+    format: Optional[str] = Query(None, description="Response encoding (json, columnar, msgpack); defaults to the Accept header"),
     db: Session = Depends(get_db)
 ):
     """Get random test data from across different assets with optional timeframe filtering"""
-    # Get all assets
-    assets = db.query(Asset).all()
-    if not assets:
-        raise HTTPException(status_code=404, detail="No assets found")
-    
     # Validate timeframe
     if timeframe != "random" and timeframe not in VALID_TIMEFRAMES:
         raise HTTPException(status_code=400, detail=f"Invalid timeframe: {timeframe}. Must be one of: {', '.join(VALID_TIMEFRAMES)} or 'random'")
     
-    # Get available tests across all assets
-    all_tests = []
-    for asset in assets:
-        # Filter by timeframe if specified
-        query = db.query(TestData).filter(TestData.asset_id == asset.id)
-        
-        if timeframe != "random":
-            query = query.filter(TestData.timeframe == timeframe)
-        
-        # Get previously answered tests if session_id is provided
-        excluded_test_ids = []
-        if session_id:
-            previous_results = db.query(UserResult).filter(UserResult.session_id == session_id).all()
-            excluded_test_ids = [result.test_id for result in previous_results]
-            
-            # Exclude previously answered tests
-            if excluded_test_ids:
-                query = query.filter(~TestData.id.in_(excluded_test_ids))
-        
-        tests = query.all()
-        if tests:
-            all_tests.extend(tests)
-    
-    if not all_tests:
-        raise HTTPException(status_code=404, detail="No tests available")
+    fmt = negotiate_format(request, format)
     
-    # Create a new session ID
-    new_session_id = str(uuid.uuid4())
+    # Serve a pre-built session from the pool; retakes need their own exclusions
+    if not session_id:
+        payload = take_session("random", timeframe)
+        if payload is not None:
+            return encoded_response(payload, fmt)
     
-    # Randomly select tests
-    selected_tests = random.sample(all_tests, min(5, len(all_tests)))
+    # Exclude previously answered tests if session_id is provided for retakes
+    exclude = retake_exclusion(db, session_id) if session_id else None
     
-    # Format the questions
-    questions = []
-    asset_ids = set()
-    
-    for test in selected_tests:
-        # For backward compatibility, check if charts need to be generated
-        if test.setup_chart_path and test.outcome_chart_path:
-            await get_or_generate_chart(test, db)
-        
-        # Get the asset for this test
-        asset = db.query(Asset).filter(Asset.id == test.asset_id).first()
-        if not asset:
-            continue
-            
-        asset_ids.add(asset.id)
-        
-        # Get OHLC data for the date and timeframe
-        from app.models.price_data import PriceData
-        ohlc_data = db.query(PriceData).filter(
-            PriceData.asset_id == asset.id,
-            PriceData.date == test.date,
-            PriceData.timeframe == test.timeframe
-        ).first()
-        
-        # Get OHLC data arrays for charts
-        setup_ohlc_array, _ = await get_ohlc_data_for_test(test, db)
-        
-        if ohlc_data:
-            # Prepare question with OHLC data
-            question = TestQuestion(
-                id=test.id,
-                date=test.date,
-                timeframe=test.timeframe,
-                ohlc=OHLC(
-                    open=ohlc_data.open,
-                    high=ohlc_data.high,
-                    low=ohlc_data.low,
-                    close=ohlc_data.close
-                ),
-                ohlc_data=setup_ohlc_array
-            )
-            
-            # For backward compatibility, add chart URLs if they exist
-            if test.setup_chart_path:
-                question.setup_chart_url = f"/static/{test.setup_chart_path}"
-                
-            questions.append(question)
-    
-    # If we have test questions from different assets, use "random" as the symbol
-    # Otherwise, if all questions are from a single asset, use that asset's symbol
-    if len(asset_ids) > 1:
-        asset_symbol = "random"
-        asset_name = "Random Mix"
-    else:
-        # If only one asset, use that asset's details
-        asset = next((a for a in assets if a.id in asset_ids), None)
-        asset_symbol = asset.symbol if asset else "random"
-        asset_name = asset.name if asset else "Random Mix"
+    # Create a new session and keep what grading needs in the session store
+    new_session_id = str(uuid.uuid4())
+    session, state = await build_random_session(db, new_session_id, timeframe, exclude=exclude)
+    save_session(new_session_id, state)
     
-    return TestSession(
-        session_id=new_session_id,
-        questions=questions,
-        asset_symbol=asset_symbol,
-        asset_name=asset_name,
-        selected_timeframe=timeframe
-    )
+    return encoded_response(session, fmt)
 
 @router.get("/test/{asset_symbol}", response_model=TestSession)
 async def get_test_for_asset(
@@ -174,11 +69,12 @@ async def get_test_for_asset(
     request: Request, 
     timeframe: Optional[str] = Query("random", description="Timeframe to use (4h, daily, weekly, monthly, random)"),
     session_id: Optional[str] = Query(None, description="Previous session ID for retake"),
+    format: Optional[str] = Query(None, description="Response encoding (json, columnar, msgpack); defaults to the Accept header"),
     db: Session = Depends(get_db)
 ):
     """Get test data for a specific asset with optional timeframe filtering"""
     # Find the asset
-    asset = db.query(Asset).filter(Asset.symbol == asset_symbol.lower()).first()
+    asset = asset_catalog.get_by_symbol(db, asset_symbol.lower())
     if not asset:
         raise HTTPException(status_code=404, detail=f"Asset with symbol {asset_symbol} not found")
     
@@ -186,333 +82,159 @@ async def get_test_for_asset(
     if timeframe != "random" and timeframe not in VALID_TIMEFRAMES:
         raise HTTPException(status_code=400, detail=f"Invalid timeframe: {timeframe}. Must be one of: {', '.join(VALID_TIMEFRAMES)} or 'random'")
     
-    # Get available tests for this asset
-    query = db.query(TestData).filter(TestData.asset_id == asset.id)
+    fmt = negotiate_format(request, format)
     
-    # Filter by timeframe if specified
-    if timeframe != "random":
-        query = query.filter(TestData.timeframe == timeframe)
+    # Serve a pre-built session from the pool; retakes need their own exclusions
+    if not session_id:
+        payload = take_session(asset.symbol, timeframe)
+        if payload is not None:
+            return encoded_response(payload, fmt)
     
-    # Get previously answered tests if session_id is provided for retakes
-    excluded_test_ids = []
-    if session_id:
-        previous_results = db.query(UserResult).filter(UserResult.session_id == session_id).all()
-        excluded_test_ids = [result.test_id for result in previous_results]
-        
-        # Exclude previously answered tests
-        if excluded_test_ids:
-            query = query.filter(~TestData.id.in_(excluded_test_ids))
+    # Exclude previously answered tests if session_id is provided for retakes
+    exclude = retake_exclusion(db, session_id) if session_id else None
     
-    tests = query.all()
-    
-    if not tests:
-        available_timeframes = []
-        # Check which timeframes have data for this asset
-        for tf in VALID_TIMEFRAMES:
-            if db.query(TestData).filter(TestData.asset_id == asset.id, TestData.timeframe == tf).first():
-                available_timeframes.append(tf)
-                
-        msg = f"No tests available for {asset.name} with the selected timeframe: {timeframe}."
-        if available_timeframes:
-            msg += f" Available timeframes: {', '.join(available_timeframes)}"
-        else:
-            msg += " No tests available for any timeframe. Please run database initialization."
-            
-        raise HTTPException(status_code=404, detail=msg)
-    
-    # Create a new session ID
+    # Create a new session and keep what grading needs in the session store
     new_session_id = str(uuid.uuid4())
+    session, state = await build_asset_session(db, new_session_id, asset, timeframe, exclude=exclude)
+    save_session(new_session_id, state)
     
-    # Randomly select tests
-    selected_tests = random.sample(tests, min(5, len(tests)))
-    
-    # Format the questions
-    questions = []
-    for test in selected_tests:
-        # For backward compatibility, check if charts need to be generated
-        if test.setup_chart_path and test.outcome_chart_path:
-            await get_or_generate_chart(test, db)
-        
-        # Get OHLC data for the date and timeframe
-        from app.models.price_data import PriceData
-        ohlc_data = db.query(PriceData).filter(
-            PriceData.asset_id == asset.id,
-            PriceData.date == test.date,
-            PriceData.timeframe == test.timeframe
-        ).first()
-        
-        # Get OHLC data arrays for charts
-        setup_ohlc_array, _ = await get_ohlc_data_for_test(test, db)
-        
-        if ohlc_data:
-            # Prepare question with OHLC data
-            question = TestQuestion(
-                id=test.id,
-                date=test.date,
-                timeframe=test.timeframe,
-                ohlc=OHLC(
-                    open=ohlc_data.open,
-                    high=ohlc_data.high,
-                    low=ohlc_data.low,
-                    close=ohlc_data.close
-                ),
-                ohlc_data=setup_ohlc_array
-            )
-            
-            # For backward compatibility, add chart URLs if they exist
-            if test.setup_chart_path:
-                question.setup_chart_url = f"/static/{test.setup_chart_path}"
-                
-            questions.append(question)
-    
-    return TestSession(
-        session_id=new_session_id,
-        questions=questions,
-        asset_symbol=asset_symbol,
-        asset_name=asset.name,
-        selected_timeframe=timeframe
-    )
+    return encoded_response(session, fmt)
 
 @router.post("/test/{asset_symbol}", response_model=TestResult)
 async def submit_test_answers(
     asset_symbol: str,
     answer_data: List[TestAnswerSubmit],
     session_id: str,
+    request: Request,
+    client_id: Optional[str] = Query(None, description="Anonymous client ID, used to list the client's history"),
+    format: Optional[str] = Query(None, description="Response encoding (json, columnar, msgpack); defaults to the Accept header"),
     db: Session = Depends(get_db)
 ):
     """Submit test answers and get results"""
-    # Check if session exists by checking if any results exist for this session
-    existing_results = db.query(UserResult).filter(UserResult.session_id == session_id).all()
-    if existing_results:
-        # Results already exist, redirect to results page
-        result = await get_test_results(asset_symbol, session_id, db)
-        return result
-    
+    fmt = negotiate_format(request, format)
+    
+    # Retries and double submits replay the stored result with a single lookup
+    payload = load_snapshot(db, session_id)
+    if payload is not None:
+        return encoded_response(payload, fmt)
+    
+    # Only one request per session grades; concurrent duplicates wait and replay
+    async with session_lock(session_id):
+        payload = load_snapshot(db, session_id)
+        if payload is None:
+            # Sessions submitted before snapshots existed are rebuilt from their results
+            if db.query(UserResult.id).filter(UserResult.session_id == session_id).first():
+                payload = await rebuild_result(asset_symbol, session_id, db)
+            else:
+                payload = await grade_submission(asset_symbol, answer_data, session_id, db, client_id=client_id)
+    
+    return encoded_response(payload, fmt)
+
+async def grade_submission(
+    asset_symbol: str,
+    answer_data: List[TestAnswerSubmit],
+    session_id: str,
+    db: Session,
+    client_id: Optional[str] = None
+) -> bytes:
+    """Grade a submission, persist it and return the encoded TestResult"""
     # Validate asset if not random
     asset = None
     if asset_symbol != "random":
-        asset = db.query(Asset).filter(Asset.symbol == asset_symbol.lower()).first()
+        asset = asset_catalog.get_by_symbol(db, asset_symbol.lower())
         if not asset:
             raise HTTPException(status_code=404, detail=f"Asset with symbol {asset_symbol} not found")
     
-    # Process each answer
-    score = 0
-    total = len(answer_data)
-    answer_responses = []
-    
-    for answer in answer_data:
-        # Get the test data
-        test = db.query(TestData).filter(TestData.id == answer.test_id).first()
-        if not test:
-            raise HTTPException(status_code=404, detail=f"Test with ID {answer.test_id} not found")
-        
-        # Get the asset for this test
-        test_asset = db.query(Asset).filter(Asset.id == test.asset_id).first()
-        if not test_asset:
-            raise HTTPException(status_code=404, detail=f"Asset for test ID {answer.test_id} not found")
-        
-        # For backward compatibility, check if charts need to be generated
-        if test.setup_chart_path and test.outcome_chart_path:
-            await get_or_generate_chart(test, db)
-        
-        # Get OHLC data for the setup and outcome dates
-        from app.models.price_data import PriceData
-        setup_ohlc = db.query(PriceData).filter(
-            PriceData.asset_id == test.asset_id,
-            PriceData.date == test.date,
-            PriceData.timeframe == test.timeframe
-        ).first()
-        
-        # Get the next date after test.date for the outcome
-        next_day = db.query(PriceData).filter(
-            PriceData.asset_id == test.asset_id,
-            PriceData.date > test.date,
-            PriceData.timeframe == test.timeframe
-        ).order_by(PriceData.date).first()
-        
-        # Get OHLC data arrays
-        setup_ohlc_array, outcome_ohlc_array = await get_ohlc_data_for_test(test, db)
-        
-        outcome_ohlc = None
-        outcome_date = None
-        if next_day:
-            outcome_ohlc = next_day
-            outcome_date = next_day.date
-        
-        # Check if the answer is correct
-        is_correct = answer.prediction == test.correct_bias
-        if is_correct:
-            score += 1
-        
-        # Create a user result record
-        user_result = UserResult(
-            session_id=session_id,
-            test_id=test.id,
-            user_prediction=answer.prediction,
-            is_correct=is_correct
-        )
-        db.add(user_result)
-        
-        # Create a default OHLC object if setup_ohlc is None
-        default_ohlc = OHLC(open=0.0, high=0.0, low=0.0, close=0.0)
-
-        # Prepare the answer response
-        answer_response = TestAnswerResponse(
-            test_id=test.id,
-            user_prediction=answer.prediction,
-            correct_answer=test.correct_bias,
-            is_correct=is_correct,
-            date=test.date,
-            outcome_date=outcome_date,
-            timeframe=test.timeframe,
-            ohlc_data=setup_ohlc_array,
-            outcome_ohlc_data=outcome_ohlc_array,
-            ohlc=OHLC(
-                open=setup_ohlc.open if setup_ohlc else 0.0,
-                high=setup_ohlc.high if setup_ohlc else 0.0,
-                low=setup_ohlc.low if setup_ohlc else 0.0,
-                close=setup_ohlc.close if setup_ohlc else 0.0
-            ),
-            outcome_ohlc=OHLC(
-                open=next_day.open if next_day else 0.0,
-                high=next_day.high if next_day else 0.0,
-                low=next_day.low if next_day else 0.0,
-                close=next_day.close if next_day else 0.0
-            ) if next_day else None
-        )
-        
-        # For backward compatibility, add chart URLs if they exist
-        if test.setup_chart_path:
-            answer_response.setup_chart_url = f"/static/{test.setup_chart_path}"
-        if test.outcome_chart_path:
-            answer_response.outcome_chart_url = f"/static/{test.outcome_chart_path}"
-            
-        answer_responses.append(answer_response)
+    # Grade from the session store while the session is live, otherwise load
+    # every referenced test and its candles with a fixed number of queries
+    state = load_session(session_id)
+    if state is not None and all(str(answer.test_id) in state["tests"] for answer in answer_data):
+        graded_tests = state["tests"]
+    else:
+        tests = load_tests(db, [answer.test_id for answer in answer_data])
+        for answer in answer_data:
+            if answer.test_id not in tests:
+                raise HTTPException(status_code=404, detail=f"Test with ID {answer.test_id} not found")
+        graded_tests = load_graded_tests(db, list(tests.values()))
     
-    # Commit the user results
-    db.commit()
+    score, answer_responses, graded_answers = grade_answers(graded_tests, answer_data)
+    total = len(answer_data)
     
     # Get the asset details for the response
     asset_name = "Random Mix"
     if asset:
         asset_name = asset.name
     
-    # Return the test result
-    return TestResult(
-        score=score,
-        total=total,
-        answers=answer_responses,
-        asset_symbol=asset_symbol,
-        asset_name=asset_name
-    )
+    # Build the result once; it never changes after submission
+    payload = encode_result(result_dict(score, total, answer_responses, asset_symbol, asset_name))
+    
+    entry = build_entry(session_id, analytics_service.utc_today(), graded_answers, asset_symbol=asset_symbol, snapshot=payload, client_id=client_id)
+    if write_behind_enabled():
+        # Buffer the submission; the background writer bulk-inserts it
+        result_buffer.append(entry)
+    else:
+        # Insert the user results, rollups and result snapshot in one transaction
+        flush_entries(db, [(None, entry)])
+    cache_snapshot(session_id, payload)
+    
+    return payload
 
 @router.get("/results/{asset_symbol}", response_model=TestResult)
 async def get_test_results(
     asset_symbol: str,
     session_id: str,
+    request: Request,
+    format: Optional[str] = Query(None, description="Response encoding (json, columnar, msgpack); defaults to the Accept header"),
     db: Session = Depends(get_db)
 ):
     """Get results for a previously submitted test"""
+    fmt = negotiate_format(request, format)
+    
+    # Serve the snapshot written at submit time
+    payload = load_snapshot(db, session_id)
+    if payload is None:
+        # Sessions submitted before snapshots existed are rebuilt once
+        payload = await rebuild_result(asset_symbol, session_id, db)
+    
+    return encoded_response(payload, fmt)
+
+async def rebuild_result(asset_symbol: str, session_id: str, db: Session) -> bytes:
+    """Rebuild the result of a session from its user results and store it as a snapshot"""
     # Get user results for this session
     user_results = db.query(UserResult).filter(UserResult.session_id == session_id).all()
     if not user_results:
         raise HTTPException(status_code=404, detail=f"No results found for session ID {session_id}")
     
+    # Load every test and its candles with a fixed number of queries
+    tests = load_tests(db, [result.test_id for result in user_results])
+    graded_tests = load_graded_tests(db, list(tests.values()))
+    
     # Process the results
     score = 0
     total = len(user_results)
     answer_responses = []
     
     for result in user_results:
-        # Get the test data
-        test = db.query(TestData).filter(TestData.id == result.test_id).first()
-        if not test:
-            continue
-        
-        # Get the asset for this test
-        test_asset = db.query(Asset).filter(Asset.id == test.asset_id).first()
-        if not test_asset:
+        graded = graded_tests.get(str(result.test_id))
+        if not graded:
             continue
         
-        # For backward compatibility, check if charts need to be generated
-        if test.setup_chart_path and test.outcome_chart_path:
-            await get_or_generate_chart(test, db)
-        
-        # Get OHLC data for the setup and outcome dates
-        from app.models.price_data import PriceData
-        setup_ohlc = db.query(PriceData).filter(
-            PriceData.asset_id == test.asset_id,
-            PriceData.date == test.date,
-            PriceData.timeframe == test.timeframe
-        ).first()
-        
-        # Get the next date after test.date for the outcome
-        next_day = db.query(PriceData).filter(
-            PriceData.asset_id == test.asset_id,
-            PriceData.date > test.date,
-            PriceData.timeframe == test.timeframe
-        ).order_by(PriceData.date).first()
-        
-        # Get OHLC data arrays
-        setup_ohlc_array, outcome_ohlc_array = await get_ohlc_data_for_test(test, db)
-        
-        outcome_ohlc = None
-        outcome_date = None
-        if next_day:
-            outcome_ohlc = next_day
-            outcome_date = next_day.date
-        
         if result.is_correct:
             score += 1
         
-        # Create a default OHLC object if setup_ohlc is None
-        default_ohlc = OHLC(open=0.0, high=0.0, low=0.0, close=0.0)
-
-        # Prepare the answer response
-        answer_response = TestAnswerResponse(
-            test_id=test.id,
-            user_prediction=result.user_prediction,
-            correct_answer=test.correct_bias,
-            is_correct=result.is_correct,
-            date=test.date,
-            outcome_date=outcome_date,
-            timeframe=test.timeframe,
-            ohlc_data=setup_ohlc_array,
-            outcome_ohlc_data=outcome_ohlc_array,
-            ohlc=OHLC(
-                open=setup_ohlc.open if setup_ohlc else 0.0,
-                high=setup_ohlc.high if setup_ohlc else 0.0,
-                low=setup_ohlc.low if setup_ohlc else 0.0,
-                close=setup_ohlc.close if setup_ohlc else 0.0
-            ),
-            outcome_ohlc=OHLC(
-                open=next_day.open if next_day else 0.0,
-                high=next_day.high if next_day else 0.0,
-                low=next_day.low if next_day else 0.0,
-                close=next_day.close if next_day else 0.0
-            ) if next_day else None
-        )
-        
-        # For backward compatibility, add chart URLs if they exist
-        if test.setup_chart_path:
-            answer_response.setup_chart_url = f"/static/{test.setup_chart_path}"
-        if test.outcome_chart_path:
-            answer_response.outcome_chart_url = f"/static/{test.outcome_chart_path}"
-            
-        answer_responses.append(answer_response)
+        answer_responses.append(answer_dict(graded["answer"], result.user_prediction, result.is_correct))
     
     # Determine the asset name
     asset_name = "Random Mix"
     if asset_symbol != "random":
-        asset = db.query(Asset).filter(Asset.symbol == asset_symbol.lower()).first()
+        asset = asset_catalog.get_by_symbol(db, asset_symbol.lower())
         if asset:
             asset_name = asset.name
     
-    # Return the test result
-    return TestResult(
-        score=score,
-        total=total,
-        answers=answer_responses,
-        asset_symbol=asset_symbol,
-        asset_name=asset_name
-    )
\ No newline at end of file
+    # Build the result and keep it as a snapshot for later reads
+    payload = encode_result(result_dict(score, total, answer_responses, asset_symbol, asset_name))
+    save_snapshots(db, [{"session_id": session_id, "asset_symbol": asset_symbol, "payload": payload}])
+    db.commit()
+    cache_snapshot(session_id, payload)
+    
+    return payload
\ No newline at end of file
@@ -0,0 +1,107 @@
+"""
+Opt-in compact encodings for OHLC-heavy responses.
+
+By default responses keep their JSON contract, with one object per candle.
+Clients can ask for a compact layout with ?format= or the Accept header:
+
+- columnar: JSON where every OHLC array becomes an object of parallel
+  arrays. The time column is delta-encoded: the first value is absolute
+  (epoch seconds, UTC) and each later value is the offset from the previous one.
+- msgpack: the same columnar layout packed as MessagePack.
+"""
+
+import calendar
+from datetime import date
+from typing import Any, Dict, List, Optional, Union
+
+import msgpack
+import orjson
+from fastapi import HTTPException, Request, Response
+
+from app.middleware.compression import is_precompressed, decompress
+
+FORMAT_JSON = "json"
+FORMAT_COLUMNAR = "columnar"
+FORMAT_MSGPACK = "msgpack"
+
+COLUMNAR_MEDIA_TYPE = "application/vnd.ohlc.columnar+json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+# Accept header values mapped to a format, checked in order
+_ACCEPT_FORMATS = [
+    (MSGPACK_MEDIA_TYPE, FORMAT_MSGPACK),
+    ("application/x-msgpack", FORMAT_MSGPACK),
+    ("application/vnd.msgpack", FORMAT_MSGPACK),
+    (COLUMNAR_MEDIA_TYPE, FORMAT_COLUMNAR),
+]
+
+# Response keys holding OHLC arrays, and the time field of their candles
+OHLC_ARRAY_KEYS = {
+    "ohlc_data": "date",
+    "outcome_ohlc_data": "date",
+    "chart_data": "time",
+}
+
+def negotiate_format(request: Request, requested_format: Optional[str] = None) -> str:
+    """Pick the response encoding from ?format=, then the Accept header"""
+    if requested_format:
+        if requested_format not in (FORMAT_JSON, FORMAT_COLUMNAR, FORMAT_MSGPACK):
+            raise HTTPException(status_code=400, detail=f"Invalid format: {requested_format}. Must be one of: json, columnar, msgpack")
+        return requested_format
+
+    accept = request.headers.get("accept", "")
+    for media_type, fmt in _ACCEPT_FORMATS:
+        if media_type in accept:
+            return fmt
+    return FORMAT_JSON
+
+def _epoch_seconds(value: Union[str, int, float]) -> int:
+    # Test candles carry ISO dates, charting exam candles epoch seconds
+    if isinstance(value, str):
+        return calendar.timegm(date.fromisoformat(value[:10]).timetuple())
+    return int(value)
+
+def to_columns(points: List[Dict[str, Any]], time_key: str) -> Dict[str, List]:
+    """Turn a list of candles into parallel arrays with a delta-encoded time column"""
+    if not points:
+        return {time_key: []}
+
+    columns = {key: [point[key] for point in points] for key in points[0] if key != time_key}
+
+    times = [_epoch_seconds(point[time_key]) for point in points]
+    deltas = [times[0]] + [current - previous for previous, current in zip(times, times[1:])]
+    return {time_key: deltas, **columns}
+
+def columnarize(payload: Any) -> Any:
+    """Rewrite every OHLC array in a response document into the columnar layout"""
+    if isinstance(payload, list):
+        return [columnarize(item) for item in payload]
+    if not isinstance(payload, dict):
+        return payload
+
+    result = {}
+    for key, value in payload.items():
+        if key in OHLC_ARRAY_KEYS and isinstance(value, list):
+            result[key] = to_columns(value, OHLC_ARRAY_KEYS[key])
+        else:
+            result[key] = columnarize(value)
+    return result
+
+def encoded_response(payload: Union[bytes, dict], fmt: str) -> Response:
+    """Build the response for a document in the negotiated format.
+
+    Pre-encoded JSON bytes are passed through untouched in the default format,
+    including payloads cached gzipped, which go out with Content-Encoding set.
+    """
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if fmt == FORMAT_JSON:
+        content = payload if isinstance(payload, bytes) else orjson.dumps(payload)
+        if is_precompressed(content):
+            headers["Content-Encoding"] = "gzip"
+        return Response(content=content, media_type="application/json", headers=headers)
+
+    document = orjson.loads(decompress(payload)) if isinstance(payload, bytes) else payload
+    columns = columnarize(document)
+    if fmt == FORMAT_MSGPACK:
+        return Response(content=msgpack.packb(columns), media_type=MSGPACK_MEDIA_TYPE, headers=headers)
+    return Response(content=orjson.dumps(columns), media_type=COLUMNAR_MEDIA_TYPE, headers=headers)
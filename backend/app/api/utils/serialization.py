@@ -0,0 +1,76 @@
+"""
+Fast serialization path for the OHLC-heavy test payloads.
+
+Responses are built as plain dicts from trusted database rows and encoded
+with orjson, skipping Pydantic validation of every OHLC point. The dicts
+follow the field order of the TestSession and TestResult schemas so the
+JSON contract is unchanged.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+def ohlc_dict(candle: Dict[str, Any]) -> Dict[str, float]:
+    """An OHLC as a dict, taken from one candle of an OHLC window"""
+    return {"open": candle["open"], "high": candle["high"], "low": candle["low"], "close": candle["close"]}
+
+def question_dict(
+    test_id: int,
+    setup_chart_url: Optional[str],
+    date: str,
+    timeframe: str,
+    ohlc: Dict[str, float],
+    ohlc_data: Optional[List[dict]]
+) -> Dict[str, Any]:
+    """A TestQuestion as a dict"""
+    return {
+        "id": test_id,
+        "setup_chart_url": setup_chart_url,
+        "date": date,
+        "timeframe": timeframe,
+        "ohlc": ohlc,
+        "ohlc_data": ohlc_data
+    }
+
+def answer_dict(stored_answer: Dict[str, Any], user_prediction: str, is_correct: bool) -> Dict[str, Any]:
+    """A TestAnswerResponse as a dict, from the answer data kept in the session state"""
+    return {
+        "test_id": stored_answer["test_id"],
+        "user_prediction": user_prediction,
+        "correct_answer": stored_answer["correct_answer"],
+        "is_correct": is_correct,
+        "setup_chart_url": stored_answer["setup_chart_url"],
+        "outcome_chart_url": stored_answer["outcome_chart_url"],
+        "date": stored_answer["date"],
+        "outcome_date": stored_answer["outcome_date"],
+        "timeframe": stored_answer["timeframe"],
+        "ohlc": stored_answer["ohlc"],
+        "outcome_ohlc": stored_answer["outcome_ohlc"],
+        "ohlc_data": stored_answer["ohlc_data"],
+        "outcome_ohlc_data": stored_answer["outcome_ohlc_data"]
+    }
+
+def session_dict(session_id: str, questions: List[dict], asset_symbol: str, asset_name: str, selected_timeframe: str) -> Dict[str, Any]:
+    """A TestSession as a dict"""
+    return {
+        "session_id": session_id,
+        "questions": questions,
+        "asset_symbol": asset_symbol,
+        "asset_name": asset_name,
+        "selected_timeframe": selected_timeframe
+    }
+
+def result_dict(score: int, total: int, answers: List[dict], asset_symbol: str, asset_name: str) -> Dict[str, Any]:
+    """A TestResult as a dict"""
+    return {
+        "score": score,
+        "total": total,
+        "answers": answers,
+        "asset_symbol": asset_symbol,
+        "asset_name": asset_name
+    }
+
+def dumps(payload: Any) -> bytes:
+    """Encode a response dict; dates become ISO strings as with Pydantic"""
+    return orjson.dumps(payload)
@@ -0,0 +1,53 @@
+import stat
+from typing import List, Optional
+from urllib.parse import parse_qs
+
+import anyio
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+
+from app.services.chart_manifest import chart_manifest
+from app.services.chart_store import IMMUTABLE_CACHE_CONTROL, is_stored_path
+from app.services.chart_variants import DEFAULT_VARIANT, pick_variant, variant_path
+
+def width_hint(scope) -> Optional[int]:
+    """Wanted image width in device pixels, from ?w= or the Sec-CH-Width client hint"""
+    query = parse_qs(scope.get("query_string", b"").decode())
+    value = query.get("w", [None])[0] or Headers(scope=scope).get("sec-ch-width")
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+class ChartStaticFiles(StaticFiles):
+    """Static files that serve the best size and format variant of a chart.
+
+    A request for a chart PNG gets the smallest variant at least as wide as
+    the size hint (the standard one without a hint), as WebP when Accept
+    allows it. Files without variants are served as they are. Charts in
+    the content-addressed store are served with an immutable Cache-Control.
+    """
+
+    def candidates(self, path: str, scope) -> List[str]:
+        hint = width_hint(scope)
+        variant = pick_variant(hint) if hint else DEFAULT_VARIANT
+        formats = ["webp", "png"] if "image/webp" in Headers(scope=scope).get("accept", "") else ["png"]
+        return [variant_path(path, variant, ext) for ext in formats]
+
+    async def get_response(self, path: str, scope):
+        response = await self._chart_response(path, scope)
+        chart_manifest.touch(path)  # Keeps served charts out of LRU eviction
+        if is_stored_path(path):
+            # Stored charts are named by their content, so a URL never changes what it serves
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+    async def _chart_response(self, path: str, scope):
+        if path.endswith(".png") and scope["method"] in ("GET", "HEAD"):
+            for candidate in self.candidates(path, scope):
+                full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, candidate)
+                if stat_result and stat.S_ISREG(stat_result.st_mode):
+                    response = self.file_response(full_path, stat_result, scope)
+                    response.headers["Vary"] = "Accept, Sec-CH-Width"
+                    return response
+        return await super().get_response(path, scope)
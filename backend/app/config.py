@@ -15,12 +15,64 @@ class Settings(BaseSettings):
     
     # Redis cache settings
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://redis:6379/0")
+    STATE_BACKEND: str = os.getenv("STATE_BACKEND", "redis")  # "redis", or "memory" for a single-process stand-in
+    ASSET_CACHE_TTL: int = int(os.getenv("ASSET_CACHE_TTL", "300"))  # Upper bound on staleness if an invalidation is missed
     
     # Chart settings
     CHARTS_DIR: str = "app/static"
+    CHART_RENDERER: str = os.getenv("CHART_RENDERER", "mplfinance")  # "mplfinance", or "native" for the faster built-in SVG/PNG renderer
+    CHART_VARIANTS: bool = os.getenv("CHART_VARIANTS", "true").lower() == "true"  # Write thumb/standard/retina PNG and WebP copies of each chart
+    WEBP_QUALITY: int = int(os.getenv("WEBP_QUALITY", "80"))
+    CHART_MANIFEST_RECONCILE_INTERVAL: int = int(os.getenv("CHART_MANIFEST_RECONCILE_INTERVAL", "600"))  # Seconds between rescans of the chart directory
+    CHART_DISK_BUDGET_MB: int = int(os.getenv("CHART_DISK_BUDGET_MB", "2048"))  # Disk budget for rendered charts; 0 keeps every chart
+    CHART_DISK_HIGH_WATER: float = float(os.getenv("CHART_DISK_HIGH_WATER", "0.9"))  # Start evicting above this share of the budget
+    CHART_DISK_LOW_WATER: float = float(os.getenv("CHART_DISK_LOW_WATER", "0.75"))  # Evict down to this share of the budget
+    CHART_ACCESS_RESOLUTION: int = int(os.getenv("CHART_ACCESS_RESOLUTION", "3600"))  # Seconds between access time updates of a chart
+    RENDER_WORKERS: int = int(os.getenv("RENDER_WORKERS", "2"))  # Chart render processes per API worker
+    RENDER_QUEUE_SIZE: int = int(os.getenv("RENDER_QUEUE_SIZE", "8"))  # Pending renders before questions fall back to OHLC only
+    RENDER_TIMEOUT: float = float(os.getenv("RENDER_TIMEOUT", "20"))  # Seconds a request waits for a chart render
+    PRERENDER_WORKERS: int = int(os.getenv("PRERENDER_WORKERS", "0"))  # Batch pre-render processes; 0 uses every core
+    PRERENDER_BATCH_SIZE: int = int(os.getenv("PRERENDER_BATCH_SIZE", "200"))  # Tests checked per batch and checkpoint
+    PRERENDER_AFTER_REFRESH: bool = os.getenv("PRERENDER_AFTER_REFRESH", "true").lower() == "true"  # Pre-render charts after data refresh
     
     # Test settings
     NUM_TESTS_PER_ASSET: int = 5
+    SESSION_TTL: int = int(os.getenv("SESSION_TTL", str(60 * 60 * 2)))  # How long a served test session can be graded from memory
+    SESSION_POOL_SIZE: int = int(os.getenv("SESSION_POOL_SIZE", "10"))  # Pre-built sessions kept per (asset, timeframe); 0 disables the pools
+    SESSION_POOL_LOW_WATER: int = int(os.getenv("SESSION_POOL_LOW_WATER", "3"))  # Refill a pool once it drops below this
+    SESSION_POOL_MAX_AGE: int = int(os.getenv("SESSION_POOL_MAX_AGE", "3600"))  # Pooled sessions older than this are discarded
+    SESSION_POOL_REFRESH_INTERVAL: int = int(os.getenv("SESSION_POOL_REFRESH_INTERVAL", "300"))  # Seconds between full top-ups
+    
+    # Result analytics settings
+    RESULT_RETENTION_DAYS: int = int(os.getenv("RESULT_RETENTION_DAYS", "180"))  # Raw user results older than this are archived
+    RESULT_RETENTION_BATCH_SIZE: int = int(os.getenv("RESULT_RETENTION_BATCH_SIZE", "5000"))
+    
+    # Submission write settings
+    RESULT_WRITE_MODE: str = os.getenv("RESULT_WRITE_MODE", "sync")  # "sync", or "write_behind" to buffer submissions
+    RESULT_BUFFER_BATCH_SIZE: int = int(os.getenv("RESULT_BUFFER_BATCH_SIZE", "500"))  # Submissions per bulk insert
+    RESULT_BUFFER_BLOCK_MS: int = int(os.getenv("RESULT_BUFFER_BLOCK_MS", "1000"))
+    RESULT_BUFFER_CLAIM_IDLE_MS: int = int(os.getenv("RESULT_BUFFER_CLAIM_IDLE_MS", "60000"))  # Redeliver unacknowledged entries after this
+    RESULT_BUFFER_MAX_DELIVERIES: int = int(os.getenv("RESULT_BUFFER_MAX_DELIVERIES", "5"))  # Failed deliveries before an entry goes to the dead-letter stream
+    SUBMIT_LOCK_TTL: int = int(os.getenv("SUBMIT_LOCK_TTL", "30"))  # Per-session submit lock expiry in seconds
+    SUBMIT_LOCK_WAIT: float = float(os.getenv("SUBMIT_LOCK_WAIT", "10"))  # How long a duplicate submit waits for the first one
+    RESULT_SNAPSHOT_TTL: int = int(os.getenv("RESULT_SNAPSHOT_TTL", str(60 * 60 * 24 * 7)))  # Cached result snapshots (Postgres keeps them forever)
+    
+    # Response compression settings
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))  # Smaller responses are sent uncompressed
+    GZIP_LEVEL: int = int(os.getenv("GZIP_LEVEL", "6"))
+    BROTLI_QUALITY: int = int(os.getenv("BROTLI_QUALITY", "5"))
+    GZIP_CACHE_LEVEL: int = int(os.getenv("GZIP_CACHE_LEVEL", "9"))  # Cached payloads are compressed once, so spend more CPU on them
+    
+    # Admission control and rate limiting settings
+    ADMISSION_CONCURRENCY: str = os.getenv("ADMISSION_CONCURRENCY", "session=16,submit=32,charting=8,read=64,default=64")  # Concurrent requests per route class and worker
+    ADMISSION_QUEUE_SIZE: int = int(os.getenv("ADMISSION_QUEUE_SIZE", "64"))  # Requests allowed to wait per route class; the rest get 503
+    ADMISSION_QUEUE_TIMEOUT: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2"))  # Seconds a queued request waits before 503
+    ADMISSION_RETRY_AFTER: int = int(os.getenv("ADMISSION_RETRY_AFTER", "2"))  # Retry-After sent with 503
+    RATE_LIMIT_PER_SECOND: float = float(os.getenv("RATE_LIMIT_PER_SECOND", "5"))  # Token refill rate per client; 0 disables rate limiting
+    RATE_LIMIT_BURST: int = int(os.getenv("RATE_LIMIT_BURST", "30"))  # Token bucket size per client
+    
+    # Debug settings
+    QUERY_STATS_HEADER: bool = os.getenv("QUERY_STATS_HEADER", "false").lower() == "true"  # Add X-Query-Stats to responses and log repeated statements
     
     # API settings
     COINGECKO_BASE_URL: str = "https://api.coingecko.com/api/v3"
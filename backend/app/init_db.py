@@ -1,17 +1,17 @@
 import asyncio
 import logging
 import uuid
-import random
-from datetime import datetime, timedelta
+from datetime import datetime
 
 import pandas as pd
-from sqlalchemy.orm import Session
 
 from app.database import get_db, engine
 from app.models import base
 from app.models.asset import Asset
-from app.models.test_data import TestData
-from app.services.data_service import fetch_coingecko_data, fetch_alpha_vantage_data, fetch_data_for_all_timeframes, VALID_TIMEFRAMES
+from app.services.asset_cache import publish_asset_change
+from app.services.chart_prerender import prerender_charts
+from app.services.test_generation import generate_tests
+from app.services.data_service import fetch_coingecko_data, fetch_alpha_vantage_data, fetch_data_for_all_timeframes
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -32,95 +32,6 @@ EQUITY_ASSETS = [
     {"symbol": "gld", "name": "Gold", "api_id": "GLD", "type": "equity"}
 ]
 
-async def prepare_test_data_placeholders(db: Session, asset: Asset, timeframe=VALID_TIMEFRAMES[0], num_tests=5):
-    """Create test data placeholders that will generate charts on demand"""
-    logger.info(f"Preparing test data placeholders for {asset.symbol} - {timeframe}")
-    
-    # Get price data for asset with specified timeframe
-    from app.models.price_data import PriceData
-    price_data = db.query(PriceData).filter(
-        PriceData.asset_id == asset.id,
-        PriceData.timeframe == timeframe
-    ).order_by(PriceData.date).all()
-    
-    if not price_data or len(price_data) < 2:
-        price_count = len(price_data) if price_data else 0
-        logger.warning(f"Insufficient price data for {asset.symbol} ({timeframe}): found {price_count} records, need at least 2")
-        return []
-    
-    # Get dates that we can use for testing (excluding the last date)
-    dates = [data.date for data in price_data[:-1]]
-    
-    # Pick random dates
-    test_dates = random.sample(dates, min(num_tests, len(dates)))
-    test_dates.sort()
-    
-    logger.info(f"Selected {len(test_dates)} test dates for {asset.symbol} ({timeframe})")
-    
-    # Create placeholder test data
-    tests = []
-    for date_n in test_dates:
-        # Get the next day data
-        next_date_index = dates.index(date_n) + 1 if date_n in dates and dates.index(date_n) < len(dates) - 1 else None
-        
-        outcome_date = dates[next_date_index] if next_date_index is not None else date_n + timedelta(days=1)
-        
-        # Format chart paths but don't generate yet
-        setup_path = f"{asset.type}/{asset.symbol}_{date_n.strftime('%Y-%m-%d')}_{timeframe}_setup.png"
-        outcome_path = f"{asset.type}/{asset.symbol}_{outcome_date.strftime('%Y-%m-%d')}_{timeframe}_outcome.png"
-        
-        # Get OHLC data for the date
-        ohlc = db.query(PriceData).filter(
-            PriceData.asset_id == asset.id,
-            PriceData.date == date_n,
-            PriceData.timeframe == timeframe
-        ).first()
-        
-        next_ohlc = db.query(PriceData).filter(
-            PriceData.asset_id == asset.id, 
-            PriceData.date > date_n,
-            PriceData.timeframe == timeframe
-        ).order_by(PriceData.date).first()
-        
-        # Determine bias based on next candle
-        if next_ohlc and ohlc:
-            sentiment = "Bullish" if next_ohlc.close > ohlc.close else "Bearish"
-        else:
-            # Default to random if we don't have next data
-            sentiment = random.choice(["Bullish", "Bearish"])
-        
-        # Check if test data already exists
-        existing_test = db.query(TestData).filter(
-            TestData.asset_id == asset.id,
-            TestData.date == date_n,
-            TestData.timeframe == timeframe
-        ).first()
-        
-        if existing_test:
-            # Update existing test
-            existing_test.setup_chart_path = setup_path
-            existing_test.outcome_chart_path = outcome_path
-            existing_test.correct_bias = sentiment
-            tests.append(existing_test)
-        else:
-            # Create test data record
-            test_data = TestData(
-                asset_id=asset.id,
-                date=date_n,
-                timeframe=timeframe,
-                setup_chart_path=setup_path,
-                outcome_chart_path=outcome_path,
-                correct_bias=sentiment,
-                outcome_date=outcome_date if next_ohlc else None
-            )
-            db.add(test_data)
-            tests.append(test_data)
-    
-    db.commit()
-    logger.info(f"Created {len(tests)} test placeholders for {asset.symbol} ({timeframe})")
-    
-    return tests
-
 async def initialize_db():
     """Initialize database with seed data and create test data"""
     try:
@@ -153,6 +64,7 @@ async def initialize_db():
                 
         # Commit changes
         db.commit()
+        publish_asset_change()
         
         # Fetch data for all assets
         assets = db.query(Asset).all()
@@ -166,14 +78,17 @@ async def initialize_db():
                     timeframes = list(timeframe_data.keys())
                     logger.info(f"Fetched data for {asset.symbol} with timeframes: {', '.join(timeframes)}")
                     
-                    # Create test data placeholders
+                    # Create tests with chart paths so their charts are pre-rendered
                     for timeframe in timeframes:
-                        await prepare_test_data_placeholders(db, asset, timeframe=timeframe, num_tests=5)
+                        generate_tests(db, asset, timeframe, num_tests=5, chart_paths=True)
                 else:
                     logger.warning(f"No data fetched for {asset.symbol}")
             except Exception as e:
                 logger.error(f"Error fetching data for {asset.symbol}: {str(e)}")
         
+        # Render every test chart up front instead of on first request
+        await prerender_charts()
+        
         logger.info("Database initialization complete")
         
     except Exception as e:
@@ -1,15 +1,19 @@
-from fastapi import FastAPI, Depends, HTTPException
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, Depends, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 import os
 import logging
 import asyncio
 
-from app.database import get_db, engine
+from app.config import settings
+from app.database import get_db, engine, SessionLocal
 from app.models import base
-from app.api.routes import assets, test, charting_exam
-from app.services import data_refresh
+from app.api.routes import assets, test, charting_exam, stats, history
+from app.api.utils.static_files import ChartStaticFiles
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.admission import AdmissionMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.services import data_refresh, asset_cache, analytics_service, result_buffer, session_pool, metrics, render_service, chart_manifest
 
 # Create static directories if they don't exist
 os.makedirs("app/static/crypto", exist_ok=True)
@@ -26,6 +30,9 @@ app = FastAPI(
     version="0.1.0",
 )
 
+# Shed load before it reaches the database; added first so CORS headers wrap rejections
+app.add_middleware(AdmissionMiddleware)
+
 # Setup CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -35,6 +42,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON responses; pre-compressed cache entries pass straight through
+app.add_middleware(CompressionMiddleware)
+
+# Outermost, so latency covers the whole middleware stack
+app.add_middleware(MetricsMiddleware)
+
 # Background task for data refresh
 async def schedule_data_refresh():
     while True:
@@ -46,29 +59,81 @@ async def schedule_data_refresh():
             logger.error(f"Data refresh error: {str(e)}")
             await asyncio.sleep(600)  # Retry after 10 minutes on failure
 
+# Background task for archiving old user results
+async def schedule_result_retention():
+    while True:
+        await asyncio.sleep(24 * 3600)  # Once a day
+        db = SessionLocal()
+        try:
+            await asyncio.to_thread(analytics_service.archive_old_results, db)
+        except Exception as e:
+            logger.error(f"Result retention error: {str(e)}")
+        finally:
+            db.close()
+
 # Create database tables
 @app.on_event("startup")
 async def startup():
     base.Base.metadata.create_all(bind=engine)
     logger.info("Database tables created")
     
+    # Keep the in-process asset catalog in sync with other workers
+    asset_cache.start_invalidation_listener()
+    logger.info("Started asset catalog invalidation listener")
+    
     # Schedule background data refresh task
     asyncio.create_task(schedule_data_refresh())
     logger.info("Scheduled background data refresh task")
+    
+    # Schedule background result retention task
+    asyncio.create_task(schedule_result_retention())
+    logger.info("Scheduled background result retention task")
+    
+    # Start the write-behind consumer for buffered submissions
+    if result_buffer.write_behind_enabled():
+        asyncio.create_task(result_buffer.run_result_writer())
+        logger.info("Started write-behind result writer")
+    
+    # Index rendered charts so existence checks don't touch the filesystem
+    asyncio.create_task(chart_manifest.run_manifest_reconciler())
+    logger.info("Started chart manifest reconciler")
+    
+    # Keep pre-built test sessions ready for the test endpoints
+    if settings.SESSION_POOL_SIZE > 0:
+        asyncio.create_task(session_pool.run_session_pool_builder())
+        logger.info("Started test session pool builder")
+
+@app.on_event("shutdown")
+async def shutdown():
+    # Flush whatever is still buffered before the process exits
+    if result_buffer.write_behind_enabled():
+        while await result_buffer.drain_result_buffer(block_ms=0):
+            pass
+        logger.info("Flushed buffered submissions")
+    
+    render_service.render_service.shutdown()
 
 # Mount static files directory
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+app.mount("/static", ChartStaticFiles(directory="app/static"), name="static")
 
 # Include API routes
 app.include_router(assets.router, prefix="/api", tags=["assets"])
 app.include_router(test.router, prefix="/api", tags=["tests"])
 app.include_router(charting_exam.router, prefix="/api", tags=["charting_exams"])
+app.include_router(stats.router, prefix="/api", tags=["stats"])
+app.include_router(history.router, prefix="/api", tags=["history"])
 
 # Health check endpoint
 @app.get("/health", tags=["health"])
 async def health_check():
     return {"status": "ok"}
 
+# Prometheus metrics endpoint
+@app.get("/metrics", tags=["health"], include_in_schema=False)
+async def metrics_endpoint():
+    content, content_type = metrics.render_metrics()
+    return Response(content=content, media_type=content_type)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1 @@
+# Import middleware
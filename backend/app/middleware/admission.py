@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import math
+from collections import deque
+from typing import Dict
+
+import orjson
+
+from app.config import settings
+from app.services.rate_limiter import take_token
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+def route_class(method: str, path: str) -> str:
+    """Group API routes by cost so each group gets its own concurrency limit"""
+    if path.startswith("/api/test/"):
+        # Building a session fans out into queries and chart renders; submitting grades and writes
+        return "session" if method == "GET" else "submit"
+    if path.startswith("/api/charting_exam"):
+        return "charting"
+    if path.startswith(("/api/results/", "/api/history", "/api/stats")):
+        return "read"
+    return "default"
+
+def parse_limits(spec: str) -> Dict[str, int]:
+    """Parse "class=limit,..." from ADMISSION_CONCURRENCY"""
+    limits = {}
+    for part in spec.split(","):
+        name, _, value = part.strip().partition("=")
+        if name and value:
+            limits[name.strip()] = int(value)
+    return limits
+
+class ConcurrencyLimiter:
+    """Concurrency limit with a bounded FIFO wait queue.
+
+    A released slot is handed straight to the oldest waiter, so waiters are
+    served in order and a new arrival cannot jump the queue.
+    """
+
+    def __init__(self, limit: int, queue_size: int):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.active = 0
+        self._waiters = deque()
+
+    async def acquire(self, timeout: float) -> bool:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return True
+        if len(self._waiters) >= self.queue_size:
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait({waiter}, timeout=timeout)
+        except asyncio.CancelledError:
+            # The client went away; give back a slot that was already handed over
+            if waiter.done():
+                self.release()
+            else:
+                self._waiters.remove(waiter)
+            raise
+        if waiter.done():
+            return True  # The slot was handed over by release()
+
+        self._waiters.remove(waiter)
+        waiter.cancel()
+        return False
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+class AdmissionMiddleware:
+    """Admission control and per-client rate limiting for the API routes.
+
+    Each route class has a concurrency limit per worker. Requests over the
+    limit wait in a bounded queue for up to ADMISSION_QUEUE_TIMEOUT seconds.
+    When the queue is full or the wait times out, they get a fast 503 with
+    Retry-After instead of piling up on Postgres. Clients over their token
+    bucket get 429.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        limits = parse_limits(settings.ADMISSION_CONCURRENCY)
+        default_limit = limits.get("default", 64)
+        self.limiters = {
+            name: ConcurrencyLimiter(limits.get(name, default_limit), settings.ADMISSION_QUEUE_SIZE)
+            for name in ("session", "submit", "charting", "read", "default")
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith("/api") or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        # Behind a proxy, run uvicorn with --proxy-headers so this is the real client address
+        client = scope["client"][0] if scope.get("client") else "unknown"
+        allowed, wait = take_token(client)
+        if not allowed:
+            await self._reject(send, 429, "Too many requests", wait)
+            return
+
+        limiter = self.limiters[route_class(scope["method"], scope["path"])]
+        if not await limiter.acquire(settings.ADMISSION_QUEUE_TIMEOUT):
+            logger.warning(f"Shedding {scope['method']} {scope['path']}: server is at capacity")
+            await self._reject(send, 503, "Server is busy, please retry", settings.ADMISSION_RETRY_AFTER)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+    @staticmethod
+    async def _reject(send, status: int, detail: str, retry_after: float):
+        body = orjson.dumps({"detail": detail})
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
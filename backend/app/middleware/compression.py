@@ -0,0 +1,165 @@
+import gzip
+import zlib
+from typing import Optional
+
+from app.config import settings
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available
+    brotli = None
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+def precompress(payload: bytes) -> bytes:
+    """Gzip a payload once before it is cached, so hot responses skip compression"""
+    return gzip.compress(payload, compresslevel=settings.GZIP_CACHE_LEVEL)
+
+def is_precompressed(payload: bytes) -> bool:
+    # JSON documents never start with the gzip magic bytes
+    return payload[:2] == _GZIP_MAGIC
+
+def decompress(payload: bytes) -> bytes:
+    """Get the plain bytes of a payload that may have been stored gzipped"""
+    return gzip.decompress(payload) if is_precompressed(payload) else payload
+
+def _accepted_encodings(accept_encoding: str) -> set:
+    encodings = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        encodings.add(name.strip().lower())
+    return encodings
+
+def _is_compressible(content_type: str) -> bool:
+    content_type = content_type.lower()
+    return (
+        content_type.startswith("text/")
+        or "json" in content_type
+        or "javascript" in content_type
+        or "xml" in content_type
+        or "msgpack" in content_type
+    )
+
+class _Compressor:
+    """Incremental gzip or brotli encoder for one response body"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=settings.BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(settings.GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            chunk = self._brotli.process(data)
+            return chunk + (self._brotli.finish() if final else self._brotli.flush())
+        chunk = self._zlib.compress(data)
+        return chunk + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+class CompressionMiddleware:
+    """Compress responses with brotli or gzip, depending on Accept-Encoding.
+
+    Bodies smaller than COMPRESSION_MIN_SIZE and non-text content such as
+    chart images are sent as-is. Responses that already carry a
+    Content-Encoding (payloads cached pre-compressed) are not compressed
+    again. They are only decoded for clients that do not accept gzip.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        accepted = _accepted_encodings(accept_encoding)
+        if "br" in accepted and brotli is not None:
+            encoding = "br"
+        elif "gzip" in accepted:
+            encoding = "gzip"
+        else:
+            encoding = None
+
+        responder = _CompressionResponder(send, encoding, accepted)
+        await self.app(scope, receive, responder.send)
+
+class _CompressionResponder:
+    def __init__(self, send, encoding: Optional[str], accepted: set):
+        self._send = send
+        self.encoding = encoding
+        self.accepted = accepted
+        self.start_message = None
+        self.mode = None  # "compress", "decode" or "passthrough", decided on the first body chunk
+        self.compressor = None
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        first = self.mode is None
+        if first:
+            self.mode = self._choose_mode(body, more_body)
+            if self.mode == "passthrough":
+                await self._send(self.start_message)
+
+        if self.mode == "passthrough":
+            await self._send(message)
+            return
+
+        if self.mode == "decode":
+            body = decompress(body)
+        else:
+            body = self.compressor.compress(body, final=not more_body)
+
+        if first:
+            # Whole bodies keep a Content-Length; streamed ones go out chunked
+            await self._send_start(None if more_body else len(body))
+        await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+    def _choose_mode(self, body: bytes, more_body: bool) -> str:
+        status = self.start_message["status"]
+        headers = {name.lower(): value for name, value in self.start_message["headers"]}
+
+        content_encoding = headers.get(b"content-encoding", b"").decode("latin-1").lower()
+        if content_encoding:
+            if content_encoding == "gzip" and "gzip" not in self.accepted and not more_body:
+                return "decode"
+            return "passthrough"
+
+        if self.encoding is None or status < 200 or status in (204, 304):
+            return "passthrough"
+        if not _is_compressible(headers.get(b"content-type", b"").decode("latin-1")):
+            return "passthrough"
+        if not more_body and len(body) < settings.COMPRESSION_MIN_SIZE:
+            return "passthrough"
+
+        self.compressor = _Compressor(self.encoding)
+        return "compress"
+
+    async def _send_start(self, content_length: Optional[int]):
+        headers = [
+            (name, value) for name, value in self.start_message["headers"]
+            if name.lower() not in (b"content-length", b"content-encoding")
+        ]
+        if self.mode == "compress":
+            headers.append((b"content-encoding", self.encoding.encode()))
+            headers.append((b"vary", b"Accept-Encoding"))
+        if content_length is not None:
+            headers.append((b"content-length", str(content_length).encode()))
+        await self._send({**self.start_message, "headers": headers})
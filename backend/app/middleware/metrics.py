@@ -0,0 +1,68 @@
+import logging
+import time
+
+from app.config import settings
+from app.middleware.admission import route_class
+from app.services import metrics
+from app.services.query_stats import start_tracking
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+class MetricsMiddleware:
+    """Record latency, in-flight requests and database work per route.
+
+    Routes are labelled by their path template (e.g. /api/test/{asset_symbol})
+    so label cardinality stays bounded. The template is looked up from the
+    endpoint the router stored in the scope, which costs a dict lookup.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._templates = None
+
+    def _route_template(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "/static" if scope["path"].startswith("/static") else "unmatched"
+        if self._templates is None:
+            # Routes are all registered by the time the first request comes in
+            self._templates = {
+                route.endpoint: route.path
+                for route in scope["app"].routes if hasattr(route, "endpoint")
+            }
+        return self._templates.get(endpoint, "unmatched")
+
+    @staticmethod
+    def _log_duplicates(scope, stats):
+        for shape, count in stats.duplicates().items():
+            logger.warning(f"{scope['method']} {scope['path']} ran the same statement {count} times: {shape[:200]}")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        stats = start_tracking()
+        status = 500
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if settings.QUERY_STATS_HEADER:
+                    # Debug aid: statements run before the response started
+                    message = {**message, "headers": [*message["headers"], (b"x-query-stats", stats.header_value().encode())]}
+                    self._log_duplicates(scope, stats)
+            await send(message)
+
+        in_flight = metrics.REQUESTS_IN_FLIGHT.labels(route_class(scope["method"], scope["path"]))
+        started_at = time.perf_counter()
+        in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.dec()
+            route = self._route_template(scope)
+            metrics.REQUEST_LATENCY.labels(scope["method"], route, str(status)).observe(time.perf_counter() - started_at)
+            metrics.DB_QUERIES_PER_REQUEST.labels(route).observe(stats.count)
+            metrics.DB_TIME_PER_REQUEST.labels(route).observe(stats.duration)
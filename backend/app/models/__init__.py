@@ -3,5 +3,11 @@ from app.models.asset import Asset
 from app.models.price_data import PriceData
 from app.models.test_data import TestData
 from app.models.user_result import UserResult
+from app.models.user_result_archive import UserResultArchive
+from app.models.result_snapshot import ResultSnapshot
+from app.models.result_stats import TestResultStats, AssetTimeframeResultStats, DailyResultStats
 
-__all__ = ["Base", "BaseModel", "Asset", "PriceData", "TestData", "UserResult"]
\ No newline at end of file
+__all__ = [
+    "Base", "BaseModel", "Asset", "PriceData", "TestData", "UserResult", "UserResultArchive", "ResultSnapshot",
+    "TestResultStats", "AssetTimeframeResultStats", "DailyResultStats"
+]
@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, Float, String, ForeignKey, Date
+from sqlalchemy import Column, Integer, Float, String, ForeignKey, Date, Index
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 
 class PriceData(BaseModel):
     """Model for storing OHLC data for assets"""
     __tablename__ = "price_data"
+    __table_args__ = (
+        # Candle windows are read as ranges of one asset's series in one timeframe
+        Index("ix_price_data_asset_timeframe_date", "asset_id", "timeframe", "date"),
+    )
     
     asset_id = Column(Integer, ForeignKey("assets.id"))
     date = Column(Date, index=True)
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, LargeBinary
+from app.models.base import BaseModel
+
+class ResultSnapshot(BaseModel):
+    """Serialized TestResult for a submitted session, written once at submit time"""
+    __tablename__ = "result_snapshots"
+    
+    session_id = Column(String, unique=True, index=True)
+    asset_symbol = Column(String)
+    payload = Column(LargeBinary)  # Pre-encoded TestResult JSON
+    
+    def __repr__(self):
+        return f"<ResultSnapshot session_id:{self.session_id} ({self.asset_symbol})>"
@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, UniqueConstraint
+from app.models.base import BaseModel
+
+class TestResultStats(BaseModel):
+    """Rollup of user results per test, maintained incrementally on submit"""
+    __tablename__ = "test_result_stats"
+    
+    test_id = Column(Integer, ForeignKey("test_data.id"), unique=True, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    correct = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<TestResultStats test_id:{self.test_id} - {self.correct}/{self.attempts}>"
+
+class AssetTimeframeResultStats(BaseModel):
+    """Rollup of user results per asset and timeframe"""
+    __tablename__ = "asset_timeframe_result_stats"
+    __table_args__ = (UniqueConstraint("asset_id", "timeframe", name="uq_asset_timeframe_result_stats"),)
+    
+    asset_id = Column(Integer, ForeignKey("assets.id"), index=True)
+    timeframe = Column(String)
+    attempts = Column(Integer, nullable=False, default=0)
+    correct = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<AssetTimeframeResultStats asset_id:{self.asset_id} ({self.timeframe}) - {self.correct}/{self.attempts}>"
+
+class DailyResultStats(BaseModel):
+    """Rollup of user results per submission day (UTC)"""
+    __tablename__ = "daily_result_stats"
+    
+    day = Column(Date, unique=True, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    correct = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<DailyResultStats {self.day} - {self.correct}/{self.attempts}>"
@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Date
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 
 class TestData(BaseModel):
     """Model for storing bias test data"""
     __tablename__ = "test_data"
+    __table_args__ = (
+        # One test per candle; test generation upserts on it
+        UniqueConstraint("asset_id", "timeframe", "date", name="uq_test_data_asset_timeframe_date"),
+    )
     
     asset_id = Column(Integer, ForeignKey("assets.id"))
     date = Column(Date)  # The date being tested
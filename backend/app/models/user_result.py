@@ -1,16 +1,22 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 
 class UserResult(BaseModel):
     """Model for storing user test results"""
     __tablename__ = "user_results"
+    __table_args__ = (
+        UniqueConstraint("session_id", "test_id", name="uq_user_results_session_test"),
+        # Keyset pagination of a client's sessions, newest first
+        Index("ix_user_results_client_history", "client_id", "created_at", "session_id"),
+    )
     
     test_id = Column(Integer, ForeignKey("test_data.id"))
     user_prediction = Column(String)  # "Bullish" or "Bearish"
     is_correct = Column(Boolean)
     session_id = Column(String, index=True)  # To group results from a single test session
     timeframe = Column(String, nullable=True)  # Store the timeframe for this test
+    client_id = Column(String, nullable=True)  # Anonymous id of the submitting client, used for its history
     
     # Relationship
     test = relationship("TestData", backref="user_results")
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Index
+from sqlalchemy.sql import func
+from app.models.base import BaseModel
+
+class UserResultArchive(BaseModel):
+    """Archived user results older than the retention horizon (ids are kept from user_results)"""
+    __tablename__ = "user_results_archive"
+    __table_args__ = (
+        # Archived sessions stay in the client's history
+        Index("ix_user_results_archive_client_history", "client_id", "created_at", "session_id"),
+    )
+    
+    test_id = Column(Integer, index=True)
+    user_prediction = Column(String)
+    is_correct = Column(Boolean)
+    session_id = Column(String, index=True)
+    timeframe = Column(String, nullable=True)
+    client_id = Column(String, nullable=True)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<UserResultArchive test_id:{self.test_id} - prediction:{self.user_prediction} - correct:{self.is_correct}>"
@@ -1,8 +1,12 @@
 from app.schemas.asset import Asset, AssetCreate, AssetUpdate, AssetInDB
 from app.schemas.test import TestQuestion, TestAnswerSubmit, TestAnswerResponse, TestResult, TestSession, OHLC, TimeframeSelection, OHLCPoint
+from app.schemas.stats import ResultStats, TestStats, TimeframeStats, AssetStats, DailyStats
+from app.schemas.history import SessionSummary, SessionHistory
 
 __all__ = [
     "Asset", "AssetCreate", "AssetUpdate", "AssetInDB",
     "TestQuestion", "TestAnswerSubmit", "TestAnswerResponse",
-    "TestResult", "TestSession", "OHLC", "TimeframeSelection", "OHLCPoint"
+    "TestResult", "TestSession", "OHLC", "TimeframeSelection", "OHLCPoint",
+    "ResultStats", "TestStats", "TimeframeStats", "AssetStats", "DailyStats",
+    "SessionSummary", "SessionHistory"
 ]
\ No newline at end of file
@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+class SessionSummary(BaseModel):
+    session_id: str
+    submitted_at: datetime
+    asset_symbol: Optional[str] = None  # None for sessions submitted before result snapshots existed
+    timeframes: List[str]
+    score: int
+    total: int
+
+class SessionHistory(BaseModel):
+    sessions: List[SessionSummary]
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= for the next page; None on the last page
@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from typing import List
+from datetime import date
+
+class ResultStats(BaseModel):
+    attempts: int
+    correct: int
+    accuracy: float  # correct / attempts, 0.0 when there are no attempts
+
+class TestStats(ResultStats):
+    test_id: int
+
+class TimeframeStats(ResultStats):
+    timeframe: str
+
+class AssetStats(ResultStats):
+    asset_symbol: str
+    asset_name: str
+    timeframes: List[TimeframeStats]
+
+class DailyStats(ResultStats):
+    day: date
@@ -0,0 +1,112 @@
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, NamedTuple
+
+from sqlalchemy import func, insert, delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.result_stats import TestResultStats, AssetTimeframeResultStats, DailyResultStats
+from app.models.user_result import UserResult
+from app.models.user_result_archive import UserResultArchive
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+class GradedAnswer(NamedTuple):
+    """A graded answer as needed by the rollups"""
+    test_id: int
+    asset_id: int
+    timeframe: str
+    is_correct: bool
+    day: date
+
+def utc_today() -> date:
+    """Current UTC date, used as the rollup day of a submission"""
+    return datetime.now(timezone.utc).date()
+
+def _upsert_counts(db: Session, model, key_columns, counts):
+    """Add attempt/correct counts to a rollup table with a single multi-row upsert"""
+    if not counts:
+        return
+
+    rows = [
+        {**dict(zip(key_columns, key)), "attempts": attempts, "correct": correct}
+        for key, (attempts, correct) in counts.items()
+    ]
+    stmt = pg_insert(model.__table__).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={
+            "attempts": model.__table__.c.attempts + stmt.excluded.attempts,
+            "correct": model.__table__.c.correct + stmt.excluded.correct,
+            "updated_at": func.now()
+        }
+    )
+    db.execute(stmt)
+
+def record_results(db: Session, answers: Iterable[GradedAnswer]):
+    """Fold graded answers into the rollup tables.
+
+    Runs in the caller's transaction, so the rollups commit (or roll back)
+    together with the UserResult rows they describe.
+    """
+    per_test = defaultdict(lambda: [0, 0])
+    per_asset_timeframe = defaultdict(lambda: [0, 0])
+    per_day = defaultdict(lambda: [0, 0])
+
+    for answer in answers:
+        correct = 1 if answer.is_correct else 0
+        for counts in (
+            per_test[(answer.test_id,)],
+            per_asset_timeframe[(answer.asset_id, answer.timeframe)],
+            per_day[(answer.day,)]
+        ):
+            counts[0] += 1
+            counts[1] += correct
+
+    _upsert_counts(db, TestResultStats, ["test_id"], per_test)
+    _upsert_counts(db, AssetTimeframeResultStats, ["asset_id", "timeframe"], per_asset_timeframe)
+    _upsert_counts(db, DailyResultStats, ["day"], per_day)
+
+def archive_old_results(db: Session, horizon_days: int = None, batch_size: int = None):
+    """Move user results older than the retention horizon into user_results_archive.
+
+    Rows are moved in batches, each committed on its own, so an interrupted run
+    simply continues on the next schedule. Rollups are not touched. Every
+    worker runs this job; batch rows are locked with SKIP LOCKED, so
+    concurrent runs move disjoint batches instead of archiving a row twice.
+    """
+    horizon_days = horizon_days or settings.RESULT_RETENTION_DAYS
+    batch_size = batch_size or settings.RESULT_RETENTION_BATCH_SIZE
+    cutoff = datetime.now(timezone.utc) - timedelta(days=horizon_days)
+    columns = ["id", "test_id", "user_prediction", "is_correct", "session_id", "timeframe", "created_at", "updated_at", "client_id"]
+
+    total_archived = 0
+    while True:
+        ids = db.execute(
+            select(UserResult.id)
+            .where(UserResult.created_at < cutoff)
+            .order_by(UserResult.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).scalars().all()
+        if not ids:
+            break
+
+        db.execute(
+            insert(UserResultArchive).from_select(
+                columns,
+                select(*[getattr(UserResult, column) for column in columns]).where(UserResult.id.in_(ids))
+            )
+        )
+        db.execute(delete(UserResult).where(UserResult.id.in_(ids)))
+        db.commit()
+
+        total_archived += len(ids)
+        logger.info(f"Archived {len(ids)} user results older than {cutoff.date()} ({total_archived} so far)")
+
+    logger.info(f"Result retention complete: archived {total_archived} user results")
+    return total_archived
@@ -0,0 +1,158 @@
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.asset import Asset
+from app.schemas import Asset as AssetSchema
+from app.services.data_service import redis_client
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Redis pub/sub channel used to tell every worker that the assets table changed
+ASSET_INVALIDATION_CHANNEL = "assets:invalidate"
+
+_asset_list_adapter = TypeAdapter(List[AssetSchema])
+
+@dataclass(frozen=True)
+class CachedAsset:
+    """Detached, read-only copy of an Asset row shared across requests"""
+    id: int
+    symbol: str
+    name: str
+    api_id: str
+    type: str
+    is_active: bool
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+class AssetCatalog:
+    """In-process asset catalog keyed by id and symbol.
+
+    The catalog is loaded with a single query and kept until it is invalidated
+    through Redis pub/sub. ASSET_CACHE_TTL bounds staleness if a message is missed.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._by_id: Dict[int, CachedAsset] = {}
+        self._by_symbol: Dict[str, CachedAsset] = {}
+        self._active_payload = b"[]"
+        self._etag = ""
+        self._loaded_at = 0.0
+        self._stale = True
+
+    def invalidate(self):
+        """Mark the catalog stale so the next lookup reloads it"""
+        self._stale = True
+
+    def _is_fresh(self):
+        return not self._stale and time.monotonic() - self._loaded_at < self.ttl
+
+    def _ensure_loaded(self, db: Session, force: bool = False):
+        if not force and self._is_fresh():
+            return
+
+        with self._lock:
+            # Another request may have reloaded while we waited for the lock
+            if not force and self._is_fresh():
+                return
+
+            self._stale = False
+            rows = db.query(Asset).order_by(Asset.id).all()
+            assets = [
+                CachedAsset(
+                    id=row.id,
+                    symbol=row.symbol,
+                    name=row.name,
+                    api_id=row.api_id,
+                    type=row.type,
+                    is_active=row.is_active,
+                    created_at=row.created_at,
+                    updated_at=row.updated_at
+                ) for row in rows
+            ]
+
+            # Pre-encode the /api/assets payload once per catalog version
+            active = [asset for asset in assets if asset.is_active]
+            payload = _asset_list_adapter.dump_json(
+                _asset_list_adapter.validate_python(active, from_attributes=True)
+            )
+
+            self._by_id = {asset.id: asset for asset in assets}
+            self._by_symbol = {asset.symbol: asset for asset in assets}
+            self._active_payload = payload
+            self._etag = f'"{hashlib.sha1(payload).hexdigest()[:20]}"'
+            self._loaded_at = time.monotonic()
+            logger.info(f"Loaded asset catalog with {len(assets)} assets")
+
+    def get_by_id(self, db: Session, asset_id: int) -> Optional[CachedAsset]:
+        """Get an asset by id, reloading once if the id is unknown"""
+        self._ensure_loaded(db)
+        asset = self._by_id.get(asset_id)
+        if asset is None and asset_id is not None:
+            # Ids come from foreign keys, so a miss means the catalog is behind
+            self._ensure_loaded(db, force=True)
+            asset = self._by_id.get(asset_id)
+        return asset
+
+    def get_by_symbol(self, db: Session, symbol: str) -> Optional[CachedAsset]:
+        """Get an asset by its (lowercase) symbol"""
+        self._ensure_loaded(db)
+        return self._by_symbol.get(symbol)
+
+    def all(self, db: Session) -> List[CachedAsset]:
+        """Get every asset in the catalog"""
+        self._ensure_loaded(db)
+        return list(self._by_id.values())
+
+    def active_payload(self, db: Session):
+        """Get the pre-encoded JSON list of active assets and its ETag"""
+        self._ensure_loaded(db)
+        return self._active_payload, self._etag
+
+# Shared catalog instance
+asset_catalog = AssetCatalog(ttl=settings.ASSET_CACHE_TTL)
+
+def publish_asset_change():
+    """Invalidate the local catalog and notify every other worker.
+
+    Call it after every commit that adds or changes an Asset; otherwise other
+    workers serve the old catalog until ASSET_CACHE_TTL runs out.
+    """
+    asset_catalog.invalidate()
+    try:
+        redis_client.publish(ASSET_INVALIDATION_CHANNEL, "changed")
+    except Exception as e:
+        logger.error(f"Failed to publish asset invalidation: {str(e)}")
+
+def _listen_for_invalidations():
+    """Invalidate the catalog whenever another worker publishes an asset change"""
+    while True:
+        try:
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(ASSET_INVALIDATION_CHANNEL)
+            # Anything may have changed while we were disconnected
+            asset_catalog.invalidate()
+            for message in pubsub.listen():
+                if message.get("type") == "message":
+                    asset_catalog.invalidate()
+        except Exception as e:
+            logger.error(f"Asset invalidation listener error: {str(e)}")
+            asset_catalog.invalidate()
+            time.sleep(5)
+
+def start_invalidation_listener():
+    """Start the background pub/sub listener for asset changes"""
+    thread = threading.Thread(target=_listen_for_invalidations, name="asset-invalidation", daemon=True)
+    thread.start()
+    return thread
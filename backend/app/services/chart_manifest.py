@@ -0,0 +1,241 @@
+import asyncio
+import logging
+import os
+import re
+import time
+from typing import Dict, Optional, Tuple
+
+from app.config import settings
+from app.services import metrics
+from app.services.chart_variants import VARIANTS, variant_path
+from app.services.kv_store import kv_store
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Charts stored by content live under this directory of CHARTS_DIR, as <2 hex>/<sha256>.png
+STORE_DIR = "charts"
+_STORED_NAME = re.compile(r"([0-9a-f]{2})[0-9a-f]{62}\.png")
+
+_VARIANT_FILES = [(variant, ext) for variant in VARIANTS for ext in ("png", "webp")]
+
+def is_stored_chart(path: str) -> bool:
+    """Whether a path relative to CHARTS_DIR is a full-size chart of the content store"""
+    parts = path.split("/")
+    match = _STORED_NAME.fullmatch(parts[-1])
+    return len(parts) == 3 and parts[0] == STORE_DIR and match is not None and match.group(1) == parts[1]
+
+def eviction_grace() -> int:
+    """Seconds a chart is kept after its URL was last handed out or served.
+
+    Covers a pooled session waiting in its pool and then being answered,
+    plus the lag of access time updates, so no live session links a chart
+    that was evicted.
+    """
+    return settings.SESSION_POOL_MAX_AGE + settings.SESSION_TTL + settings.CHART_ACCESS_RESOLUTION
+
+def base_chart_path(name: str) -> Optional[str]:
+    """The full-size chart a file belongs to: x.png and x.standard.webp both belong to x.png"""
+    if name.endswith(".tmp"):
+        return None
+    stem, ext = os.path.splitext(name)
+    stem, variant = os.path.splitext(stem)
+    if variant[1:] in VARIANTS and ext in (".png", ".webp"):
+        return f"{stem}.png"
+    return name if ext == ".png" else None
+
+class ChartManifest:
+    """In-memory index of the content-addressed charts under CHARTS_DIR.
+
+    Maps each full-size chart, relative to CHARTS_DIR, to the bytes it and
+    its variants take on disk and the time it was last served. It is built
+    from one directory scan at startup and updated as charts are rendered.
+    Charts written by other processes are picked up when a lookup misses,
+    and by the periodic reconcile. Only the STORE_DIR tree is indexed and
+    evicted; anything else under CHARTS_DIR, such as older chart files or
+    the pre-render checkpoint, is left alone.
+
+    Access times are kept in the chart file's atime, so every worker sees
+    the same least recently used order after a scan. A worker's recorded
+    access time is never newer than the file's, and eviction only removes
+    charts whose file was not accessed within eviction_grace(). So an entry
+    accessed within the grace period is on disk whatever other workers
+    evicted, and older entries are checked on disk before they are trusted.
+    """
+
+    def __init__(self, charts_dir: str):
+        self.charts_dir = charts_dir
+        self._charts: Dict[str, Tuple[int, float]] = {}
+
+    def scan(self) -> Dict[str, Tuple[int, float]]:
+        sizes: Dict[str, int] = {}
+        accessed: Dict[str, float] = {}
+        for root, _, files in os.walk(os.path.join(self.charts_dir, STORE_DIR)):
+            for name in files:
+                base = base_chart_path(name)
+                if base is None:
+                    continue
+                path = os.path.relpath(os.path.join(root, base), self.charts_dir).replace(os.sep, "/")
+                if not is_stored_chart(path):
+                    continue
+                try:
+                    stat_result = os.stat(os.path.join(root, name))
+                except FileNotFoundError:
+                    continue  # Evicted or replaced during the scan
+                sizes[path] = sizes.get(path, 0) + stat_result.st_size
+                if name == os.path.basename(base):
+                    accessed[path] = max(stat_result.st_atime, stat_result.st_mtime)
+        # Variants whose full-size chart is gone don't count as rendered
+        return {path: (size, accessed[path]) for path, size in sizes.items() if path in accessed}
+
+    def rebuild(self):
+        """Replace the index with a fresh directory scan"""
+        self._charts = self.scan()
+        logger.info(f"Chart manifest has {len(self._charts)} charts ({self.total_bytes() / 2 ** 20:.1f} MB)")
+
+    def _disk_entry(self, path: str) -> Optional[Tuple[int, float]]:
+        """Bytes a chart and its variants take on disk and its access time, or None if it is gone"""
+        full_path = os.path.join(self.charts_dir, path)
+        try:
+            stat_result = os.stat(full_path)
+        except FileNotFoundError:
+            return None
+        size = stat_result.st_size
+        for variant, ext in _VARIANT_FILES:
+            try:
+                size += os.stat(variant_path(full_path, variant, ext)).st_size
+            except FileNotFoundError:
+                pass
+        return size, max(stat_result.st_atime, stat_result.st_mtime)
+
+    def exists(self, path: str) -> bool:
+        """Whether a chart is rendered; a dict lookup unless the chart is unknown or may have been evicted"""
+        entry = self._charts.get(path)
+        if entry is not None and time.time() - entry[1] < eviction_grace():
+            return True
+        # Another worker or the batch pre-render may have written it, or another worker evicted it, since the last scan
+        return self.add(path)
+
+    def reference(self, path: str) -> bool:
+        """Whether a chart is rendered, recording that its URL is being handed out.
+
+        Use this rather than exists() when the URL goes into a session, so
+        the chart is kept for as long as the session can show it.
+        """
+        return self.exists(path) and self.touch(path)
+
+    def add(self, path: str) -> bool:
+        """Record a chart after it was written; returns whether it is on disk"""
+        if not is_stored_chart(path):
+            return False
+        entry = self._disk_entry(path)
+        if entry is None:
+            self._charts.pop(path, None)
+            return False
+        self._charts[path] = entry
+        return True
+
+    def touch(self, path: str) -> bool:
+        """Record that a chart was served, at most once per CHART_ACCESS_RESOLUTION seconds; returns whether it is on disk"""
+        entry = self._charts.get(path)
+        now = time.time()
+        if entry is None:
+            return False
+        if now - entry[1] < settings.CHART_ACCESS_RESOLUTION:
+            return True
+        full_path = os.path.join(self.charts_dir, path)
+        try:
+            # Only the atime moves, so Last-Modified and the ETag stay the same
+            os.utime(full_path, (now, os.stat(full_path).st_mtime))
+        except FileNotFoundError:
+            self._charts.pop(path, None)
+            return False
+        self._charts[path] = (entry[0], now)
+        return True
+
+    def discard(self, path: str):
+        self._charts.pop(path, None)
+
+    def total_bytes(self) -> int:
+        return sum(size for size, _ in self._charts.values())
+
+    def evict(self, high_water: int, low_water: int) -> Tuple[int, int]:
+        """Delete least recently served charts once above high_water bytes, down to low_water.
+
+        Returns the number of charts evicted and the bytes freed. Charts
+        accessed within eviction_grace() are never evicted, so the total can
+        stay above low_water. Evicted charts are rendered again the next
+        time a session needs them; other workers check the disk before
+        handing out a chart that old, see exists().
+        """
+        total = self.total_bytes()
+        if total <= high_water:
+            return 0, 0
+
+        cutoff = time.time() - eviction_grace()
+        evicted = freed = 0
+        for path, (size, accessed) in sorted(self._charts.items(), key=lambda item: item[1][1]):
+            if total - freed <= low_water or accessed >= cutoff:
+                break
+            full_path = os.path.join(self.charts_dir, path)
+            # Move the chart aside first: a worker referencing it from now on finds it missing and renders
+            # it again, and one that referenced it just before shows up in the access time checked here
+            evicting_path = f"{full_path}.evicting"
+            try:
+                os.rename(full_path, evicting_path)
+                stat_result = os.stat(evicting_path)
+            except FileNotFoundError:
+                self._charts.pop(path, None)
+                continue
+            if stat_result.st_atime >= cutoff:
+                os.replace(evicting_path, full_path)
+                self._charts[path] = (size, stat_result.st_atime)
+                continue
+
+            for file_path in [evicting_path] + [variant_path(full_path, variant, ext) for variant, ext in _VARIANT_FILES]:
+                try:
+                    os.remove(file_path)
+                except FileNotFoundError:
+                    pass
+            self._charts.pop(path, None)
+            evicted += 1
+            freed += size
+
+        if total - freed > high_water:
+            logger.warning(
+                f"Charts take {(total - freed) / 2 ** 20:.1f} MB, over the high water mark, "
+                "but the rest were served too recently to evict"
+            )
+        return evicted, freed
+
+    def __len__(self) -> int:
+        return len(self._charts)
+
+# Shared manifest instance
+chart_manifest = ChartManifest(settings.CHARTS_DIR)
+
+def enforce_disk_budget():
+    """Evict charts over the disk budget; one worker does it per reconcile interval"""
+    budget = settings.CHART_DISK_BUDGET_MB * 2 ** 20
+    if budget <= 0 or not kv_store.set_nx("chart_eviction", b"1", ttl=settings.CHART_MANIFEST_RECONCILE_INTERVAL):
+        return
+
+    evicted, freed = chart_manifest.evict(
+        int(budget * settings.CHART_DISK_HIGH_WATER), int(budget * settings.CHART_DISK_LOW_WATER)
+    )
+    if evicted:
+        metrics.CHART_EVICTIONS.inc(evicted)
+        metrics.CHART_EVICTED_BYTES.inc(freed)
+        logger.info(f"Evicted {evicted} least recently used charts ({freed / 2 ** 20:.1f} MB)")
+
+async def run_manifest_reconciler():
+    """Background task that rebuilds the manifest at startup and then periodically, to correct drift"""
+    while True:
+        try:
+            await asyncio.to_thread(chart_manifest.rebuild)
+            await asyncio.to_thread(enforce_disk_budget)
+            metrics.CHART_STORAGE_BYTES.set(chart_manifest.total_bytes())
+            metrics.CHART_FILES.set(len(chart_manifest))
+        except Exception as e:
+            logger.error(f"Chart manifest reconcile error: {str(e)}")
+        await asyncio.sleep(settings.CHART_MANIFEST_RECONCILE_INTERVAL)
@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+from sqlalchemy.orm import Session, contains_eager
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.test_data import TestData
+from app.services.chart_manifest import chart_manifest
+from app.services.chart_service import CHART_CANDLES
+from app.services.chart_store import chart_title, test_charts
+from app.services.grading import load_candle_windows
+from app.services.kv_store import kv_store
+from app.services.render_service import _init_worker, render_candles
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Last test id fully rendered by an interrupted run
+CHECKPOINT_FILE = ".prerender_checkpoint"
+
+# Held by the one process running a pre-render, and renewed after every batch
+LOCK_KEY = "lock:chart_prerender"
+LOCK_TTL = 300
+
+def _checkpoint_path() -> str:
+    return os.path.join(settings.CHARTS_DIR, CHECKPOINT_FILE)
+
+def read_checkpoint() -> int:
+    try:
+        with open(_checkpoint_path()) as f:
+            return int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+def write_checkpoint(test_id: int):
+    tmp_path = f"{_checkpoint_path()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(str(test_id))
+    os.replace(tmp_path, _checkpoint_path())
+
+def clear_checkpoint():
+    try:
+        os.remove(_checkpoint_path())
+    except FileNotFoundError:
+        pass
+
+def plan_batch(db: Session, tests: List[TestData]) -> Tuple[Dict[str, Tuple[List[dict], str, str]], int]:
+    """Point tests at the stored chart of their current windows and list the charts still missing.
+
+    Returns the renders needed, keyed by chart path so identical windows are
+    rendered once, and the number of chart paths that changed. A path only
+    changes when its window does, e.g. after candles were revised.
+    """
+    windows = load_candle_windows(db, tests)
+    jobs = {}
+    relinked = 0
+    for test in tests:
+        setup_candles, next_day = windows.get(test.id, ([], None))
+        if len(setup_candles) < 2:
+            logger.warning(f"Insufficient setup data for test {test.id}, skipping its charts")
+            continue
+
+        title = chart_title(test.asset.symbol, test.timeframe)
+        # Same window as the outcome chart rendered on demand: the newest candles up to the next one
+        outcome_candles = (setup_candles + [next_day])[-CHART_CANDLES.get(test.timeframe, 30):] if next_day else None
+
+        for attribute, path, candles in test_charts(title, setup_candles, outcome_candles):
+            if getattr(test, attribute) != path:
+                setattr(test, attribute, path)
+                relinked += 1
+            full_path = f"{settings.CHARTS_DIR}/{path}"
+            if path not in jobs and not chart_manifest.exists(path):
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                jobs[path] = (candles, title, full_path)
+    return jobs, relinked
+
+def _pending_tests(db: Session, after_id: int):
+    # Tests generated without charts have no setup path; one still missing its
+    # outcome path is linked once the next candle exists
+    return db.query(TestData).filter(
+        TestData.id > after_id,
+        TestData.setup_chart_path.isnot(None)
+    )
+
+def _next_batch(db: Session, after_id: int) -> Tuple[List[TestData], Dict[str, Tuple[List[dict], str, str]], int]:
+    """Load the next batch of tests and plan its renders"""
+    tests = _pending_tests(db, after_id).join(TestData.asset).options(
+        contains_eager(TestData.asset)
+    ).order_by(TestData.id).limit(settings.PRERENDER_BATCH_SIZE).all()
+    if not tests:
+        return tests, {}, 0
+    jobs, relinked = plan_batch(db, tests)
+    return tests, jobs, relinked
+
+def _finish_batch(db: Session, last_id: int):
+    """Commit a batch's relinked paths and checkpoint past it"""
+    db.commit()
+    write_checkpoint(last_id)
+    db.expunge_all()
+
+def _acquire_lock(token: bytes) -> bool:
+    try:
+        return kv_store.set_nx(LOCK_KEY, token, ttl=LOCK_TTL)
+    except Exception as e:
+        logger.error(f"Chart pre-render lock error: {str(e)}")
+        return False
+
+def _renew_lock(token: bytes) -> bool:
+    """Extend the lock; returns False if it expired and another run may have taken it"""
+    try:
+        if kv_store.get(LOCK_KEY) != token:
+            return False
+        kv_store.set(LOCK_KEY, token, ttl=LOCK_TTL)
+    except Exception as e:
+        logger.error(f"Chart pre-render lock error: {str(e)}")
+    return True
+
+async def prerender_charts(restart: bool = False) -> int:
+    """Render every missing test chart and relink tests whose windows changed; returns the number rendered.
+
+    Tests are processed in id order and in batches. After each batch the
+    last test id is checkpointed, so an interrupted run resumes where it
+    stopped; the checkpoint is removed once every test has been checked.
+
+    Only one run at a time holds the pre-render lock, so when every API
+    worker finishes a data refresh, one of them renders and the others
+    skip it. Queries, planning and commits run in a thread, so a run inside
+    an API worker does not block its event loop.
+    """
+    token = uuid.uuid4().hex.encode()
+    if not _acquire_lock(token):
+        logger.info("Chart pre-render already running elsewhere, skipping")
+        return 0
+
+    os.makedirs(settings.CHARTS_DIR, exist_ok=True)
+    if restart:
+        clear_checkpoint()
+    after_id = read_checkpoint()
+    if after_id:
+        logger.info(f"Resuming chart pre-render after test {after_id}")
+
+    workers = settings.PRERENDER_WORKERS or os.cpu_count() or 1
+    loop = asyncio.get_running_loop()
+    db = SessionLocal()
+    rendered = failed = checked = relinked = 0
+    started_at = time.perf_counter()
+
+    try:
+        total = await asyncio.to_thread(lambda: _pending_tests(db, after_id).count())
+        logger.info(f"Checking charts of {total} tests with {workers} render workers")
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            while True:
+                tests, jobs, batch_relinked = await asyncio.to_thread(_next_batch, db, after_id)
+                if not tests:
+                    break
+
+                results = await asyncio.gather(
+                    *(loop.run_in_executor(pool, render_candles, *job) for job in jobs.values()),
+                    return_exceptions=True
+                )
+                for path, result in zip(jobs, results):
+                    if isinstance(result, Exception):
+                        failed += 1
+                        logger.error(f"Error rendering chart {path}: {str(result)}")
+                    else:
+                        chart_manifest.add(path)
+                        rendered += 1
+
+                # Charts that failed are rendered on demand at the new path
+                after_id = tests[-1].id
+                await asyncio.to_thread(_finish_batch, db, after_id)
+                relinked += batch_relinked
+                checked += len(tests)
+
+                elapsed = time.perf_counter() - started_at
+                logger.info(
+                    f"Pre-render progress: {checked}/{total} tests checked, {relinked} charts relinked, {rendered} rendered, "
+                    f"{failed} failed, {rendered / elapsed:.1f} charts/s"
+                )
+                if not _renew_lock(token):
+                    # The checkpoint is shared, so a run that lost the lock must not keep writing it
+                    logger.warning("Lost the chart pre-render lock, stopping")
+                    return rendered
+
+        clear_checkpoint()
+        logger.info(f"Chart pre-render complete: {rendered} rendered, {failed} failed in {time.perf_counter() - started_at:.1f}s")
+        return rendered
+    finally:
+        db.close()
+        try:
+            kv_store.delete_if_equals(LOCK_KEY, token)
+        except Exception as e:
+            # The lock expires on its own
+            logger.error(f"Failed to release chart pre-render lock: {str(e)}")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(prerender_charts(restart="--restart" in sys.argv[1:]))
@@ -1,18 +1,14 @@
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import mplfinance as mpf
-import pandas as pd
-import os
 import logging
 from datetime import datetime
 from sqlalchemy.orm import Session
-import random
 import asyncio
 
 from app.models.asset import Asset
 from app.models.price_data import PriceData
 from app.models.test_data import TestData
-from app.config import settings
+from app.services.asset_cache import asset_catalog
+from app.services import chart_store
+from app.services.test_generation import generate_tests
 from app.services.data_service import TIMEFRAME_4H, TIMEFRAME_DAILY, TIMEFRAME_WEEKLY, TIMEFRAME_MONTHLY, VALID_TIMEFRAMES
 
 # Setup logging
@@ -29,7 +25,7 @@ CHART_CANDLES = {
 async def generate_chart_async(test_data: TestData, db: Session):
     """Generate charts for a test data entry on demand"""
     # Get the asset for this test
-    asset = db.query(Asset).filter(Asset.id == test_data.asset_id).first()
+    asset = asset_catalog.get_by_id(db, test_data.asset_id)
     if not asset:
         logger.error(f"Asset not found for test_id {test_data.id}")
         return False
@@ -82,23 +78,6 @@ async def generate_setup_chart(db: Session, asset: Asset, date_n, timeframe=TIME
     # Get number of candles to display
     num_candles = CHART_CANDLES.get(timeframe, 30)
     
-    # Create directory for asset type
-    asset_type = asset.type  # "crypto" or "equity"
-    os.makedirs(f"{settings.CHARTS_DIR}/{asset_type}", exist_ok=True)
-    
-    # Generate chart file name with timeframe included
-    setup_path = f"{asset_type}/{asset.symbol}_{date_n.strftime('%Y-%m-%d')}_{timeframe}_setup.png"
-    
-    # Full path
-    full_setup_path = f"{settings.CHARTS_DIR}/{setup_path}"
-    
-    # Check if chart already exists
-    if os.path.exists(full_setup_path):
-        logger.info(f"Setup chart already exists for {asset.symbol} - {date_n} ({timeframe})")
-        return setup_path
-    
-    logger.info(f"Generating setup chart for {asset.symbol} - {date_n} ({timeframe})")
-    
     # Get price data before and including date_n
     setup_data = db.query(PriceData).filter(
         PriceData.asset_id == asset.id,
@@ -110,32 +89,26 @@ async def generate_setup_chart(db: Session, asset: Asset, date_n, timeframe=TIME
         logger.error(f"Insufficient setup data for {asset.symbol} on/before {date_n} ({timeframe})")
         return None
     
-    # Convert to pandas DataFrame
-    setup_df = pd.DataFrame([
-    {
-        "Date": data.date,
-        "Open": data.open,
-        "High": data.high,
-        "Low": data.low,
-        "Close": data.close,
-        "Volume": 0.0 if data.volume is None else float(data.volume)
-    } for data in reversed(setup_data)
-    ])
-    
-    setup_df["Date"] = pd.to_datetime(setup_df["Date"])
-    setup_df.set_index("Date", inplace=True)
-    
-    try:
-        # Generate and save chart
-        mpf.plot(setup_df, type="candle", style="charles", figscale=1.5, 
-                title=f"{asset.symbol} - {timeframe.upper()} Chart", 
-                savefig=dict(fname=full_setup_path, dpi=300))
-        
-        logger.info(f"Generated setup chart for {asset.symbol} - {date_n} ({timeframe})")
-        return setup_path
-    except Exception as e:
-        logger.error(f"Error generating setup chart for {asset.symbol} - {date_n} ({timeframe}): {str(e)}")
+    # Candles in chronological order for the render worker
+    candles = [
+        {
+            "date": data.date.isoformat(),
+            "open": data.open,
+            "high": data.high,
+            "low": data.low,
+            "close": data.close,
+            "volume": 0.0 if data.volume is None else float(data.volume)
+        } for data in reversed(setup_data)
+    ]
+    
+    # Charts are stored by content, so an identical window is only rendered once;
+    # a busy render pool or a slow render skips the chart
+    setup_path = await chart_store.store_chart(candles, f"{asset.symbol} - {timeframe.upper()} Chart")
+    if not setup_path:
         return None
+    
+    logger.info(f"Setup chart for {asset.symbol} - {date_n} ({timeframe}) is {setup_path}")
+    return setup_path
 
 async def generate_outcome_chart(db: Session, asset: Asset, date_n, timeframe=TIMEFRAME_DAILY):
     """Generate outcome chart for a specific date and timeframe"""
@@ -147,23 +120,6 @@ async def generate_outcome_chart(db: Session, asset: Asset, date_n, timeframe=TI
     # Get number of candles to display
     num_candles = CHART_CANDLES.get(timeframe, 30)
     
-    # Create directory for asset type
-    asset_type = asset.type  # "crypto" or "equity"
-    os.makedirs(f"{settings.CHARTS_DIR}/{asset_type}", exist_ok=True)
-    
-    # Generate chart file name with timeframe included
-    outcome_path = f"{asset_type}/{asset.symbol}_{date_n.strftime('%Y-%m-%d')}_{timeframe}_outcome.png"
-    
-    # Full path
-    full_outcome_path = f"{settings.CHARTS_DIR}/{outcome_path}"
-    
-    # Check if chart already exists
-    if os.path.exists(full_outcome_path):
-        logger.info(f"Outcome chart already exists for {asset.symbol} - {date_n} ({timeframe})")
-        return outcome_path
-    
-    logger.info(f"Generating outcome chart for {asset.symbol} - {date_n} ({timeframe})")
-    
     # Get price data before and including date_n
     outcome_data = db.query(PriceData).filter(
         PriceData.asset_id == asset.id,
@@ -175,32 +131,26 @@ async def generate_outcome_chart(db: Session, asset: Asset, date_n, timeframe=TI
         logger.error(f"Insufficient outcome data for {asset.symbol} on/before {date_n} ({timeframe})")
         return None
     
-    # Convert to pandas DataFrame
-    outcome_df = pd.DataFrame([
-    {
-        "Date": data.date,
-        "Open": data.open,
-        "High": data.high,
-        "Low": data.low,
-        "Close": data.close,
-        "Volume": 0.0 if data.volume is None else float(data.volume)
-    } for data in reversed(outcome_data)
-    ])
-    
-    outcome_df["Date"] = pd.to_datetime(outcome_df["Date"])
-    outcome_df.set_index("Date", inplace=True)
-    
-    try:
-        # Generate and save chart
-        mpf.plot(outcome_df, type="candle", style="charles", figscale=1.5, 
-                title=f"{asset.symbol} - {timeframe.upper()} Chart", 
-                savefig=dict(fname=full_outcome_path, dpi=300))
-        
-        logger.info(f"Generated outcome chart for {asset.symbol} - {date_n} ({timeframe})")
-        return outcome_path
-    except Exception as e:
-        logger.error(f"Error generating outcome chart for {asset.symbol} - {date_n} ({timeframe}): {str(e)}")
+    # Candles in chronological order for the render worker
+    candles = [
+        {
+            "date": data.date.isoformat(),
+            "open": data.open,
+            "high": data.high,
+            "low": data.low,
+            "close": data.close,
+            "volume": 0.0 if data.volume is None else float(data.volume)
+        } for data in reversed(outcome_data)
+    ]
+    
+    # Charts are stored by content, so an identical window is only rendered once;
+    # a busy render pool or a slow render skips the chart
+    outcome_path = await chart_store.store_chart(candles, f"{asset.symbol} - {timeframe.upper()} Chart")
+    if not outcome_path:
         return None
+    
+    logger.info(f"Outcome chart for {asset.symbol} - {date_n} ({timeframe}) is {outcome_path}")
+    return outcome_path
 
 
 
@@ -269,84 +219,14 @@ async def get_ohlc_data(db: Session, asset: Asset, date_n, timeframe=TIMEFRAME_D
     return setup_ohlc, outcome_ohlc
 
 async def prepare_test_data(db: Session, asset: Asset, timeframe=TIMEFRAME_DAILY, days=365, num_tests=5):
-    """Prepare test data for an asset with specific timeframe"""
+    """Prepare test data for an asset with specific timeframe; returns the test ids"""
     # Validate timeframe
     if timeframe not in VALID_TIMEFRAMES:
         logger.error(f"Invalid timeframe: {timeframe}")
         timeframe = TIMEFRAME_DAILY  # Default to daily
     
-    # Get price data for asset with specified timeframe
-    price_data = db.query(PriceData).filter(
-        PriceData.asset_id == asset.id,
-        PriceData.timeframe == timeframe
-    ).order_by(PriceData.date).all()
-    
-    if not price_data or len(price_data) < 2:
-        price_count = len(price_data) if price_data else 0
-        logger.error(f"Insufficient price data for {asset.symbol} ({timeframe}): found {price_count} records, need at least 2")
-        return []
-    
-    # Get dates that we can use for testing (excluding the last date)
-    dates = [data.date for data in price_data[:-1]]
-    
-    # Pick random dates
-    test_dates = random.sample(dates, min(num_tests, len(dates)))
-    test_dates.sort()
-    
-    logger.info(f"Selected {len(test_dates)} test dates for {asset.symbol} ({timeframe})")
-    
-    # Generate charts and create test data
-    tests = []
-    for date_n in test_dates:
-        # Use get_ohlc_data instead of generate_charts
-        setup_ohlc_data, outcome_ohlc_data = await get_ohlc_data(db, asset, date_n, timeframe)
-        
-        if not setup_ohlc_data or not outcome_ohlc_data:
-            continue
-        
-        # Determine sentiment based on the first candle of outcome data compared to the last candle of setup data
-        last_setup_candle = setup_ohlc_data[-1]
-        first_outcome_candle = outcome_ohlc_data[0]
-        
-        # If the close price of the outcome candle is higher than the close price of the setup candle, it's bullish
-        if first_outcome_candle["close"] > last_setup_candle["close"]:
-            sentiment = "Bullish"
-        else:
-            sentiment = "Bearish"
-        
-        # Get OHLC data for the date
-        ohlc = db.query(PriceData).filter(
-            PriceData.asset_id == asset.id,
-            PriceData.date == date_n,
-            PriceData.timeframe == timeframe
-        ).first()
-        
-        # Check if test data already exists
-        existing_test = db.query(TestData).filter(
-            TestData.asset_id == asset.id,
-            TestData.date == date_n,
-            TestData.timeframe == timeframe
-        ).first()
-        
-        if existing_test:
-            # Update existing test
-            existing_test.correct_bias = sentiment
-            tests.append(existing_test)
-        else:
-            # Create test data record without chart paths
-            test_data = TestData(
-                asset_id=asset.id,
-                date=date_n,
-                timeframe=timeframe,
-                correct_bias=sentiment
-            )
-            db.add(test_data)
-            tests.append(test_data)
-    
-    db.commit()
-    logger.info(f"Prepared {len(tests)} tests for {asset.symbol} ({timeframe})")
-    
-    return tests
+    # Tests are created without chart paths and served with their OHLC data
+    return generate_tests(db, asset, timeframe, num_tests)
 
 async def prepare_test_data_for_all_timeframes(db: Session, asset: Asset, num_tests_per_timeframe=5):
     """Prepare test data for all timeframes for an asset"""
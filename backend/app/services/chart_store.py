@@ -0,0 +1,129 @@
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import orjson
+
+from app.config import settings
+from app.services import native_renderer
+from app.services.chart_manifest import STORE_DIR, chart_manifest
+from app.services.chart_variants import VARIANTS
+from app.services.kv_store import kv_store
+from app.services.render_service import render_service
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Served with this Cache-Control: a content-addressed chart never changes
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+def renderer_version() -> str:
+    if settings.CHART_RENDERER == "native":
+        return native_renderer.RENDERER_VERSION
+    return "mplfinance-charles-300dpi"
+
+def chart_key(candles: List[dict], title: str) -> str:
+    """Hash of everything that shows in a chart: the candles, the title, the renderer and its style"""
+    content = orjson.dumps({
+        "candles": [
+            [candle["date"], candle["open"], candle["high"], candle["low"], candle["close"]]
+            for candle in candles
+        ],
+        "title": title,
+        "renderer": renderer_version(),
+        "style": native_renderer.STYLE,
+        "variants": VARIANTS if settings.CHART_VARIANTS else None,
+    }, option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(content).hexdigest()
+
+def chart_path(key: str) -> str:
+    """Path of a chart relative to CHARTS_DIR, fanned out over 256 directories"""
+    return f"{STORE_DIR}/{key[:2]}/{key}.png"
+
+def chart_title(symbol: str, timeframe: str) -> str:
+    return f"{symbol} - {timeframe.upper()} Chart"
+
+def test_charts(title: str, setup_candles: List[dict], outcome_candles: Optional[List[dict]]) -> List[Tuple[str, str, List[dict]]]:
+    """The charts of a test's current windows, as (TestData attribute, stored path, candles).
+
+    A window that changed, e.g. after candles were revised, hashes to a new
+    path, so comparing these paths with the test's tells whether it must be
+    relinked. An outcome chart is only listed once its next candle exists.
+    """
+    charts = [("setup_chart_path", setup_candles)]
+    if outcome_candles:
+        charts.append(("outcome_chart_path", outcome_candles))
+    return [(attribute, chart_path(chart_key(candles, title)), candles) for attribute, candles in charts]
+
+def is_stored_path(path: Optional[str]) -> bool:
+    return bool(path) and path.startswith(f"{STORE_DIR}/")
+
+# Renders in progress in this worker, so concurrent requests for one chart share a single render
+_inflight: Dict[str, asyncio.Task] = {}
+
+async def _render_once(path: str, candles: List[dict], title: str) -> Optional[str]:
+    """Render a chart unless another worker already is, in which case wait for it to be published"""
+    lock_key = f"lock:chart:{path}"
+    token = uuid.uuid4().hex.encode()
+    try:
+        acquired = kv_store.set_nx(lock_key, token, ttl=math.ceil(settings.RENDER_TIMEOUT) + 5)
+    except Exception as e:
+        logger.error(f"Chart render lock error: {str(e)}")
+        acquired = True  # Render without the lock; publishing is atomic either way
+
+    if not acquired:
+        deadline = time.monotonic() + settings.RENDER_TIMEOUT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+            if chart_manifest.reference(path):
+                return path
+            try:
+                released = kv_store.get(lock_key) is None
+            except Exception as e:
+                logger.error(f"Chart render lock error: {str(e)}")
+                released = True
+            if released:
+                break  # The other worker gave up on it, or the lock can't be read
+        return path if chart_manifest.reference(path) else None
+
+    try:
+        # It may have been published between the manifest lookup and taking the lock
+        if chart_manifest.reference(path):
+            return path
+        full_path = f"{settings.CHARTS_DIR}/{path}"
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        if not await render_service.render(candles, title, full_path):
+            return None
+        chart_manifest.add(path)
+        return path
+    finally:
+        try:
+            kv_store.delete_if_equals(lock_key, token)
+        except Exception as e:
+            # The lock expires on its own
+            logger.error(f"Failed to release chart render lock: {str(e)}")
+
+async def store_chart(candles: List[dict], title: str) -> Optional[str]:
+    """Path of the chart for a window, rendering it unless an identical chart is already stored.
+
+    Concurrent calls for the same chart are coalesced: one render per chart
+    in this worker, and one across workers through a lock in the key-value
+    store. Waiters get the published path, or None if the render was shed
+    or failed.
+    """
+    path = chart_path(chart_key(candles, title))
+    if chart_manifest.reference(path):
+        return path
+
+    task = _inflight.get(path)
+    if task is None:
+        # A task of its own, so a cancelled request does not cancel the render others wait for
+        task = asyncio.create_task(_render_once(path, candles, title))
+        _inflight[path] = task
+        task.add_done_callback(lambda _: _inflight.pop(path, None))
+    return await asyncio.shield(task)
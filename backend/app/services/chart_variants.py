@@ -0,0 +1,83 @@
+import io
+import logging
+import os
+from typing import Dict, List, Tuple
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; without it only PNG variants of native charts are written
+    Image = None
+
+from app.config import settings
+from app.services import native_renderer
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Pixel size of each variant, smallest first
+VARIANTS: Dict[str, Tuple[int, int]] = {
+    "thumb": (480, 344),
+    "standard": (960, 688),
+    "retina": (1920, 1376),
+}
+DEFAULT_VARIANT = "standard"
+
+def variant_path(path: str, variant: str, ext: str) -> str:
+    """crypto/btc_2024-01-01_daily_setup.png -> crypto/btc_2024-01-01_daily_setup.standard.webp"""
+    return f"{os.path.splitext(path)[0]}.{variant}.{ext}"
+
+def pick_variant(width_hint: int) -> str:
+    """Smallest variant at least as wide as the hint"""
+    for variant, (width, _) in VARIANTS.items():
+        if width >= width_hint:
+            return variant
+    return "retina"
+
+def _write_atomic(path: str, data: bytes):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def _encode(image, fmt: str) -> bytes:
+    buffer = io.BytesIO()
+    if fmt == "webp":
+        image.save(buffer, "WEBP", quality=settings.WEBP_QUALITY, method=4)
+    else:
+        image.save(buffer, "PNG", optimize=True)
+    return buffer.getvalue()
+
+def write_variants(candles: List[dict], title: str, full_path: str) -> List[str]:
+    """Write every size and format of a chart next to its full-size file; runs in a render worker.
+
+    Native charts are drawn at each size, so lines stay crisp. mplfinance
+    charts are downscaled from the full-size PNG, which needs Pillow.
+    """
+    written = []
+    if settings.CHART_RENDERER != "native" and Image is None:
+        return written
+
+    source = None
+    if settings.CHART_RENDERER != "native":
+        source = Image.open(full_path).convert("RGB")
+
+    for variant, (width, height) in VARIANTS.items():
+        if source is None:
+            canvas = native_renderer.render_canvas(candles, title, width, height)
+            encoded = {"png": canvas.png()}
+            image = Image.frombytes("RGB", (width, height), bytes(canvas.pixels)) if Image is not None else None
+        else:
+            image = source.resize((width, height), Image.LANCZOS)
+            encoded = {"png": _encode(image, "png")}
+        if image is not None:
+            encoded["webp"] = _encode(image, "webp")
+
+        for ext, data in encoded.items():
+            path = variant_path(full_path, variant, ext)
+            _write_atomic(path, data)
+            written.append(path)
+    return written
@@ -3,10 +3,13 @@ import logging
 from datetime import datetime
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.database import get_db
 from app.models.asset import Asset
+from app.services.asset_cache import publish_asset_change
 from app.services.data_service import fetch_data_for_all_timeframes
 from app.services.chart_service import prepare_test_data_for_all_timeframes
+from app.services.chart_prerender import prerender_charts
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -35,6 +38,8 @@ async def refresh_asset_data(db: Session, asset: Asset, force_refresh: bool = Fa
         # Update last_updated timestamp
         asset.last_updated = current_time
         db.commit()
+        # Every worker's asset catalog and its ETag must reflect the change
+        publish_asset_change()
         
         # Check which timeframes have data
         available_timeframes = list(timeframe_data.keys())
@@ -64,13 +69,18 @@ async def refresh_data():
         logger.info(f"Found {len(assets)} active assets to refresh")
         
         # Refresh data for each asset
+        refreshed = False
         for asset in assets:
             try:
-                await refresh_asset_data(db, asset)
+                refreshed = await refresh_asset_data(db, asset) or refreshed
             except Exception as e:
                 logger.error(f"Error refreshing data for {asset.name}: {str(e)}")
         
         logger.info("Data refresh task completed")
+        
+        # Redraw charts whose price data changed so no user pays for the render
+        if refreshed and settings.PRERENDER_AFTER_REFRESH:
+            await prerender_charts()
     except Exception as e:
         logger.error(f"Error in data refresh task: {str(e)}")
     finally:
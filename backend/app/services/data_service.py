@@ -10,6 +10,7 @@ import asyncio
 from app.models.asset import Asset
 from app.models.price_data import PriceData
 from app.config import settings
+from app.services import metrics
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -38,6 +39,7 @@ async def fetch_coingecko_data(asset: Asset, timeframe=TIMEFRAME_DAILY, days=365
     
     # Check Redis cache first
     cached_data = redis_client.get(cache_key)
+    metrics.record_cache("price_series", bool(cached_data))
     if cached_data:
         logger.info(f"Using cached data for {asset.symbol} ({timeframe}) from Redis")
         # Parse the JSON string from Redis
@@ -78,8 +80,9 @@ async def fetch_coingecko_data(asset: Asset, timeframe=TIMEFRAME_DAILY, days=365
     
     try:
         logger.info(f"Fetching {asset.symbol} data from CoinGecko API ({url}) for {timeframe} timeframe (using {params['interval']} data over {fetch_days} days)")
-        response = requests.get(url, params=params, headers=headers)
-        response.raise_for_status()
+        with metrics.observe_provider("coingecko"):
+            response = requests.get(url, params=params, headers=headers)
+            response.raise_for_status()
         
         # Process the data
         prices = response.json()["prices"]
@@ -161,6 +164,7 @@ async def fetch_alpha_vantage_data(asset: Asset, timeframe=TIMEFRAME_DAILY, days
     
     # Check Redis cache first
     cached_data = redis_client.get(cache_key)
+    metrics.record_cache("price_series", bool(cached_data))
     if cached_data:
         logger.info(f"Using cached data for {asset.symbol} ({timeframe}) from Redis")
         try:
@@ -223,8 +227,9 @@ async def fetch_alpha_vantage_data(asset: Asset, timeframe=TIMEFRAME_DAILY, days
     
     try:
         logger.info(f"Fetching {asset.symbol} {timeframe} data from Alpha Vantage API with function={function}")
-        response = requests.get(url, params=params)
-        response.raise_for_status()
+        with metrics.observe_provider("alpha_vantage"):
+            response = requests.get(url, params=params)
+            response.raise_for_status()
         
         # Process the data
         json_data = response.json()
@@ -424,6 +429,7 @@ async def fetch_data_for_all_timeframes(asset: Asset, db: Session = None):
         
         # Check cache before potential sleep
         cached_data = redis_client.get(cache_key)
+        metrics.record_cache("price_series", bool(cached_data))
         
         if cached_data:
             # Try to load from cache directly here for efficiency
@@ -0,0 +1,138 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, true
+from sqlalchemy.orm import Session
+
+from app.api.utils.serialization import ohlc_dict, answer_dict
+from app.models.price_data import PriceData
+from app.models.test_data import TestData
+from app.schemas import TestAnswerSubmit
+from app.services.chart_service import CHART_CANDLES
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+_EMPTY_OHLC = {"open": 0.0, "high": 0.0, "low": 0.0, "close": 0.0}
+
+def _candle(date, open_, high, low, close, volume) -> dict:
+    return {
+        "date": date.isoformat(),
+        "open": open_,
+        "high": high,
+        "low": low,
+        "close": close,
+        "volume": 0.0 if volume is None else float(volume)
+    }
+
+def load_tests(db: Session, test_ids: List[int]) -> Dict[int, TestData]:
+    """Load every referenced test in one query"""
+    if not test_ids:
+        return {}
+    return {test.id: test for test in db.query(TestData).filter(TestData.id.in_(set(test_ids))).all()}
+
+def load_candle_windows(db: Session, tests: List[TestData]) -> Dict[int, Tuple[List[dict], Optional[dict]]]:
+    """Load the setup window and the next candle of every test in one query.
+
+    A LATERAL subquery takes the newest candles up to each test date, and a
+    second one the first candle after it. Windows are trimmed to the
+    timeframe's chart length afterwards.
+    """
+    if not tests:
+        return {}
+
+    columns = (PriceData.date, PriceData.open, PriceData.high, PriceData.low, PriceData.close, PriceData.volume)
+    same_series = (PriceData.asset_id == TestData.asset_id, PriceData.timeframe == TestData.timeframe)
+
+    setup = select(*columns).where(
+        *same_series, PriceData.date <= TestData.date
+    ).order_by(PriceData.date.desc()).limit(max(CHART_CANDLES.values())).lateral("setup")
+
+    next_candle = select(*columns).where(
+        *same_series, PriceData.date > TestData.date
+    ).order_by(PriceData.date).limit(1).lateral("next_candle")
+
+    stmt = select(TestData.id, setup, next_candle).select_from(TestData).join(
+        setup, true()
+    ).outerjoin(next_candle, true()).where(TestData.id.in_([test.id for test in tests]))
+
+    windows: Dict[int, Tuple[List[dict], Optional[dict]]] = {}
+    for row in db.execute(stmt):
+        test_id = row[0]
+        setup_candles, next_day = windows.get(test_id, ([], None))
+        setup_candles.append(_candle(*row[1:7]))
+        if next_day is None and row[7] is not None:
+            next_day = _candle(*row[7:13])
+        windows[test_id] = (setup_candles, next_day)
+
+    for test in tests:
+        if test.id in windows:
+            setup_candles, next_day = windows[test.id]
+            # Row order across the join is not guaranteed; keep the newest candles in chronological order
+            setup_candles = sorted(setup_candles, key=lambda candle: candle["date"])[-CHART_CANDLES.get(test.timeframe, 30):]
+            windows[test.id] = (setup_candles, next_day)
+    return windows
+
+def graded_test(test: TestData, setup_candles: List[dict], next_day: Optional[dict]) -> dict:
+    """The answer data for a test, in the shape kept in the session state"""
+    num_candles = CHART_CANDLES.get(test.timeframe, 30)
+    setup_ohlc_array = setup_candles or None
+    outcome_ohlc_array = (setup_candles + [next_day])[-num_candles:] if setup_candles and next_day else None
+
+    # The setup OHLC is the candle on the tested date itself
+    on_date = bool(setup_candles) and setup_candles[-1]["date"] == test.date.isoformat()
+
+    answer = {
+        "test_id": test.id,
+        "correct_answer": test.correct_bias,
+        "setup_chart_url": f"/static/{test.setup_chart_path}" if test.setup_chart_path else None,
+        "outcome_chart_url": f"/static/{test.outcome_chart_path}" if test.outcome_chart_path else None,
+        "date": test.date.isoformat(),
+        "outcome_date": next_day["date"] if next_day else None,
+        "timeframe": test.timeframe,
+        "ohlc": ohlc_dict(setup_candles[-1]) if on_date else dict(_EMPTY_OHLC),
+        "outcome_ohlc": ohlc_dict(next_day) if next_day else None,
+        "ohlc_data": setup_ohlc_array,
+        "outcome_ohlc_data": outcome_ohlc_array
+    }
+    return {"asset_id": test.asset_id, "answer": answer}
+
+def load_graded_tests(db: Session, tests: List[TestData]) -> Dict[str, dict]:
+    """Answer data for already loaded tests, keyed by test id as in the session state"""
+    windows = load_candle_windows(db, tests)
+    return {
+        str(test.id): graded_test(test, *windows.get(test.id, ([], None)))
+        for test in tests
+    }
+
+def grade_answers(graded_tests: Dict[str, dict], answer_data: List[TestAnswerSubmit]):
+    """Grade answers in memory against the answer data of their tests.
+
+    Returns the score, the TestAnswerResponse dicts and the graded answers
+    used for the user result rows and the rollups.
+    """
+    score = 0
+    answer_responses = []
+    graded_answers = []
+
+    for answer in answer_data:
+        graded = graded_tests[str(answer.test_id)]
+        stored_answer = graded["answer"]
+
+        # Check if the answer is correct
+        is_correct = answer.prediction == stored_answer["correct_answer"]
+        if is_correct:
+            score += 1
+
+        # Record the graded answer for the user result row and the rollups
+        graded_answers.append({
+            "test_id": answer.test_id,
+            "asset_id": graded["asset_id"],
+            "timeframe": stored_answer["timeframe"],
+            "user_prediction": answer.prediction,
+            "is_correct": is_correct
+        })
+
+        answer_responses.append(answer_dict(stored_answer, answer.prediction, is_correct))
+
+    return score, answer_responses, graded_answers
@@ -0,0 +1,123 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from app.config import settings
+from app.services.data_service import redis_client
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+class MemoryKeyValueStore:
+    """Single-process stand-in for Redis with per-key expiry"""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+        self._lists: Dict[str, Deque[bytes]] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key: str):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            return self._live(key)
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl if ttl else None)
+
+    def set_nx(self, key: str, value: bytes, ttl: Optional[int] = None) -> bool:
+        """Set a key only if it does not exist yet"""
+        with self._lock:
+            if self._live(key) is not None:
+                return False
+            self._data[key] = (value, time.monotonic() + ttl if ttl else None)
+            return True
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_if_equals(self, key: str, value: bytes) -> bool:
+        """Delete a key only if it still holds the given value"""
+        with self._lock:
+            if self._live(key) != value:
+                return False
+            del self._data[key]
+            return True
+
+    def push(self, key: str, value: bytes):
+        """Append a value to the list stored at key"""
+        with self._lock:
+            self._lists.setdefault(key, deque()).append(value)
+
+    def pop(self, key: str) -> Optional[bytes]:
+        """Remove and return the oldest value of a list, or None if it is empty"""
+        with self._lock:
+            items = self._lists.get(key)
+            return items.popleft() if items else None
+
+    def length(self, key: str) -> int:
+        with self._lock:
+            return len(self._lists.get(key, ()))
+
+# Compare-and-delete, so a lock is only released by its owner
+_DELETE_IF_EQUALS_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+class RedisKeyValueStore:
+    """Key-value store backed by the shared Redis connection"""
+
+    def __init__(self, client):
+        self.client = client
+        self._delete_if_equals = client.register_script(_DELETE_IF_EQUALS_SCRIPT)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None):
+        self.client.set(key, value, ex=ttl)
+
+    def set_nx(self, key: str, value: bytes, ttl: Optional[int] = None) -> bool:
+        """Set a key only if it does not exist yet"""
+        return bool(self.client.set(key, value, ex=ttl, nx=True))
+
+    def delete(self, key: str):
+        self.client.delete(key)
+
+    def delete_if_equals(self, key: str, value: bytes) -> bool:
+        """Delete a key only if it still holds the given value"""
+        return bool(self._delete_if_equals(keys=[key], args=[value]))
+
+    def push(self, key: str, value: bytes):
+        """Append a value to the list stored at key"""
+        self.client.rpush(key, value)
+
+    def pop(self, key: str) -> Optional[bytes]:
+        """Remove and return the oldest value of a list, or None if it is empty"""
+        return self.client.lpop(key)
+
+    def length(self, key: str) -> int:
+        return self.client.llen(key)
+
+def _create_store():
+    if settings.STATE_BACKEND == "memory":
+        return MemoryKeyValueStore()
+    return RedisKeyValueStore(redis_client)
+
+# Shared store instance
+kv_store = _create_store()
@@ -0,0 +1,50 @@
+import asyncio
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException
+
+from app.config import settings
+from app.services.kv_store import kv_store
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def session_lock(session_id: str):
+    """Short per-session lock shared by every worker through the key-value store.
+
+    The lock expires after SUBMIT_LOCK_TTL seconds so a crashed worker cannot
+    hold it forever. Waiters give up with 409 after SUBMIT_LOCK_WAIT seconds.
+    If the store is unreachable the block runs without the lock: the
+    (session_id, test_id) constraint still keeps a duplicate submit from
+    inserting its answers twice.
+    """
+    key = f"lock:session:{session_id}"
+    token = uuid.uuid4().hex.encode()
+    deadline = time.monotonic() + settings.SUBMIT_LOCK_WAIT
+
+    while True:
+        try:
+            locked = kv_store.set_nx(key, token, ttl=settings.SUBMIT_LOCK_TTL)
+        except Exception as e:
+            logger.error(f"Session lock unavailable for session {session_id}, submitting without it: {str(e)}")
+            locked = False
+            break
+        if locked:
+            break
+        if time.monotonic() >= deadline:
+            raise HTTPException(status_code=409, detail=f"Submission for session {session_id} is already in progress")
+        await asyncio.sleep(0.05)
+
+    try:
+        yield
+    finally:
+        if locked:
+            try:
+                kv_store.delete_if_equals(key, token)
+            except Exception as e:
+                # The lock expires on its own
+                logger.error(f"Failed to release lock for session {session_id}: {str(e)}")
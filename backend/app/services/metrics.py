@@ -0,0 +1,72 @@
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, generate_latest, CONTENT_TYPE_LATEST, REGISTRY
+from prometheus_client import multiprocess
+
+# Request metrics
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "Requests being handled by route class",
+    ["route_class"], multiprocess_mode="livesum"
+)
+
+# Database work per request
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request", "SQL statements run per request",
+    ["route"], buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds", "Time spent in SQL statements per request",
+    ["route"], buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+
+# Cache lookups; the hit ratio is hits / all lookups of a cache
+CACHE_LOOKUPS = Counter("cache_lookups_total", "Cache lookups by cache and result", ["cache", "result"])
+
+# External data providers
+PROVIDER_LATENCY = Histogram(
+    "provider_request_duration_seconds", "Latency of calls to market data providers",
+    ["provider"], buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15, 30)
+)
+PROVIDER_ERRORS = Counter("provider_errors_total", "Failed calls to market data providers", ["provider"])
+
+# Chart storage; every worker reports the same disk, so the max is the usage
+CHART_STORAGE_BYTES = Gauge("chart_storage_bytes", "Disk used by rendered charts and their variants", multiprocess_mode="max")
+CHART_FILES = Gauge("chart_files", "Rendered charts on disk", multiprocess_mode="max")
+CHART_EVICTIONS = Counter("chart_evictions_total", "Charts evicted to stay within the disk budget")
+CHART_EVICTED_BYTES = Counter("chart_evicted_bytes_total", "Bytes freed by chart evictions")
+
+RESULT_DEAD_LETTERS = Counter("result_dead_letters_total", "Buffered submissions moved to the dead-letter stream after repeated flush failures")
+
+def record_cache(cache: str, hit: bool):
+    CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+
+def record_provider_error(provider: str):
+    PROVIDER_ERRORS.labels(provider).inc()
+
+@contextmanager
+def observe_provider(provider: str):
+    """Time a provider call and count it as an error if it raises"""
+    started_at = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        record_provider_error(provider)
+        raise
+    finally:
+        PROVIDER_LATENCY.labels(provider).observe(time.perf_counter() - started_at)
+
+def render_metrics():
+    """Metrics in the Prometheus text format, merged across workers in multiprocess mode"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
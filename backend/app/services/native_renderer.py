@@ -0,0 +1,241 @@
+import math
+import struct
+import zlib
+from typing import List
+from xml.sax.saxutils import escape
+
+# Bumped whenever the drawing changes, so cached charts can be told apart
+RENDERER_VERSION = "native-1"
+
+# mplfinance "charles" colors
+STYLE = {
+    "up": "#006340",
+    "down": "#a02128",
+    "face": "#DCE3EF",
+    "figure": "#FFFFFF",
+    "grid": "#FFFFFF",
+    "text": "#222222",
+}
+
+# Size of a chart at scale 1; other sizes scale margins, wicks and text with the width
+BASE_WIDTH = 1200
+BASE_HEIGHT = 860
+
+# 5x7 bitmap glyphs for the PNG rasterizer; characters without a glyph are drawn as spaces
+_GLYPHS = {
+    "A": "01110 10001 10001 11111 10001 10001 10001",
+    "B": "11110 10001 10001 11110 10001 10001 11110",
+    "C": "01110 10001 10000 10000 10000 10001 01110",
+    "D": "11110 10001 10001 10001 10001 10001 11110",
+    "E": "11111 10000 10000 11110 10000 10000 11111",
+    "F": "11111 10000 10000 11110 10000 10000 10000",
+    "G": "01110 10001 10000 10111 10001 10001 01111",
+    "H": "10001 10001 10001 11111 10001 10001 10001",
+    "I": "01110 00100 00100 00100 00100 00100 01110",
+    "J": "00111 00010 00010 00010 00010 10010 01100",
+    "K": "10001 10010 10100 11000 10100 10010 10001",
+    "L": "10000 10000 10000 10000 10000 10000 11111",
+    "M": "10001 11011 10101 10101 10001 10001 10001",
+    "N": "10001 10001 11001 10101 10011 10001 10001",
+    "O": "01110 10001 10001 10001 10001 10001 01110",
+    "P": "11110 10001 10001 11110 10000 10000 10000",
+    "Q": "01110 10001 10001 10001 10101 10010 01101",
+    "R": "11110 10001 10001 11110 10100 10010 10001",
+    "S": "01111 10000 10000 01110 00001 00001 11110",
+    "T": "11111 00100 00100 00100 00100 00100 00100",
+    "U": "10001 10001 10001 10001 10001 10001 01110",
+    "V": "10001 10001 10001 10001 10001 01010 00100",
+    "W": "10001 10001 10001 10101 10101 10101 01010",
+    "X": "10001 10001 01010 00100 01010 10001 10001",
+    "Y": "10001 10001 01010 00100 00100 00100 00100",
+    "Z": "11111 00001 00010 00100 01000 10000 11111",
+    "0": "01110 10001 10011 10101 11001 10001 01110",
+    "1": "00100 01100 00100 00100 00100 00100 01110",
+    "2": "01110 10001 00001 00010 00100 01000 11111",
+    "3": "11111 00010 00100 00010 00001 10001 01110",
+    "4": "00010 00110 01010 10010 11111 00010 00010",
+    "5": "11111 10000 11110 00001 00001 10001 01110",
+    "6": "00110 01000 10000 11110 10001 10001 01110",
+    "7": "11111 00001 00010 00100 01000 01000 01000",
+    "8": "01110 10001 10001 01110 10001 10001 01110",
+    "9": "01110 10001 10001 01111 00001 00010 01100",
+    "-": "00000 00000 00000 11111 00000 00000 00000",
+    ".": "00000 00000 00000 00000 00000 01100 01100",
+    "/": "00001 00010 00010 00100 01000 01000 10000",
+}
+_GLYPH_PIXELS = {
+    char: [(x, y) for y, row in enumerate(rows.split()) for x, bit in enumerate(row) if bit == "1"]
+    for char, rows in _GLYPHS.items()
+}
+
+def _nice_step(span: float, ticks: int) -> float:
+    """A 1/2/5 x 10^n step giving about the requested number of ticks"""
+    raw = span / ticks
+    magnitude = 10 ** math.floor(math.log10(raw))
+    for multiple in (1, 2, 5, 10):
+        if raw <= multiple * magnitude:
+            return multiple * magnitude
+    return 10 * magnitude
+
+def layout(candles: List[dict], width: int, height: int) -> dict:
+    """Pixel geometry of a chart, shared by the SVG and PNG output"""
+    scale = width / BASE_WIDTH
+    left, right = round(30 * scale), width - round(110 * scale)
+    top, bottom = round(70 * scale), height - round(60 * scale)
+
+    low = min(candle["low"] for candle in candles)
+    high = max(candle["high"] for candle in candles)
+    pad = (high - low) * 0.05 or abs(high) * 0.01 or 1.0
+    low, high = low - pad, high + pad
+
+    def y(price: float) -> int:
+        return round(bottom - (price - low) / (high - low) * (bottom - top))
+
+    slot = (right - left) / len(candles)
+    body_width = max(1, round(slot * 0.7))
+    wick_width = max(1, round(slot * 0.1))
+
+    bars = []
+    for i, candle in enumerate(candles):
+        center = left + slot * (i + 0.5)
+        color = STYLE["up"] if candle["close"] >= candle["open"] else STYLE["down"]
+        body_top, body_bottom = y(max(candle["open"], candle["close"])), y(min(candle["open"], candle["close"]))
+        bars.append({
+            "body": (round(center - body_width / 2), body_top, body_width, max(1, body_bottom - body_top)),
+            "wick": (round(center - wick_width / 2), y(candle["high"]), wick_width, max(1, y(candle["low"]) - y(candle["high"]))),
+            "color": color,
+        })
+
+    step = _nice_step(high - low, 5)
+    decimals = max(0, -math.floor(math.log10(step)))
+    price_ticks = [
+        (y(price), f"{price:.{decimals}f}")
+        for price in (step * i for i in range(math.ceil(low / step), math.floor(high / step) + 1))
+    ]
+
+    # Month-day labels, or year-month once a chart spans more than a year
+    dates = [candle["date"][:10] for candle in candles]
+    long_span = dates[0][:4] != dates[-1][:4] and dates[0][5:] <= dates[-1][5:]
+    every = max(1, len(candles) // 5)
+    date_ticks = [
+        (round(left + slot * (i + 0.5)), dates[i][:7] if long_span else dates[i][5:])
+        for i in range(0, len(candles), every)
+    ]
+
+    return {
+        "scale": scale, "plot": (left, top, right, bottom),
+        "bars": bars, "price_ticks": price_ticks, "date_ticks": date_ticks,
+    }
+
+def render_svg(candles: List[dict], title: str, width: int = BASE_WIDTH, height: int = BASE_HEIGHT) -> str:
+    """Candlestick chart as an SVG document"""
+    geometry = layout(candles, width, height)
+    scale = geometry["scale"]
+    left, top, right, bottom = geometry["plot"]
+    font_size = round(14 * scale)
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}" '
+        f'shape-rendering="crispEdges" font-family="sans-serif" font-size="{font_size}" fill="{STYLE["text"]}">',
+        f'<rect width="{width}" height="{height}" fill="{STYLE["figure"]}"/>',
+        f'<rect x="{left}" y="{top}" width="{right - left}" height="{bottom - top}" fill="{STYLE["face"]}"/>',
+    ]
+    for y, label in geometry["price_ticks"]:
+        parts.append(f'<line x1="{left}" y1="{y}" x2="{right}" y2="{y}" stroke="{STYLE["grid"]}" stroke-dasharray="6 4"/>')
+        parts.append(f'<text x="{right + round(8 * scale)}" y="{y + font_size // 3}">{label}</text>')
+    for x, label in geometry["date_ticks"]:
+        parts.append(f'<line x1="{x}" y1="{top}" x2="{x}" y2="{bottom}" stroke="{STYLE["grid"]}" stroke-dasharray="6 4"/>')
+        parts.append(f'<text x="{x}" y="{bottom + round(24 * scale)}" text-anchor="middle">{label}</text>')
+    for bar in geometry["bars"]:
+        for x, y, w, h in (bar["wick"], bar["body"]):
+            parts.append(f'<rect x="{x}" y="{y}" width="{w}" height="{h}" fill="{bar["color"]}"/>')
+    parts.append(
+        f'<text x="{(left + right) // 2}" y="{round(42 * scale)}" text-anchor="middle" '
+        f'font-size="{round(22 * scale)}">{escape(title)}</text>'
+    )
+    parts.append("</svg>")
+    return "".join(parts)
+
+class Canvas:
+    """RGB pixel buffer that only draws axis-aligned rectangles, which is all a candlestick chart needs"""
+
+    def __init__(self, width: int, height: int, background: str):
+        self.width = width
+        self.height = height
+        self.pixels = bytearray(bytes.fromhex(background[1:]) * (width * height))
+
+    def fill_rect(self, x: int, y: int, w: int, h: int, color: str):
+        x0, y0 = max(0, x), max(0, y)
+        x1, y1 = min(self.width, x + w), min(self.height, y + h)
+        if x0 >= x1 or y0 >= y1:
+            return
+        row = bytes.fromhex(color[1:]) * (x1 - x0)
+        for row_y in range(y0, y1):
+            start = (row_y * self.width + x0) * 3
+            self.pixels[start:start + len(row)] = row
+
+    def dashed_hline(self, x0: int, x1: int, y: int, color: str, dash: int, gap: int):
+        for x in range(x0, x1, dash + gap):
+            self.fill_rect(x, y, min(dash, x1 - x), 1, color)
+
+    def dashed_vline(self, x: int, y0: int, y1: int, color: str, dash: int, gap: int):
+        for y in range(y0, y1, dash + gap):
+            self.fill_rect(x, y, 1, min(dash, y1 - y), color)
+
+    def text(self, x: int, y: int, text: str, size: int, color: str, anchor: str = "start"):
+        """Draw bitmap text with its top at y; size is the pixel size of one glyph dot"""
+        text = text.upper()
+        advance = 6 * size
+        if anchor == "middle":
+            x -= len(text) * advance // 2
+        for i, char in enumerate(text):
+            for dot_x, dot_y in _GLYPH_PIXELS.get(char, ()):
+                self.fill_rect(x + i * advance + dot_x * size, y + dot_y * size, size, size, color)
+
+    def png(self) -> bytes:
+        """Encode as an 8-bit RGB PNG"""
+        stride = self.width * 3
+        raw = b"".join(
+            b"\x00" + bytes(self.pixels[row * stride:(row + 1) * stride]) for row in range(self.height)
+        )
+
+        def chunk(kind: bytes, data: bytes) -> bytes:
+            return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+        header = struct.pack(">IIBBBBB", self.width, self.height, 8, 2, 0, 0, 0)
+        return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw, 6)) + chunk(b"IEND", b"")
+
+def render_canvas(candles: List[dict], title: str, width: int = BASE_WIDTH, height: int = BASE_HEIGHT) -> Canvas:
+    """Candlestick chart rasterized onto a canvas"""
+    geometry = layout(candles, width, height)
+    scale = geometry["scale"]
+    left, top, right, bottom = geometry["plot"]
+    dot = max(1, round(2 * scale))
+    dash, gap = max(2, round(6 * scale)), max(2, round(4 * scale))
+
+    canvas = Canvas(width, height, STYLE["figure"])
+    canvas.fill_rect(left, top, right - left, bottom - top, STYLE["face"])
+    for y, label in geometry["price_ticks"]:
+        canvas.dashed_hline(left, right, y, STYLE["grid"], dash, gap)
+        canvas.text(right + round(8 * scale), y - 3 * dot, label, dot, STYLE["text"])
+    for x, label in geometry["date_ticks"]:
+        canvas.dashed_vline(x, top, bottom, STYLE["grid"], dash, gap)
+        canvas.text(x, bottom + round(12 * scale), label, dot, STYLE["text"], anchor="middle")
+    for bar in geometry["bars"]:
+        canvas.fill_rect(*bar["wick"], bar["color"])
+        canvas.fill_rect(*bar["body"], bar["color"])
+    canvas.text((left + right) // 2, round(24 * scale), title, max(1, round(3 * scale)), STYLE["text"], anchor="middle")
+    return canvas
+
+def render_png(candles: List[dict], title: str, width: int = BASE_WIDTH, height: int = BASE_HEIGHT) -> bytes:
+    """Candlestick chart as PNG bytes"""
+    return render_canvas(candles, title, width, height).png()
+
+def write_chart(candles: List[dict], title: str, path: str, fmt: str = "png"):
+    """Write a chart as SVG or PNG"""
+    if fmt == "svg":
+        with open(path, "w") as f:
+            f.write(render_svg(candles, title))
+    else:
+        with open(path, "wb") as f:
+            f.write(render_png(candles, title))
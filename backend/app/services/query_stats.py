@@ -0,0 +1,100 @@
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from sqlalchemy import event
+
+from app.database import engine
+
+# Expanded IN lists differ in length between calls of the same statement
+_IN_LIST = re.compile(r"IN \((?:[^()]*)\)", re.IGNORECASE)
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+def statement_shape(statement: str) -> str:
+    """Normalize a statement so repeated executions of the same query compare equal"""
+    return _IN_LIST.sub("IN (...)", " ".join(statement.split()))
+
+class QueryStats:
+    """Statements run and time spent in the database for one request.
+
+    Stats started while others are being tracked (a request made inside
+    assert_query_budget) also count towards the outer stats.
+    """
+
+    __slots__ = ("count", "duration", "statements", "parent")
+
+    def __init__(self, parent: Optional["QueryStats"] = None):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        self.parent = parent
+
+    def duplicates(self) -> Dict[str, int]:
+        """Statement shapes run more than once, the usual sign of an N+1 loop"""
+        shapes = Counter()
+        for statement, count in self.statements.items():
+            shapes[statement_shape(statement)] += count
+        return {shape: count for shape, count in shapes.items() if count > 1}
+
+    def header_value(self) -> str:
+        return f"count={self.count}; time_ms={self.duration * 1000:.1f}; duplicates={sum(count - 1 for count in self.duplicates().values())}"
+
+# Stats of the request being handled; copied into worker threads with the context
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+def start_tracking() -> QueryStats:
+    """Start counting statements for the current request"""
+    stats = QueryStats(parent=_current.get())
+    _current.set(stats)
+    return stats
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+@event.listens_for(engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+@event.listens_for(engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started_at = conn.info["query_start"].pop()
+    duration = time.perf_counter() - started_at
+    stats = _current.get()
+    while stats is not None:
+        stats.count += 1
+        stats.duration += duration
+        # Statement strings are reused by the compiled cache, so this is a cheap dict update
+        stats.statements[statement] += 1
+        stats = stats.parent
+
+def check_budget(stats: QueryStats, max_queries: int, max_duplicates: int = 0, label: str = "block"):
+    """Raise QueryBudgetExceeded if the statements in stats are over budget"""
+    duplicates = stats.duplicates()
+    repeated = sum(count - 1 for count in duplicates.values())
+    if stats.count > max_queries or repeated > max_duplicates:
+        details = "".join(f"\n  {count}x {shape[:200]}" for shape, count in duplicates.items())
+        raise QueryBudgetExceeded(
+            f"{label} ran {stats.count} statements (budget {max_queries}), "
+            f"{repeated} repeated (budget {max_duplicates}){details}"
+        )
+
+@contextmanager
+def assert_query_budget(max_queries: int, max_duplicates: int = 0, label: str = "block"):
+    """Fail if the code inside runs more statements, or repeats more shapes, than allowed.
+
+    Requests made inside the block through an in-process ASGI client count
+    too (see tests/test_query_budgets.py); against a running server, use the
+    X-Query-Stats header, see scripts/check_query_budgets.py.
+    """
+    token = _current.set(QueryStats(parent=_current.get()))
+    stats = _current.get()
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+    check_budget(stats, max_queries, max_duplicates, label)
@@ -0,0 +1,84 @@
+import logging
+import threading
+import time
+from typing import Dict, Tuple
+
+from app.config import settings
+from app.services.data_service import redis_client
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+class MemoryTokenBucket:
+    """Single-process stand-in for the Redis token buckets"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, client: str) -> Tuple[bool, float]:
+        """Take one token for a client; returns whether it was allowed and the seconds until the next token"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(client, (float(self.burst), now))
+            tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+            if tokens >= 1:
+                self._buckets[client] = (tokens - 1, now)
+                return True, 0.0
+            self._buckets[client] = (tokens, now)
+            return False, (1 - tokens) / self.rate
+
+# Refill and take a token atomically, so every worker shares one bucket per client
+_TAKE_TOKEN_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(wait)}
+"""
+
+class RedisTokenBucket:
+    """Per-client token buckets shared by every worker through Redis"""
+
+    def __init__(self, client, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._take = client.register_script(_TAKE_TOKEN_SCRIPT)
+
+    def take(self, client: str) -> Tuple[bool, float]:
+        """Take one token for a client; returns whether it was allowed and the seconds until the next token"""
+        allowed, wait = self._take(keys=[f"ratelimit:{client}"], args=[self.rate, self.burst, time.time()])
+        return bool(allowed), float(wait)
+
+def _create_bucket():
+    if settings.STATE_BACKEND == "memory":
+        return MemoryTokenBucket(settings.RATE_LIMIT_PER_SECOND, settings.RATE_LIMIT_BURST)
+    return RedisTokenBucket(redis_client, settings.RATE_LIMIT_PER_SECOND, settings.RATE_LIMIT_BURST)
+
+# Shared bucket instance; None when rate limiting is disabled
+token_bucket = _create_bucket() if settings.RATE_LIMIT_PER_SECOND > 0 else None
+
+def take_token(client: str) -> Tuple[bool, float]:
+    """Rate limit a client; fails open if the bucket store is unavailable"""
+    if token_bucket is None:
+        return True, 0.0
+    try:
+        return token_bucket.take(client)
+    except Exception as e:
+        logger.error(f"Rate limiter error: {str(e)}")
+        return True, 0.0
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional
+
+from app.config import settings
+from app.services import chart_variants, native_renderer
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+def _init_worker():
+    """Import the plotting stack once per worker so renders don't pay for it"""
+    if settings.CHART_RENDERER == "native":
+        return  # The native renderer is pure Python and already imported
+    import matplotlib
+    matplotlib.use('Agg')  # Use non-interactive backend
+    import mplfinance  # noqa: F401
+    import pandas  # noqa: F401
+
+def _plot_mplfinance(candles: List[dict], title: str, path: str):
+    import mplfinance as mpf
+    import pandas as pd
+
+    df = pd.DataFrame([
+        {
+            "Date": candle["date"],
+            "Open": candle["open"],
+            "High": candle["high"],
+            "Low": candle["low"],
+            "Close": candle["close"],
+            "Volume": candle["volume"]
+        } for candle in candles
+    ])
+    df["Date"] = pd.to_datetime(df["Date"])
+    df.set_index("Date", inplace=True)
+
+    mpf.plot(df, type="candle", style="charles", figscale=1.5, title=title,
+            savefig=dict(fname=path, dpi=300, format="png"))
+
+def render_candles(candles: List[dict], title: str, full_path: str) -> str:
+    """Render candles to a chart file; runs in a render worker process.
+
+    CHART_RENDERER picks mplfinance or the native renderer, which writes
+    SVG when the path ends in .svg. The chart is written to a temporary
+    file and renamed into place, so a reader never sees a partly written
+    chart; its size and format variants are written after it.
+    """
+    tmp_path = f"{full_path}.{os.getpid()}.tmp"
+    try:
+        if settings.CHART_RENDERER == "native":
+            native_renderer.write_chart(candles, title, tmp_path, "svg" if full_path.endswith(".svg") else "png")
+        else:
+            _plot_mplfinance(candles, title, tmp_path)
+        os.replace(tmp_path, full_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    
+    # Smaller and WebP copies for the static route to choose from
+    if settings.CHART_VARIANTS and full_path.endswith(".png"):
+        chart_variants.write_variants(candles, title, full_path)
+    return full_path
+
+class RenderService:
+    """Chart rendering in a pool of worker processes.
+
+    matplotlib is CPU bound and not thread safe, so renders run in separate
+    processes with the plotting stack pre-imported. At most queue_size jobs
+    are pending at once; past that, render() refuses new work immediately
+    so callers fall back to serving OHLC data without a chart.
+    """
+
+    def __init__(self, workers: int, queue_size: int, timeout: float):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.pending = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        return self._pool
+
+    def saturated(self) -> bool:
+        return self.pending >= self.queue_size
+
+    def _job_done(self, future: asyncio.Future):
+        # A job counts as pending until the worker is done with it, even if its caller timed out
+        self.pending -= 1
+        if not future.cancelled():
+            future.exception()  # Retrieved here so an abandoned job's error is not logged as unhandled
+
+    def _reset_pool(self, pool: ProcessPoolExecutor):
+        """Replace a broken pool, unless another job already did"""
+        if self._pool is pool:
+            logger.error("Render pool broke, restarting it")
+            pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def render(self, candles: List[dict], title: str, full_path: str) -> bool:
+        """Render a chart off the event loop; returns False if it was shed, timed out or failed"""
+        if self.saturated():
+            logger.warning(f"Render queue full ({self.pending} pending), skipping chart {full_path}")
+            return False
+
+        pool = self._get_pool()
+        try:
+            future = asyncio.get_running_loop().run_in_executor(pool, render_candles, candles, title, full_path)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool for the next job
+            self._reset_pool(pool)
+            return False
+        self.pending += 1
+        future.add_done_callback(self._job_done)
+
+        try:
+            # The worker keeps going after a timeout; its chart still lands for the next request
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.warning(f"Chart render timed out after {self.timeout}s: {full_path}")
+            return False
+        except BrokenProcessPool:
+            self._reset_pool(pool)
+            return False
+        except Exception as e:
+            logger.error(f"Error rendering chart {full_path}: {str(e)}")
+            return False
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+# Shared render service instance
+render_service = RenderService(settings.RENDER_WORKERS, settings.RENDER_QUEUE_SIZE, settings.RENDER_TIMEOUT)
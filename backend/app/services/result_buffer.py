@@ -0,0 +1,308 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from collections import deque
+from datetime import date
+from typing import Dict, List, Tuple
+
+import redis
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.user_result import UserResult
+from app.services import analytics_service, metrics
+from app.services.result_snapshots import save_snapshots
+from app.services.data_service import redis_client
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Redis stream and consumer group used for write-behind submissions
+RESULT_STREAM = "results:stream"
+RESULT_CONSUMER_GROUP = "result-writers"
+
+# Entries that failed to flush RESULT_BUFFER_MAX_DELIVERIES times, kept for inspection
+RESULT_DEAD_LETTER_STREAM = "results:dead"
+
+def build_entry(session_id: str, day, answers: List[dict], asset_symbol: str = None, snapshot: bytes = None, client_id: str = None) -> dict:
+    """Build a buffered submission.
+
+    Each answer carries an idempotency key (session_id:test_id) so redelivered
+    entries never produce a second UserResult row. The encoded TestResult
+    travels with the entry so its Postgres copy is written with the results.
+    """
+    entry = {
+        "session_id": session_id,
+        "client_id": client_id,
+        "day": day.isoformat(),
+        "answers": [
+            {**answer, "key": f"{session_id}:{answer['test_id']}"}
+            for answer in answers
+        ]
+    }
+    if snapshot is not None:
+        entry["snapshot"] = {"asset_symbol": asset_symbol, "payload": snapshot.decode()}
+    return entry
+
+class InMemoryResultBuffer:
+    """Single-process stand-in for the Redis stream with the same delivery semantics.
+
+    Entries stay pending until acknowledged and are redelivered once they have
+    been idle for RESULT_BUFFER_CLAIM_IDLE_MS.
+    """
+
+    def __init__(self, claim_idle_ms: int):
+        self.claim_idle_ms = claim_idle_ms
+        self._ids = itertools.count(1)
+        self._entries = deque()
+        self._pending: Dict[str, Tuple[dict, float]] = {}
+        self._deliveries: Dict[str, int] = {}
+        self.dead_letters: List[Tuple[str, dict, str]] = []
+        self._condition = threading.Condition()
+
+    def append(self, entry: dict) -> str:
+        with self._condition:
+            entry_id = str(next(self._ids))
+            self._entries.append((entry_id, entry))
+            self._condition.notify()
+        return entry_id
+
+    def _reclaim_idle(self):
+        now = time.monotonic()
+        for entry_id, (entry, delivered_at) in list(self._pending.items()):
+            if (now - delivered_at) * 1000 >= self.claim_idle_ms:
+                del self._pending[entry_id]
+                self._entries.appendleft((entry_id, entry))
+
+    def read_batch(self, count: int, block_ms: int) -> List[Tuple[str, dict]]:
+        with self._condition:
+            self._reclaim_idle()
+            if not self._entries and block_ms:
+                self._condition.wait(block_ms / 1000)
+
+            batch = []
+            now = time.monotonic()
+            while self._entries and len(batch) < count:
+                entry_id, entry = self._entries.popleft()
+                self._pending[entry_id] = (entry, now)
+                self._deliveries[entry_id] = self._deliveries.get(entry_id, 0) + 1
+                batch.append((entry_id, entry))
+            return batch
+
+    def deliveries(self, entry_id: str) -> int:
+        """How many times an entry was delivered, this delivery included"""
+        with self._condition:
+            return self._deliveries.get(entry_id, 0)
+
+    def ack(self, entry_ids: List[str]):
+        with self._condition:
+            for entry_id in entry_ids:
+                self._pending.pop(entry_id, None)
+                self._deliveries.pop(entry_id, None)
+
+    def dead_letter(self, entry_id: str, entry: dict, error: str):
+        """Set an entry aside so it is no longer redelivered"""
+        with self._condition:
+            self.dead_letters.append((entry_id, entry, error))
+        self.ack([entry_id])
+
+class RedisStreamResultBuffer:
+    """Write-behind buffer on a Redis stream consumed through a consumer group.
+
+    Entries left pending by a crashed consumer are claimed by another one after
+    RESULT_BUFFER_CLAIM_IDLE_MS, giving at-least-once delivery.
+    """
+
+    def __init__(self, client, claim_idle_ms: int):
+        self.client = client
+        self.claim_idle_ms = claim_idle_ms
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self._group_ready = False
+
+    def _ensure_group(self):
+        if self._group_ready:
+            return
+        try:
+            self.client.xgroup_create(RESULT_STREAM, RESULT_CONSUMER_GROUP, id="0", mkstream=True)
+        except redis.exceptions.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    def append(self, entry: dict) -> str:
+        entry_id = self.client.xadd(RESULT_STREAM, {"payload": json.dumps(entry)})
+        return entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+
+    @staticmethod
+    def _decode(messages) -> List[Tuple[str, dict]]:
+        batch = []
+        for entry_id, fields in messages:
+            if not fields:
+                continue  # Deleted while pending
+            payload = fields.get(b"payload", fields.get("payload"))
+            entry_id = entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+            batch.append((entry_id, json.loads(payload)))
+        return batch
+
+    def read_batch(self, count: int, block_ms: int) -> List[Tuple[str, dict]]:
+        self._ensure_group()
+
+        # Take over entries another consumer received but never acknowledged
+        claimed = self.client.xautoclaim(
+            RESULT_STREAM, RESULT_CONSUMER_GROUP, self.consumer,
+            min_idle_time=self.claim_idle_ms, start_id="0-0", count=count
+        )
+        batch = self._decode(claimed[1])
+        if batch:
+            return batch
+
+        response = self.client.xreadgroup(
+            RESULT_CONSUMER_GROUP, self.consumer, {RESULT_STREAM: ">"},
+            count=count, block=block_ms or None
+        )
+        return self._decode(response[0][1]) if response else []
+
+    def deliveries(self, entry_id: str) -> int:
+        """How many times an entry was delivered, this delivery included"""
+        pending = self.client.xpending_range(RESULT_STREAM, RESULT_CONSUMER_GROUP, min=entry_id, max=entry_id, count=1)
+        return pending[0]["times_delivered"] if pending else 0
+
+    def ack(self, entry_ids: List[str]):
+        if not entry_ids:
+            return
+        self.client.xack(RESULT_STREAM, RESULT_CONSUMER_GROUP, *entry_ids)
+        self.client.xdel(RESULT_STREAM, *entry_ids)
+
+    def dead_letter(self, entry_id: str, entry: dict, error: str):
+        """Move an entry to the dead-letter stream so it is no longer redelivered"""
+        self.client.xadd(RESULT_DEAD_LETTER_STREAM, {"payload": json.dumps(entry), "entry_id": entry_id, "error": error})
+        self.ack([entry_id])
+
+def _create_buffer():
+    if settings.STATE_BACKEND == "memory":
+        return InMemoryResultBuffer(settings.RESULT_BUFFER_CLAIM_IDLE_MS)
+    return RedisStreamResultBuffer(redis_client, settings.RESULT_BUFFER_CLAIM_IDLE_MS)
+
+# Shared buffer instance
+result_buffer = _create_buffer()
+
+def write_behind_enabled() -> bool:
+    """Whether submissions are buffered instead of committed on the request path"""
+    return settings.RESULT_WRITE_MODE == "write_behind"
+
+def flush_entries(db: Session, entries: List[Tuple[str, dict]]) -> int:
+    """Bulk insert buffered submissions, skipping answers that were already written"""
+    rows = []
+    answers_by_key = {}
+    for _, entry in entries:
+        for answer in entry["answers"]:
+            if answer["key"] in answers_by_key:
+                continue
+            answers_by_key[answer["key"]] = (answer, entry["day"])
+            rows.append({
+                "session_id": entry["session_id"],
+                "test_id": answer["test_id"],
+                "user_prediction": answer["user_prediction"],
+                "is_correct": answer["is_correct"],
+                "timeframe": answer["timeframe"],
+                "client_id": entry.get("client_id")
+            })
+
+    inserted = []
+    if rows:
+        # Idempotency: the (session_id, test_id) constraint drops replays,
+        # and only rows actually inserted are folded into the rollups
+        stmt = pg_insert(UserResult.__table__).values(rows).on_conflict_do_nothing(
+            index_elements=["session_id", "test_id"]
+        ).returning(UserResult.session_id, UserResult.test_id)
+        inserted = db.execute(stmt).all()
+
+        graded_answers = []
+        for session_id, test_id in inserted:
+            answer, day = answers_by_key[f"{session_id}:{test_id}"]
+            graded_answers.append(analytics_service.GradedAnswer(
+                test_id=test_id,
+                asset_id=answer["asset_id"],
+                timeframe=answer["timeframe"],
+                is_correct=answer["is_correct"],
+                day=date.fromisoformat(day)
+            ))
+        analytics_service.record_results(db, graded_answers)
+
+    save_snapshots(db, [
+        {
+            "session_id": entry["session_id"],
+            "asset_symbol": entry["snapshot"]["asset_symbol"],
+            "payload": entry["snapshot"]["payload"].encode()
+        }
+        for _, entry in entries if entry.get("snapshot")
+    ])
+    db.commit()
+    return len(inserted)
+
+def _flush_batch(entries: List[Tuple[str, dict]]) -> int:
+    db = SessionLocal()
+    try:
+        return flush_entries(db, entries)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+async def _flush_one_by_one(entries: List[Tuple[str, dict]]) -> int:
+    """Flush entries on their own after their batch failed, so one bad entry cannot hold up the rest.
+
+    An entry that fails is left pending and redelivered after
+    RESULT_BUFFER_CLAIM_IDLE_MS, until it has failed
+    RESULT_BUFFER_MAX_DELIVERIES times and is moved to the dead-letter stream.
+    """
+    written = 0
+    for entry_id, entry in entries:
+        try:
+            written += await asyncio.to_thread(_flush_batch, [(entry_id, entry)])
+        except Exception as e:
+            deliveries = await asyncio.to_thread(result_buffer.deliveries, entry_id)
+            if deliveries >= settings.RESULT_BUFFER_MAX_DELIVERIES:
+                await asyncio.to_thread(result_buffer.dead_letter, entry_id, entry, str(e))
+                metrics.RESULT_DEAD_LETTERS.inc()
+                logger.error(f"Moved buffered submission {entry_id} of session {entry['session_id']} to the dead-letter stream after {deliveries} failed deliveries: {str(e)}")
+            else:
+                logger.error(f"Failed to flush buffered submission {entry_id} (delivery {deliveries}), will retry: {str(e)}")
+            continue
+        result_buffer.ack([entry_id])
+    return written
+
+async def drain_result_buffer(block_ms: int = None) -> int:
+    """Read one batch from the buffer, write it to Postgres and acknowledge it"""
+    block_ms = settings.RESULT_BUFFER_BLOCK_MS if block_ms is None else block_ms
+    entries = await asyncio.to_thread(result_buffer.read_batch, settings.RESULT_BUFFER_BATCH_SIZE, block_ms)
+    if not entries:
+        return 0
+
+    try:
+        written = await asyncio.to_thread(_flush_batch, entries)
+    except Exception as e:
+        logger.warning(f"Flushing {len(entries)} buffered submissions failed, retrying them one by one: {str(e)}")
+        written = await _flush_one_by_one(entries)
+    else:
+        # Acknowledge only after the commit; a crash before this point means redelivery
+        result_buffer.ack([entry_id for entry_id, _ in entries])
+    logger.info(f"Flushed {len(entries)} buffered submissions ({written} new user results)")
+    return len(entries)
+
+async def run_result_writer():
+    """Background consumer that bulk-inserts buffered submissions"""
+    while True:
+        try:
+            await drain_result_buffer()
+        except Exception as e:
+            logger.error(f"Result writer error: {str(e)}")
+            await asyncio.sleep(5)
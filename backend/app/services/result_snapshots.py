@@ -0,0 +1,57 @@
+import logging
+from typing import List, Optional
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.api.utils.serialization import dumps
+from app.config import settings
+from app.middleware.compression import precompress
+from app.models.result_snapshot import ResultSnapshot
+from app.services import metrics
+from app.services.kv_store import kv_store
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+def snapshot_key(session_id: str) -> str:
+    return f"result:{session_id}"
+
+def encode_result(result: dict) -> bytes:
+    """Encode a TestResult dict once, exactly as the results endpoint returns it"""
+    return dumps(result)
+
+def cache_snapshot(session_id: str, payload: bytes):
+    """Put a gzipped snapshot in the key-value store; Postgres keeps the plain JSON"""
+    try:
+        kv_store.set(snapshot_key(session_id), precompress(payload), ttl=settings.RESULT_SNAPSHOT_TTL)
+    except Exception as e:
+        logger.error(f"Failed to cache result snapshot for session {session_id}: {str(e)}")
+
+def save_snapshots(db: Session, snapshots: List[dict]):
+    """Write snapshots to Postgres in the caller's transaction (first write wins)"""
+    if not snapshots:
+        return
+    stmt = pg_insert(ResultSnapshot.__table__).values(snapshots)
+    db.execute(stmt.on_conflict_do_nothing(index_elements=["session_id"]))
+
+def load_snapshot(db: Session, session_id: str) -> Optional[bytes]:
+    """Get the pre-encoded result for a session from the cache, falling back to Postgres.
+
+    Cached results come back gzipped; see app.middleware.compression.decompress.
+    """
+    try:
+        payload = kv_store.get(snapshot_key(session_id))
+        metrics.record_cache("result_snapshot", payload is not None)
+        if payload is not None:
+            return payload
+    except Exception as e:
+        logger.error(f"Failed to read cached result snapshot for session {session_id}: {str(e)}")
+
+    row = db.query(ResultSnapshot.payload).filter(ResultSnapshot.session_id == session_id).first()
+    if row is None:
+        return None
+
+    # Warm the cache for the next read
+    cache_snapshot(session_id, row.payload)
+    return row.payload
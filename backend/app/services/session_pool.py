@@ -0,0 +1,158 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Optional
+
+from fastapi import HTTPException
+
+from app.api.utils.serialization import dumps
+from app.config import settings
+from app.middleware.compression import precompress
+from app.database import SessionLocal
+from app.services.asset_cache import asset_catalog
+from app.services.data_service import VALID_TIMEFRAMES
+from app.services import metrics
+from app.services.kv_store import kv_store
+from app.services.session_store import save_encoded_session
+from app.services.test_sessions import build_random_session, build_asset_session
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Pools currently being refilled by this process
+_refilling = set()
+_refill_tasks = set()
+
+def pool_key(asset_symbol: str, timeframe: str) -> str:
+    return f"session_pool:{asset_symbol}:{timeframe}"
+
+def encode_bundle(session_id: str, session_json: bytes, state_json: bytes) -> bytes:
+    """Pack a pre-serialized, gzipped session with its id and grading state.
+
+    The header fields and the state JSON contain no raw newline, so the
+    bundle is split without parsing anything on the request path. The
+    compressed session comes last and may contain any byte.
+    """
+    return b"\n".join([str(time.time()).encode(), session_id.encode(), state_json, precompress(session_json)])
+
+def take_session(asset_symbol: str, timeframe: str) -> Optional[bytes]:
+    """Pop a pre-built session from its pool and start its server-side state.
+
+    Each pooled session has its own id minted when it was built, and a pop
+    hands it out exactly once. Returns the gzipped TestSession, or None if
+    the pool is empty so the caller builds one inline. A refill is scheduled
+    once the pool drops below SESSION_POOL_LOW_WATER.
+    """
+    if settings.SESSION_POOL_SIZE <= 0:
+        return None
+
+    key = pool_key(asset_symbol, timeframe)
+    try:
+        while True:
+            bundle = kv_store.pop(key)
+            if bundle is None:
+                break
+            built_at, session_id, state_json, session_json = bundle.split(b"\n", 3)
+            # Drop sessions older than SESSION_POOL_MAX_AGE, so regenerated test data shows up within that age
+            if time.time() - float(built_at) <= settings.SESSION_POOL_MAX_AGE:
+                break
+            bundle = None
+        remaining = kv_store.length(key)
+    except Exception as e:
+        logger.error(f"Failed to take a session from pool {key}: {str(e)}")
+        return None
+
+    if remaining < settings.SESSION_POOL_LOW_WATER:
+        schedule_refill(asset_symbol, timeframe)
+
+    metrics.record_cache("session_pool", bundle is not None)
+    if bundle is None:
+        return None
+
+    save_encoded_session(session_id.decode(), state_json)
+    return session_json
+
+def schedule_refill(asset_symbol: str, timeframe: str):
+    """Refill a pool in the background unless this process is already doing it"""
+    key = pool_key(asset_symbol, timeframe)
+    if key in _refilling:
+        return
+    task = asyncio.get_running_loop().create_task(refill_pool(asset_symbol, timeframe))
+    _refill_tasks.add(task)
+    task.add_done_callback(_refill_tasks.discard)
+
+async def refill_pool(asset_symbol: str, timeframe: str) -> int:
+    """Build sessions until the pool holds SESSION_POOL_SIZE of them"""
+    key = pool_key(asset_symbol, timeframe)
+    if key in _refilling:
+        return 0
+
+    # Only one worker refills a given pool at a time
+    lock_key = f"lock:{key}"
+    token = uuid.uuid4().hex.encode()
+    try:
+        if not kv_store.set_nx(lock_key, token, ttl=120):
+            return 0
+    except Exception as e:
+        logger.error(f"Failed to lock session pool {key}: {str(e)}")
+        return 0
+
+    _refilling.add(key)
+    db = SessionLocal()
+    built = 0
+    try:
+        asset = None
+        if asset_symbol != "random":
+            asset = asset_catalog.get_by_symbol(db, asset_symbol)
+            if not asset:
+                return 0
+
+        while kv_store.length(key) < settings.SESSION_POOL_SIZE:
+            session_id = str(uuid.uuid4())
+            if asset:
+                session, state = await build_asset_session(db, session_id, asset, timeframe)
+            else:
+                session, state = await build_random_session(db, session_id, timeframe)
+            if not session["questions"]:
+                break
+            kv_store.push(key, encode_bundle(session_id, dumps(session), json.dumps(state).encode()))
+            built += 1
+    except HTTPException:
+        # No tests for this asset and timeframe; requests fall through to the 404
+        pass
+    except Exception as e:
+        logger.error(f"Failed to refill session pool {key}: {str(e)}")
+    finally:
+        db.close()
+        _refilling.discard(key)
+        try:
+            kv_store.delete_if_equals(lock_key, token)
+        except Exception as e:
+            logger.error(f"Failed to release lock for session pool {key}: {str(e)}")
+
+    if built:
+        logger.info(f"Added {built} sessions to pool {key}")
+    return built
+
+async def run_session_pool_builder():
+    """Background task that keeps every pool topped up"""
+    while True:
+        db = SessionLocal()
+        try:
+            symbols = ["random"] + [asset.symbol for asset in asset_catalog.all(db) if asset.is_active]
+        except Exception as e:
+            logger.error(f"Session pool builder error: {str(e)}")
+            symbols = []
+        finally:
+            db.close()
+
+        for asset_symbol in symbols:
+            for timeframe in list(VALID_TIMEFRAMES) + ["random"]:
+                try:
+                    await refill_pool(asset_symbol, timeframe)
+                except Exception as e:
+                    logger.error(f"Session pool builder error: {str(e)}")
+
+        await asyncio.sleep(settings.SESSION_POOL_REFRESH_INTERVAL)
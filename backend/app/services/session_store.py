@@ -0,0 +1,37 @@
+import json
+import logging
+from typing import Optional
+
+from app.config import settings
+from app.services.kv_store import kv_store
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+def session_key(session_id: str) -> str:
+    return f"session:{session_id}"
+
+def save_session(session_id: str, state: dict):
+    """Store the server-side state of a test session for SESSION_TTL seconds.
+
+    The state holds the selected test ids, and per test the correct bias and
+    the encoded outcome data, so grading needs no database access.
+    """
+    save_encoded_session(session_id, json.dumps(state).encode())
+
+def save_encoded_session(session_id: str, payload: bytes):
+    """Store session state that is already JSON-encoded, as kept in the session pools"""
+    try:
+        kv_store.set(session_key(session_id), payload, ttl=settings.SESSION_TTL)
+    except Exception as e:
+        # Grading falls back to the database if the session was not stored
+        logger.error(f"Failed to store test session {session_id}: {str(e)}")
+
+def load_session(session_id: str) -> Optional[dict]:
+    """Get the state of a live test session, or None if it expired or was never stored"""
+    try:
+        payload = kv_store.get(session_key(session_id))
+    except Exception as e:
+        logger.error(f"Failed to load test session {session_id}: {str(e)}")
+        return None
+    return json.loads(payload) if payload is not None else None
@@ -0,0 +1,95 @@
+import logging
+from typing import List, Optional
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.price_data import PriceData
+from app.models.test_data import TestData
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Rows per upsert statement, well under the driver's parameter limit
+UPSERT_BATCH_SIZE = 1000
+
+def load_series(db: Session, asset_id: int, timeframe: str):
+    """Dates and closes of one price series in chronological order, with a single query"""
+    rows = db.query(PriceData.date, PriceData.close).filter(
+        PriceData.asset_id == asset_id,
+        PriceData.timeframe == timeframe
+    ).order_by(PriceData.date).all()
+    if not rows:
+        return np.array([], dtype="datetime64[D]"), np.array([], dtype=float)
+    dates, closes = zip(*rows)
+    return np.array(dates, dtype="datetime64[D]"), np.array(closes, dtype=float)
+
+def label_biases(closes: np.ndarray) -> np.ndarray:
+    """Bias of every date but the last: Bullish when the next candle closes higher"""
+    return np.where(closes[1:] > closes[:-1], "Bullish", "Bearish")
+
+def choose_dates(eligible: int, num_tests: int, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    """Indices of distinct random test dates, in chronological order"""
+    rng = rng or np.random.default_rng()
+    return np.sort(rng.choice(eligible, size=min(num_tests, eligible), replace=False))
+
+def upsert_tests(db: Session, rows: List[dict]) -> List[int]:
+    """Insert tests, or update the bias of existing ones, on (asset_id, timeframe, date).
+
+    Chart paths already set on a test are kept, since the pre-render pass
+    points them at the stored charts.
+    """
+    table = TestData.__table__
+    ids = []
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        stmt = pg_insert(table).values(rows[start:start + UPSERT_BATCH_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_test_data_asset_timeframe_date",
+            set_={
+                "correct_bias": stmt.excluded.correct_bias,
+                "outcome_date": stmt.excluded.outcome_date,
+                "setup_chart_path": func.coalesce(table.c.setup_chart_path, stmt.excluded.setup_chart_path),
+                "outcome_chart_path": func.coalesce(table.c.outcome_chart_path, stmt.excluded.outcome_chart_path),
+                "updated_at": func.now()
+            }
+        ).returning(table.c.id)
+        ids.extend(db.execute(stmt).scalars().all())
+    db.commit()
+    return ids
+
+def generate_tests(db: Session, asset, timeframe: str, num_tests: int, chart_paths: bool = False) -> List[int]:
+    """Create or refresh random tests for one asset and timeframe; returns their ids.
+
+    The series is loaded once, every date but the last is labelled in one
+    vectorized pass, and the chosen tests are written with one upsert, so
+    the cost is two statements whatever the number of tests. With
+    chart_paths, tests get placeholder chart paths so their charts are
+    rendered (see chart_prerender).
+    """
+    dates, closes = load_series(db, asset.id, timeframe)
+    if len(dates) < 2:
+        logger.warning(f"Insufficient price data for {asset.symbol} ({timeframe}): found {len(dates)} records, need at least 2")
+        return []
+
+    biases = label_biases(closes)
+    chosen = choose_dates(len(biases), num_tests)
+
+    rows = []
+    for i in chosen.tolist():
+        date_n = dates[i].item()
+        outcome_date = dates[i + 1].item()
+        rows.append({
+            "asset_id": asset.id,
+            "date": date_n,
+            "timeframe": timeframe,
+            "outcome_date": outcome_date,
+            "correct_bias": str(biases[i]),
+            "setup_chart_path": f"{asset.type}/{asset.symbol}_{date_n.strftime('%Y-%m-%d')}_{timeframe}_setup.png" if chart_paths else None,
+            "outcome_chart_path": f"{asset.type}/{asset.symbol}_{outcome_date.strftime('%Y-%m-%d')}_{timeframe}_outcome.png" if chart_paths else None,
+        })
+
+    ids = upsert_tests(db, rows)
+    logger.info(f"Prepared {len(ids)} tests for {asset.symbol} ({timeframe})")
+    return ids
@@ -0,0 +1,188 @@
+import random
+from typing import List, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import func
+from sqlalchemy.orm import Session, contains_eager
+
+from app.models.test_data import TestData
+from app.api.utils.serialization import question_dict, session_dict
+from app.services import chart_store
+from app.services.asset_cache import asset_catalog, CachedAsset
+from app.services.chart_manifest import chart_manifest
+from app.services.data_service import VALID_TIMEFRAMES
+from app.services.grading import load_graded_tests
+from app.services.render_service import render_service
+
+async def get_or_generate_chart(test_data: TestData, db: Session, answer: dict) -> bool:
+    """Link a test to the charts of its current windows, rendering missing ones; returns whether both are available"""
+    # Skip this function if we're using OHLC data instead
+    # Only for backward compatibility with existing tests
+    if not test_data.setup_chart_path or not test_data.outcome_chart_path:
+        return False
+    
+    asset = asset_catalog.get_by_id(db, test_data.asset_id)
+    if not asset or not answer["ohlc_data"] or len(answer["ohlc_data"]) < 2:
+        return False
+    
+    # Charts are stored by content, so revised candles hash to new paths; the
+    # test is relinked here rather than keep showing the old chart
+    title = chart_store.chart_title(asset.symbol, test_data.timeframe)
+    charts = chart_store.test_charts(title, answer["ohlc_data"], answer["outcome_ohlc_data"])
+    relinked = False
+    for attribute, path, _ in charts:
+        if getattr(test_data, attribute) != path:
+            setattr(test_data, attribute, path)
+            relinked = True
+    if relinked:
+        db.commit()
+    
+    # Existence checks are manifest lookups rather than filesystem probes; both
+    # charts are referenced so they are kept while the session can show them
+    def charts_exist():
+        return chart_manifest.reference(test_data.setup_chart_path) and chart_manifest.reference(test_data.outcome_chart_path)
+    
+    if charts_exist():
+        return True
+    
+    # Under load the question is served with its OHLC data only
+    if render_service.saturated():
+        return False
+    
+    # If either chart is missing, render both from the windows already loaded
+    for _, _, candles in charts:
+        await chart_store.store_chart(candles, title)
+    return charts_exist()
+
+async def build_questions(db: Session, tests: List[TestData]):
+    """Build the questions for tests and the answer data needed to grade them later.
+
+    The candle windows of every test are loaded together, so building a
+    session costs the same number of queries whatever its size.
+    """
+    graded_tests = load_graded_tests(db, tests)
+    
+    questions = []
+    for test in tests:
+        graded = graded_tests[str(test.id)]
+        answer = graded["answer"]
+        
+        # The setup window must end on the tested date itself
+        setup_ohlc_array = answer["ohlc_data"]
+        if not setup_ohlc_array or setup_ohlc_array[-1]["date"] != answer["date"]:
+            del graded_tests[str(test.id)]
+            continue
+        
+        # For backward compatibility, check if charts need to be generated
+        if test.setup_chart_path and test.outcome_chart_path:
+            if await get_or_generate_chart(test, db, answer):
+                # The paths may have just been relinked to the current windows
+                answer["setup_chart_url"] = f"/static/{test.setup_chart_path}"
+                answer["outcome_chart_url"] = f"/static/{test.outcome_chart_path}"
+            else:
+                # Charts that could not be rendered are left out rather than linked broken
+                answer["setup_chart_url"] = None
+                answer["outcome_chart_url"] = None
+        
+        questions.append(question_dict(
+            test.id, answer["setup_chart_url"], answer["date"], test.timeframe, answer["ohlc"], setup_ohlc_array
+        ))
+    
+    return questions, graded_tests
+
+async def build_random_session(db: Session, session_id: str, timeframe: str, exclude=None) -> Tuple[dict, dict]:
+    """Build a cross-asset test session (as a TestSession dict) and the state stored for grading it"""
+    # Served from the in-process catalog, so this costs no query once it is loaded
+    if not asset_catalog.all(db):
+        raise HTTPException(status_code=404, detail="No assets found")
+    
+    # Single candidate query across all assets, with the asset loaded in the same round-trip
+    query = db.query(TestData).join(TestData.asset).options(contains_eager(TestData.asset))
+    
+    # Filter by timeframe if specified
+    if timeframe != "random":
+        query = query.filter(TestData.timeframe == timeframe)
+    
+    # Exclude previously answered tests on retakes
+    if exclude is not None:
+        query = query.filter(~TestData.id.in_(exclude))
+    
+    # Randomly select tests in the database instead of loading every candidate
+    selected_tests = query.order_by(func.random()).limit(5).all()
+    
+    if not selected_tests:
+        raise HTTPException(status_code=404, detail="No tests available")
+    
+    # Format the questions and keep what grading needs in the session state
+    questions, graded_tests = await build_questions(db, selected_tests)
+    # The session is named after the assets of the questions kept, not of every test selected
+    assets_by_id = {test.asset.id: test.asset for test in selected_tests if str(test.id) in graded_tests}
+    
+    # If we have test questions from different assets, use "random" as the symbol
+    # Otherwise, if all questions are from a single asset, use that asset's symbol
+    if len(assets_by_id) == 1:
+        asset = next(iter(assets_by_id.values()))
+        asset_symbol = asset.symbol
+        asset_name = asset.name
+    else:
+        asset_symbol = "random"
+        asset_name = "Random Mix"
+    
+    session = session_dict(session_id, questions, asset_symbol, asset_name, timeframe)
+    state = {
+        "asset_symbol": asset_symbol,
+        "test_ids": [question["id"] for question in questions],
+        "tests": graded_tests
+    }
+    return session, state
+
+async def build_asset_session(
+    db: Session,
+    session_id: str,
+    asset: CachedAsset,
+    timeframe: str,
+    exclude=None
+) -> Tuple[dict, dict]:
+    """Build a test session for one asset (as a TestSession dict) and the state stored for grading it"""
+    # Get available tests for this asset
+    query = db.query(TestData).filter(TestData.asset_id == asset.id)
+    
+    # Filter by timeframe if specified
+    if timeframe != "random":
+        query = query.filter(TestData.timeframe == timeframe)
+    
+    # Exclude previously answered tests on retakes
+    if exclude is not None:
+        query = query.filter(~TestData.id.in_(exclude))
+    
+    tests = query.all()
+    
+    if not tests:
+        available_timeframes = []
+        # Check which timeframes have data for this asset
+        for tf in VALID_TIMEFRAMES:
+            if db.query(TestData).filter(TestData.asset_id == asset.id, TestData.timeframe == tf).first():
+                available_timeframes.append(tf)
+                
+        msg = f"No tests available for {asset.name} with the selected timeframe: {timeframe}."
+        if available_timeframes:
+            msg += f" Available timeframes: {', '.join(available_timeframes)}"
+        else:
+            msg += " No tests available for any timeframe. Please run database initialization."
+            
+        raise HTTPException(status_code=404, detail=msg)
+    
+    # Randomly select tests
+    selected_tests = random.sample(tests, min(5, len(tests)))
+    
+    # Format the questions and keep what grading needs in the session state
+    questions, graded_tests = await build_questions(db, selected_tests)
+    
+    # The catalog's symbol, so pooled and inline sessions spell it the same way
+    session = session_dict(session_id, questions, asset.symbol, asset.name, timeframe)
+    state = {
+        "asset_symbol": asset.symbol,
+        "test_ids": [question["id"] for question in questions],
+        "tests": graded_tests
+    }
+    return session, state
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark for chart rendering.
+
+Compares the mplfinance path (mpf.plot at 300 dpi, as rendered before the
+native renderer) with the native PNG and SVG renderers on a 60-candle
+window. Each renderer runs in a fresh process so import time and peak
+memory are measured per worker, as the render pool would see them.
+"""
+
+import os
+import sys
+import time
+import random
+import resource
+import tempfile
+import multiprocessing
+from datetime import date, timedelta
+
+# Add the parent directory to the path so we can import from the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+NUM_CANDLES = 60
+ITERATIONS = 20
+
+def make_window():
+    """Build a window of synthetic candles as returned by chart_service.get_ohlc_data"""
+    random.seed(42)
+    window = []
+    price = 100.0
+    for i in range(NUM_CANDLES):
+        close = price * (1 + random.uniform(-0.03, 0.03))
+        window.append({
+            "date": (date(2024, 1, 1) + timedelta(days=i)).isoformat(),
+            "open": price,
+            "high": max(price, close) * 1.01,
+            "low": min(price, close) * 0.99,
+            "close": close,
+            "volume": 123456.0 + i
+        })
+        price = close
+    return window
+
+def bench(renderer: str):
+    """Run in a fresh process: returns import seconds, ms per chart, bytes per chart and peak RSS in MB"""
+    started_at = time.perf_counter()
+    if renderer == "mplfinance":
+        os.environ["CHART_RENDERER"] = "mplfinance"
+        from app.services.render_service import _init_worker, _plot_mplfinance
+        _init_worker()
+        render = lambda candles, path: _plot_mplfinance(candles, "BTC - DAILY Chart", path)
+    else:
+        from app.services import native_renderer
+        fmt = "svg" if renderer == "native-svg" else "png"
+        render = lambda candles, path: native_renderer.write_chart(candles, "BTC - DAILY Chart", path, fmt)
+    import_time = time.perf_counter() - started_at
+
+    candles = make_window()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "chart")
+        render(candles, path)  # Warm up
+        started_at = time.perf_counter()
+        for _ in range(ITERATIONS):
+            render(candles, path)
+        per_chart = (time.perf_counter() - started_at) / ITERATIONS
+        size = os.path.getsize(path)
+
+    # ru_maxrss is in kilobytes on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return import_time, per_chart * 1000, size, peak_rss
+
+def main():
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    for renderer in ("mplfinance", "native-png", "native-svg"):
+        with context.Pool(1) as pool:
+            try:
+                results[renderer] = pool.apply(bench, (renderer,))
+            except ImportError as e:
+                print(f"{renderer:12s} skipped: {str(e)}")
+
+    print(f"{NUM_CANDLES} candles, {ITERATIONS} renders each")
+    for renderer, (import_time, per_chart, size, peak_rss) in results.items():
+        print(
+            f"{renderer:12s} import {import_time * 1000:7.0f} ms  render {per_chart:8.1f} ms/chart  "
+            f"{size / 1024:7.1f} KB  peak RSS {peak_rss:6.1f} MB"
+        )
+    if "mplfinance" in results and "native-png" in results:
+        print(f"Speedup (PNG): {results['mplfinance'][1] / results['native-png'][1]:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark for TestResult serialization.
+
+Compares the Pydantic path (validating every OHLC point, then model_dump_json)
+with the orjson fast path used by the test endpoints, for a 5-question result
+with full setup and outcome windows. Both outputs are checked to decode to
+the same JSON document.
+"""
+
+import os
+import sys
+import json
+import timeit
+from datetime import date, timedelta
+
+# Add the parent directory to the path so we can import from the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.schemas import TestResult, TestAnswerResponse
+from app.api.utils.serialization import answer_dict, result_dict, dumps
+
+NUM_QUESTIONS = 5
+NUM_CANDLES = 60
+ITERATIONS = 2000
+
+def make_window(start: date):
+    """Build a window of synthetic candles as returned by chart_service.get_ohlc_data"""
+    window = []
+    price = 100.0
+    for i in range(NUM_CANDLES):
+        window.append({
+            "date": (start + timedelta(days=i)).isoformat(),
+            "open": price,
+            "high": price * 1.02,
+            "low": price * 0.98,
+            "close": price * 1.005,
+            "volume": 123456.0 + i
+        })
+        price *= 1.005
+    return window
+
+def make_stored_answers():
+    """Build the per-question answer data kept in the session state"""
+    answers = []
+    for i in range(NUM_QUESTIONS):
+        start = date(2023, 1, 1) + timedelta(days=i * 90)
+        setup = make_window(start)
+        outcome = make_window(start + timedelta(days=1))
+        answers.append({
+            "test_id": i + 1,
+            "correct_answer": "Bullish",
+            "setup_chart_url": None,
+            "outcome_chart_url": None,
+            "date": setup[-1]["date"],
+            "outcome_date": outcome[-1]["date"],
+            "timeframe": "daily",
+            "ohlc": {key: setup[-1][key] for key in ("open", "high", "low", "close")},
+            "outcome_ohlc": {key: outcome[-1][key] for key in ("open", "high", "low", "close")},
+            "ohlc_data": setup,
+            "outcome_ohlc_data": outcome
+        })
+    return answers
+
+def pydantic_path(stored_answers):
+    answers = [
+        TestAnswerResponse(**answer, user_prediction="Bullish", is_correct=True)
+        for answer in stored_answers
+    ]
+    result = TestResult(score=NUM_QUESTIONS, total=NUM_QUESTIONS, answers=answers, asset_symbol="btc", asset_name="Bitcoin")
+    return result.model_dump_json().encode()
+
+def fast_path(stored_answers):
+    answers = [answer_dict(answer, "Bullish", True) for answer in stored_answers]
+    return dumps(result_dict(NUM_QUESTIONS, NUM_QUESTIONS, answers, "btc", "Bitcoin"))
+
+def main():
+    stored_answers = make_stored_answers()
+
+    slow = pydantic_path(stored_answers)
+    fast = fast_path(stored_answers)
+    if json.loads(slow) != json.loads(fast):
+        print("Outputs differ!")
+        sys.exit(1)
+    print(f"Payload size: {len(fast)} bytes ({NUM_QUESTIONS} questions, {NUM_CANDLES} candles per window)")
+
+    for name, func in (("pydantic", pydantic_path), ("orjson", fast_path)):
+        seconds = timeit.timeit(lambda: func(stored_answers), number=ITERATIONS)
+        print(f"{name:>8}: {seconds / ITERATIONS * 1e6:8.1f} us per result")
+
+if __name__ == "__main__":
+    main()
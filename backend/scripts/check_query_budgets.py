@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Query budget check for the test endpoints.
+
+Runs a full session against a running API started with
+QUERY_STATS_HEADER=true: fetch a test, submit answers, then read the
+results. Each response's X-Query-Stats header is checked against the
+endpoint's budget, so an N+1 loop creeping back into session building or
+grading fails the check with the repeated statements listed in the API log.
+
+Usage: python scripts/check_query_budgets.py [base_url] [asset_symbol]
+"""
+
+import sys
+import uuid
+
+import requests
+
+# (max statements, max repeated statements) per endpoint
+BUDGETS = {
+    # Catalog load if this worker's copy is stale, test selection and one LATERAL query for every candle window
+    "get_test_for_asset": (3, 0),
+    # Snapshot lookups before and inside the session lock (the same statement by design), the legacy
+    # results check, a catalog load if stale, and inserts for user results, the three rollups and the snapshot
+    "submit_test_answers": (9, 1),
+    # Cached snapshot; a cache miss reads Postgres, and legacy sessions add the set-based rebuild
+    "get_test_results": (5, 0),
+}
+
+def parse_header(value: str) -> dict:
+    """Parse "count=3; time_ms=1.2; duplicates=0" into a dict"""
+    fields = dict(part.strip().split("=", 1) for part in value.split(";"))
+    return {"count": int(fields["count"]), "time_ms": float(fields["time_ms"]), "duplicates": int(fields["duplicates"])}
+
+def check(name: str, response: requests.Response) -> bool:
+    response.raise_for_status()
+    value = response.headers.get("x-query-stats")
+    if value is None:
+        sys.exit("No X-Query-Stats header; start the API with QUERY_STATS_HEADER=true")
+
+    fields = parse_header(value)
+    max_queries, max_duplicates = BUDGETS[name]
+    print(f"{name}: {fields['count']} statements, {fields['duplicates']} repeated, {fields['time_ms']:.1f} ms")
+    if fields["count"] > max_queries or fields["duplicates"] > max_duplicates:
+        print(
+            f"  over budget: {max_queries} statements, {max_duplicates} repeated allowed; "
+            "the API log lists the repeated statements"
+        )
+        return False
+    return True
+
+def main():
+    base_url = sys.argv[1] if len(sys.argv) > 1 else "http://localhost:8000"
+    asset_symbol = sys.argv[2] if len(sys.argv) > 2 else "btc"
+    api = f"{base_url.rstrip('/')}/api"
+
+    response = requests.get(f"{api}/test/{asset_symbol}", params={"timeframe": "daily"})
+    ok = check("get_test_for_asset", response)
+    session = response.json()
+
+    answers = [{"test_id": question["id"], "prediction": "Bullish"} for question in session["questions"]]
+    response = requests.post(
+        f"{api}/test/{asset_symbol}",
+        params={"session_id": session["session_id"], "client_id": f"budget-{uuid.uuid4()}"},
+        json=answers
+    )
+    ok = check("submit_test_answers", response) and ok
+
+    response = requests.get(f"{api}/results/{asset_symbol}", params={"session_id": session["session_id"]})
+    ok = check("get_test_results", response) and ok
+
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
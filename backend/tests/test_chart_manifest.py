@@ -0,0 +1,36 @@
+import os
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from app.services import chart_manifest as cm
+
+KEY = "ab" + "0" * 62
+
+def write(path, data: bytes = b"x" * 100):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    os.utime(path, (0, 0))  # Long unused, so nothing is within the eviction grace period
+
+def test_manifest_only_indexes_and_evicts_the_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(cm, "eviction_grace", lambda: 0)
+    stored = f"{cm.STORE_DIR}/ab/{KEY}.png"
+    others = [
+        "crypto/btc_2024-01-01_daily_setup.png",  # A chart outside the store
+        f"{cm.STORE_DIR}/{KEY}.png",  # Not fanned out
+        f"{cm.STORE_DIR}/cd/{KEY}.png",  # In the wrong fan-out directory
+        ".prerender_checkpoint",
+    ]
+    for path in [stored] + others:
+        write(os.path.join(tmp_path, path))
+
+    manifest = cm.ChartManifest(str(tmp_path))
+    manifest.rebuild()
+    assert list(manifest.scan()) == [stored]
+    assert not manifest.add(others[0])
+
+    assert manifest.evict(high_water=0, low_water=0) == (1, 100)
+    assert not os.path.exists(os.path.join(tmp_path, stored))
+    assert all(os.path.exists(os.path.join(tmp_path, path)) for path in others)
@@ -0,0 +1,71 @@
+"""
+Charts are stored by content, so a test whose candles were revised must be
+pointed at the chart of its new window when a session is built.
+"""
+
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+@pytest.fixture
+def charted_asset(db):
+    """An asset of its own whose tests have chart paths, removed afterwards so other tests keep theirs"""
+    from app.models.asset import Asset
+    from app.models.price_data import PriceData
+    from app.models.test_data import TestData
+    from app.services.test_generation import generate_tests
+
+    asset = Asset(symbol="relinkcoin", name="Relink Coin", api_id="relink-coin", type="crypto", is_active=True)
+    db.add(asset)
+    db.flush()
+    start, price = date(2024, 1, 1), 100.0
+    for day in range(60):
+        close = price * (1.02 if day % 3 else 0.97)
+        db.add(PriceData(
+            asset_id=asset.id, date=start + timedelta(days=day), timeframe="daily",
+            open=price, high=max(price, close) * 1.01, low=min(price, close) * 0.99, close=close, volume=1000.0
+        ))
+        price = close
+    db.commit()
+    generate_tests(db, asset, "daily", 3, chart_paths=True)
+
+    try:
+        yield asset
+    finally:
+        db.rollback()
+        db.query(TestData).filter(TestData.asset_id == asset.id).delete()
+        db.query(PriceData).filter(PriceData.asset_id == asset.id).delete()
+        db.query(Asset).filter(Asset.id == asset.id).delete()
+        db.commit()
+
+def test_revised_candles_relink_charts(db, charted_asset, monkeypatch):
+    from app.models.price_data import PriceData
+    from app.models.test_data import TestData
+    from app.services import chart_store
+    from app.services.render_service import render_service
+    from app.services.test_sessions import build_questions
+
+    # Link only: with the pool saturated nothing is rendered
+    monkeypatch.setattr(render_service, "saturated", lambda: True)
+    tests = db.query(TestData).filter(TestData.asset_id == charted_asset.id).order_by(TestData.date).all()
+
+    # The newest of three distinct dates has at least two candles up to it, so it gets charts
+    revised = tests[-1]
+
+    asyncio.run(build_questions(db, tests))
+    before = (revised.setup_chart_path, revised.outcome_chart_path)
+    # The generated placeholders are replaced by stored paths
+    assert all(chart_store.is_stored_path(path) for path in before)
+
+    db.query(PriceData).filter(
+        PriceData.asset_id == charted_asset.id, PriceData.timeframe == "daily", PriceData.date == revised.date
+    ).update({PriceData.close: PriceData.close * 1.5})
+    db.commit()
+
+    _, graded_tests = asyncio.run(build_questions(db, tests))
+    answer = graded_tests[str(revised.id)]["answer"]
+    title = chart_store.chart_title("relinkcoin", "daily")
+    expected = {attribute: path for attribute, path, _ in chart_store.test_charts(title, answer["ohlc_data"], answer["outcome_ohlc_data"])}
+    assert revised.setup_chart_path == expected["setup_chart_path"] != before[0]
+    assert revised.outcome_chart_path == expected["outcome_chart_path"] != before[1]
@@ -0,0 +1,53 @@
+import struct
+import xml.etree.ElementTree as ET
+import zlib
+
+import pytest
+
+from app.services.native_renderer import render_png, render_svg
+
+def candle(date: str, open_: float, high: float, low: float, close: float) -> dict:
+    return {"date": date, "open": open_, "high": high, "low": low, "close": close}
+
+WINDOWS = {
+    # Every price equal, so the price span is zero
+    "flat": [candle(f"2024-01-{day:02d}", 100.0, 100.0, 100.0, 100.0) for day in range(1, 31)],
+    "single": [candle("2024-01-01", 100.0, 105.0, 95.0, 102.0)],
+    "flat_single": [candle("2024-01-01", 0.0, 0.0, 0.0, 0.0)],
+    "trending": [candle(f"2024-01-{day:02d}", 100.0 + day, 102.0 + day, 99.0 + day, 101.0 + day) for day in range(1, 31)],
+}
+
+def read_png(data: bytes):
+    """Check the signature and chunk CRCs; returns the IHDR fields and the decompressed image data"""
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    position, chunks = 8, {}
+    while position < len(data):
+        length, = struct.unpack(">I", data[position:position + 4])
+        kind = data[position + 4:position + 8]
+        body = data[position + 8:position + 8 + length]
+        crc, = struct.unpack(">I", data[position + 8 + length:position + 12 + length])
+        assert zlib.crc32(kind + body) == crc
+        chunks[kind] = chunks.get(kind, b"") + body
+        position += 12 + length
+    assert b"IEND" in chunks
+    return struct.unpack(">IIBBBBB", chunks[b"IHDR"]), zlib.decompress(chunks[b"IDAT"])
+
+@pytest.mark.parametrize("window", WINDOWS)
+def test_render_png_is_valid(window):
+    (width, height, depth, color_type, *_), pixels = read_png(render_png(WINDOWS[window], "TEST - DAILY Chart", 480, 344))
+    assert (width, height, depth, color_type) == (480, 344, 8, 2)
+    # One filter byte and three bytes per pixel on every row
+    assert len(pixels) == height * (1 + width * 3)
+
+@pytest.mark.parametrize("window", WINDOWS)
+def test_render_svg_is_valid(window):
+    root = ET.fromstring(render_svg(WINDOWS[window], "TEST - DAILY Chart"))
+    assert root.tag == "{http://www.w3.org/2000/svg}svg"
+    candles = len(WINDOWS[window])
+    # Background, plot area, then a wick and a body per candle
+    assert len(root.findall("{http://www.w3.org/2000/svg}rect")) == 2 + 2 * candles
+
+def test_render_svg_escapes_title():
+    root = ET.fromstring(render_svg(WINDOWS["single"], "S&P <500> - DAILY Chart"))
+    # The title is drawn last, over the axis labels
+    assert root.findall("{http://www.w3.org/2000/svg}text")[-1].text == "S&P <500> - DAILY Chart"
@@ -0,0 +1,97 @@
+"""
+Query budgets of the test endpoints.
+
+Each request runs in-process inside assert_query_budget with the exact
+number of statements its path runs, so an N+1 loop creeping back into
+session building, grading or results fails here with the repeated
+statements listed. The asset catalog is loaded before each test, so its
+one query is not counted. scripts/check_query_budgets.py checks the same
+endpoints against a running server, where catalog loads and cache misses
+add to the counts.
+"""
+
+import asyncio
+import uuid
+
+import pytest
+
+def request_within_budget(method: str, url: str, max_queries: int, max_duplicates: int = 0, **kwargs):
+    # Imported here so the module collects without a database; the fixtures skip the tests instead
+    import httpx
+    from app.main import app
+    from app.services.query_stats import assert_query_budget
+
+    async def run():
+        # The ASGI transport handles the request in this task, so its statements count towards the budget
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            with assert_query_budget(max_queries, max_duplicates, label=f"{method} {url}"):
+                response = await client.request(method, url, **kwargs)
+        response.raise_for_status()
+        return response
+    return asyncio.run(run())
+
+@pytest.fixture
+def asset_symbol(db, seeded_asset):
+    from app.services.asset_cache import asset_catalog
+
+    asset_catalog.invalidate()
+    asset_catalog.all(db)
+    return seeded_asset
+
+def start_session(asset_symbol: str) -> dict:
+    # Test selection and one LATERAL query for every candle window
+    response = request_within_budget("GET", f"/api/test/{asset_symbol}", 2, params={"timeframe": "daily"})
+    return response.json()
+
+def answers_for(session: dict) -> list:
+    return [{"test_id": question["id"], "prediction": "Bullish"} for question in session["questions"]]
+
+def submit(asset_symbol: str, session: dict):
+    # Snapshot lookups before and inside the session lock (the one repeat, by design), the
+    # legacy results check, then one insert each for user results, the three rollups and the snapshot
+    return request_within_budget(
+        "POST", f"/api/test/{asset_symbol}", 8, 1,
+        params={"session_id": session["session_id"], "client_id": f"budget-{uuid.uuid4()}"},
+        json=answers_for(session)
+    )
+
+def test_get_test_for_asset_within_budget(asset_symbol):
+    session = start_session(asset_symbol)
+    assert session["questions"]
+
+def test_submit_test_answers_within_budget(asset_symbol):
+    session = start_session(asset_symbol)
+    result = submit(asset_symbol, session).json()
+    assert result["total"] == len(session["questions"])
+
+def test_resubmit_replays_cached_snapshot_without_queries(asset_symbol):
+    session = start_session(asset_symbol)
+    submit(asset_symbol, session)
+    request_within_budget(
+        "POST", f"/api/test/{asset_symbol}", 0,
+        params={"session_id": session["session_id"]}, json=answers_for(session)
+    )
+
+def test_get_test_results_from_cached_snapshot_without_queries(asset_symbol):
+    session = start_session(asset_symbol)
+    submit(asset_symbol, session)
+    response = request_within_budget("GET", f"/api/results/{asset_symbol}", 0, params={"session_id": session["session_id"]})
+    assert response.json()["total"] == len(session["questions"])
+
+def test_get_test_results_rebuild_within_budget(db, asset_symbol):
+    from app.models.result_snapshot import ResultSnapshot
+    from app.services.kv_store import kv_store
+    from app.services.result_snapshots import snapshot_key
+
+    session = start_session(asset_symbol)
+    expected = submit(asset_symbol, session).json()
+
+    # A session submitted before snapshots existed: only its user results are left
+    kv_store.delete(snapshot_key(session["session_id"]))
+    db.query(ResultSnapshot).filter(ResultSnapshot.session_id == session["session_id"]).delete()
+    db.commit()
+
+    # Snapshot lookup, the session's user results, their tests, their candle windows and the new snapshot
+    response = request_within_budget("GET", f"/api/results/{asset_symbol}", 5, params={"session_id": session["session_id"]})
+    assert response.json()["score"] == expected["score"]
+    assert response.json()["total"] == expected["total"]
@@ -0,0 +1,42 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from app.services import render_service as rs
+
+class ThreadRenderService(rs.RenderService):
+    """Runs jobs on a thread so the test can hold one open without a worker process"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def _get_pool(self):
+        return self.executor
+
+def test_timed_out_render_still_counts_toward_queue(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(rs, "render_candles", lambda candles, title, full_path: release.wait(5))
+    service = ThreadRenderService(workers=1, queue_size=1, timeout=0.05)
+
+    async def run():
+        assert await service.render([], "TEST", "slow.png") is False  # Timed out, still running
+        assert service.pending == 1 and service.saturated()
+        assert await service.render([], "TEST", "next.png") is False  # Shed, not queued behind it
+
+        release.set()
+        for _ in range(100):
+            if not service.pending:
+                break
+            await asyncio.sleep(0.01)
+        assert service.pending == 0 and not service.saturated()
+
+    try:
+        asyncio.run(run())
+    finally:
+        release.set()
+        service.executor.shutdown(wait=True)
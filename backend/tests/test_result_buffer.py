@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("redis")
+
+from app.services import result_buffer as rb
+
+@pytest.fixture
+def buffer(monkeypatch):
+    # Idle entries are redelivered on the next read
+    buffer = rb.InMemoryResultBuffer(claim_idle_ms=0)
+    monkeypatch.setattr(rb, "result_buffer", buffer)
+    monkeypatch.setattr(rb.settings, "RESULT_BUFFER_MAX_DELIVERIES", 3)
+    return buffer
+
+@pytest.fixture
+def flushed(monkeypatch):
+    """Session ids written by the flushes; a batch holding the "bad" session fails as a whole"""
+    flushed = []
+
+    def flush_batch(entries):
+        if any(entry["session_id"] == "bad" for _, entry in entries):
+            raise ValueError("insert or update on table user_results violates foreign key constraint")
+        flushed.extend(entry["session_id"] for _, entry in entries)
+        return len(entries)
+
+    monkeypatch.setattr(rb, "_flush_batch", flush_batch)
+    return flushed
+
+def drain() -> int:
+    return asyncio.run(rb.drain_result_buffer(block_ms=0))
+
+def test_failing_entry_does_not_hold_up_its_batch(buffer, flushed):
+    for session_id in ("first", "bad", "last"):
+        buffer.append({"session_id": session_id})
+    drain()
+    assert flushed == ["first", "last"]
+
+def test_failing_entry_is_dead_lettered_after_max_deliveries(buffer, flushed):
+    buffer.append({"session_id": "bad"})
+    for _ in range(3):
+        drain()
+    assert [entry["session_id"] for _, entry, _ in buffer.dead_letters] == ["bad"]
+    # It is acknowledged, so it is not delivered again
+    assert drain() == 0
@@ -0,0 +1,75 @@
+import uuid
+from datetime import date, timedelta
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("sqlalchemy")
+
+from app.services.test_generation import choose_dates, generate_tests, label_biases, upsert_tests
+
+def test_label_biases_compares_each_close_with_the_next():
+    closes = np.array([100.0, 101.0, 101.0, 99.5, 102.0])
+    # An unchanged close counts as Bearish
+    assert label_biases(closes).tolist() == ["Bullish", "Bearish", "Bearish", "Bullish"]
+
+def test_label_biases_leaves_out_the_last_close():
+    assert len(label_biases(np.array([1.0, 2.0, 3.0]))) == 2
+    assert len(label_biases(np.array([1.0]))) == 0
+
+def test_choose_dates_returns_distinct_sorted_indices():
+    chosen = choose_dates(50, 10, np.random.default_rng(1))
+    assert len(chosen) == 10
+    assert len(set(chosen.tolist())) == 10
+    assert chosen.tolist() == sorted(chosen.tolist())
+    assert 0 <= chosen.min() and chosen.max() < 50
+
+def test_choose_dates_is_capped_at_eligible_dates():
+    assert choose_dates(3, 10).tolist() == [0, 1, 2]
+
+@pytest.fixture
+def asset(db):
+    from app.models.asset import Asset
+
+    asset = Asset(symbol=f"gen-{uuid.uuid4().hex[:8]}", name="Generated", api_id="generated", type="crypto", is_active=True)
+    db.add(asset)
+    db.commit()
+    return asset
+
+def test_upsert_tests_updates_bias_and_keeps_chart_paths(db, asset):
+    from app.models.test_data import TestData
+
+    row = {
+        "asset_id": asset.id, "date": date(2024, 1, 1), "timeframe": "daily", "outcome_date": date(2024, 1, 2),
+        "correct_bias": "Bullish", "setup_chart_path": "charts/ab/setup.png", "outcome_chart_path": "charts/ab/outcome.png",
+    }
+    first_ids = upsert_tests(db, [row])
+
+    regenerated = {**row, "correct_bias": "Bearish", "setup_chart_path": None, "outcome_chart_path": None}
+    assert upsert_tests(db, [regenerated]) == first_ids
+
+    test = db.get(TestData, first_ids[0])
+    db.refresh(test)
+    assert test.correct_bias == "Bearish"
+    assert (test.setup_chart_path, test.outcome_chart_path) == ("charts/ab/setup.png", "charts/ab/outcome.png")
+
+def test_generate_tests_labels_from_the_next_close(db, asset):
+    from app.models.price_data import PriceData
+    from app.models.test_data import TestData
+
+    closes = [100.0, 103.0, 101.0, 101.0, 104.0, 102.0, 105.0]
+    start = date(2024, 1, 1)
+    for day, close in enumerate(closes):
+        db.add(PriceData(
+            asset_id=asset.id, date=start + timedelta(days=day), timeframe="daily",
+            open=close, high=close, low=close, close=close, volume=1.0
+        ))
+    db.commit()
+
+    ids = generate_tests(db, asset, "daily", len(closes))
+    # Every date but the last has a next candle to label it
+    assert len(ids) == len(closes) - 1
+    for test in db.query(TestData).filter(TestData.id.in_(ids)):
+        day = (test.date - start).days
+        assert test.outcome_date == start + timedelta(days=day + 1)
+        assert test.correct_bias == ("Bullish" if closes[day + 1] > closes[day] else "Bearish")